@@ -18,20 +18,40 @@ try:
     from .XXX_command_helper import XXX_CommandHelper as CommandHelper
 except ImportError:
     from .command_helper import CommandHelper
-from .shared_enums import CommandOperation, DebugLogLevel, BssIdentifierBand, WpsDeviceRole
+from .shared_enums import CommandOperation, DebugLogLevel, BssIdentifierBand, WpsDeviceRole, HostapdReconfigPath
 from .command_interpreter import CommandInterpreter
 from .command import Command
+from .process_supervisor import process_supervisor, HOSTAPD, DEFAULT_READY_TIMEOUT, READY_POLL_INTERVAL
+from .config_fingerprint import config_fingerprints
+from .hostapd_config import HostapdConfig, MU_EDCA_BLOCK
+from .channel_plan import ChannelPlan, BAND_5GHZ, BAND_6GHZ, OPER_CHWIDTH_TO_MHZ, MHZ_TO_OPER_CHWIDTH, EHT_OPER_CHWIDTH_320MHZ
+from .bss_registry import bss_registry
+from .hostapd_config_diff import HostapdConfigDiff, HostapdReconfigPlan
+from .wpa_ctrl import ctrl_request
+from .dut_capabilities import dut_capabilities
+from .dut_environment import dut_path
 from datetime import datetime
 from Commands.dut_logger import DutLogger, LogCategory
 import os
+import time
 from datetime import datetime
 
 command_interpreter_obj = CommandInterpreter()
 store_hostapd_config_for_debug = False
 ap_debug_log_level = DebugLogLevel.DISABLE
-hostapd_log_folder_path = "/var/log/hostapd.log"
-hostapd_config_path = "/etc/hostapd/hostapd.conf"
+hostapd_log_folder_path = dut_path("/var/log/hostapd.log")
+hostapd_config_dir = dut_path("/etc/hostapd")
+hostapd_config_path = os.path.join(hostapd_config_dir, "hostapd.conf")
+hostapd_binary_path = dut_path("/usr/local/bin/WFA-Hostapd-Supplicant/hostapd")
+hostapd_global_ctrl_path = dut_path("/run/hostapd-global")
+hostapd_ctrl_interface_path = dut_path("/var/run/hostapd")
 hostapd_config_files = []
+# {file name: HostapdConfig} generated by AP_CONFIGURE
+hostapd_config_models = {}
+# {file name: HostapdConfig} hostapd is currently running with, and its debug level option
+running_hostapd_configs = {}
+running_hostapd_debug_level = None
+dut_capabilities.set_binary_path(HOSTAPD, hostapd_binary_path)
 
 
 class ApCommandHelper:
@@ -55,7 +75,8 @@ class ApCommandHelper:
             hostapd_file_name = "hostapd.conf"
             if "hostapd_file_name" in configuration:
                 hostapd_file_name = configuration.pop("hostapd_file_name")
-            hostapd_config_files.append(hostapd_file_name)
+            if hostapd_file_name not in hostapd_config_files:
+                hostapd_config_files.append(hostapd_file_name)
         else:
             hostapd_file_name = hostapd_config_files[0]
 
@@ -64,7 +85,7 @@ class ApCommandHelper:
         else:
             interface_name = CommandHelper.get_interface_name()
 
-        hostapd_config, std_err = ApCommandHelper.get_hostapd_config(
+        hostapd_config_model, std_err = ApCommandHelper.build_hostapd_config(
             configuration, interface_name, append_config_file
         )
         if std_err is None:
@@ -72,22 +93,26 @@ class ApCommandHelper:
                 now = datetime.now()
                 dt_string = now.strftime("%d%m%Y_%H:%M:%S")
 
+                if append_config_file:
+                    DutLogger.log(LogCategory.DEBUG, "Appending the following configuration into Hostapd file:\n" + hostapd_config_model.render())
+                    existing_config = ApCommandHelper.get_hostapd_config_model(hostapd_file_name)
+                    # A new model is kept since the previous one may be the running configuration
+                    hostapd_config_model = existing_config.merge(hostapd_config_model)
+                hostapd_config = hostapd_config_model.render()
                 if not append_config_file:
-                    DutLogger.log(LogCategory.DEBUG, "Writing the following configuration into Hostapd file:\n" + str(hostapd_config))
-                    with open(("/etc/hostapd/{}").format(hostapd_file_name), "w+") as file:
-                        file.write(hostapd_config)
-                else:
-                    DutLogger.log(LogCategory.DEBUG, "Appending the following configuration into Hostapd file:\n" + str(hostapd_config))
-                    with open(("/etc/hostapd/{}").format(hostapd_file_name), "a") as file:
-                        file.write(hostapd_config)
+                    DutLogger.log(LogCategory.DEBUG, "Writing the following configuration into Hostapd file:\n" + hostapd_config)
+                with open(os.path.join(hostapd_config_dir, hostapd_file_name), "w+") as file:
+                    file.write(hostapd_config)
+                hostapd_config_models[hostapd_file_name] = hostapd_config_model
+                config_fingerprints.set_file_content(os.path.join(hostapd_config_dir, hostapd_file_name), hostapd_config)
 
                 if store_hostapd_config_for_debug:
-                    hostapd_file_path = "/etc/hostapd/hostapd_files"
+                    hostapd_file_path = os.path.join(hostapd_config_dir, "hostapd_files")
                     if not os.path.exists(hostapd_file_path):
                         os.mkdir(hostapd_file_path)
                     try:
                         with open(
-                            "/etc/hostapd/hostapd_files/hostapd" + str(dt_string), "w+"
+                            os.path.join(hostapd_file_path, "hostapd" + str(dt_string)), "w+"
                         ) as file:
                             file.write(hostapd_config)
                     except IOError as err:
@@ -100,18 +125,29 @@ class ApCommandHelper:
             DutLogger.log(LogCategory.ERROR, "Error creating Hostapd file:\n" + str(std_err))
             return None, "Unable to create hostapd configuration."
 
+    @staticmethod
+    def get_hostapd_config_model(hostapd_file_name):
+        """Returns the configuration model of a hostapd configuration file, parsed from the file if not generated yet."""
+        if hostapd_file_name in hostapd_config_models:
+            return hostapd_config_models[hostapd_file_name]
+        hostapd_file_path = os.path.join(hostapd_config_dir, hostapd_file_name)
+        if os.path.exists(hostapd_file_path):
+            with open(hostapd_file_path) as file_reader:
+                return HostapdConfig.parse(file_reader.read())
+        return HostapdConfig()
+
     @staticmethod
     def store_hostapd_config():
         """Stores the existing hostapd configuration in /var/log folder"""
         global hostapd_config_files
         if hostapd_config_files:
-            qt_configs_folder = "/var/log/qt_configs/"
+            qt_configs_folder = dut_path("/var/log/qt_configs/")
             if not os.path.exists(qt_configs_folder):
                 CommandHelper.run_shell_command("sudo mkdir {}".format(qt_configs_folder))
             for each_hostapd_config in hostapd_config_files:
                 now = datetime.now()
                 dt_string = now.isoformat()
-                CommandHelper.run_shell_command("sudo mv /etc/hostapd/{} {}hostapd_{}.conf".format(each_hostapd_config, qt_configs_folder, dt_string))
+                CommandHelper.run_shell_command("sudo mv {} {}hostapd_{}.conf".format(os.path.join(hostapd_config_dir, each_hostapd_config), qt_configs_folder, dt_string))
 
     @staticmethod
     def get_existing_hostapd_conf():
@@ -119,9 +155,8 @@ class ApCommandHelper:
         existing_config = {}
         if os.path.exists(hostapd_config_path):
             with open(hostapd_config_path) as file_reader:
-                for each_line in file_reader:
-                    key, val = each_line.split("=")
-                    existing_config[key] = val.rstrip()
+                for params in HostapdConfig.parse(file_reader.read()).get_section_dict().values():
+                    existing_config.update(params)
         return existing_config
 
     @staticmethod
@@ -137,80 +172,78 @@ class ApCommandHelper:
         merge_config_file : bool
             Flag to indicate if new hostapd config file has to be create or the new config has to be merged into existing file
         """
+        hostapd_config, std_err = ApCommandHelper.build_hostapd_config(tlv_values, interface_name, append_config_file)
+        if std_err is not None:
+            return None, std_err
+        return hostapd_config.render(), None
+
+    @staticmethod
+    def build_hostapd_config(tlv_values: dict, interface_name: str, append_config_file: bool):
+        """Builds the hostapd configuration model from TLV's(type-length-value).
+
+        Parameters
+        ----------
+        tlv_values : dict
+            Configurations in TLVs
+        interface_name:str
+            Interface name to be configured.
+        append_config_file : bool
+            True to build a bss= section to be appended to an existing configuration file
+
+        Returns
+        -------
+        HostapdConfig
+            The configuration, None on error.
+        """
         if interface_name is None:
             return None, "Unable to get interface name."
+        hostapd_config = HostapdConfig()
         if append_config_file:
-            hostapd_config = (
-                "bss=" + interface_name +"\nctrl_interface=/var/run/hostapd"
-            )
+            section = hostapd_config.add_section("bss", interface_name)
+            section.set("ctrl_interface", hostapd_ctrl_interface_path)
         else:
-            hostapd_config = (
-                "ctrl_interface=/var/run/hostapd\nctrl_interface_group=0\ninterface=" + interface_name
-            )
-        has_sae = False
-        has_wpa = False
-        has_pmf = False
-        has_owe = False
-        has_transition = False
-        band = None
-        channel = None
+            preamble = hostapd_config.get_preamble()
+            preamble.set("ctrl_interface", hostapd_ctrl_interface_path)
+            preamble.set("ctrl_interface_group", "0")
+            section = hostapd_config.add_section("interface", interface_name)
+
+        wpa_key_mgmt = tlv_values.get("wpa_key_mgmt", "")
+        has_sae = "SAE" in wpa_key_mgmt
+        has_owe = "OWE" in wpa_key_mgmt
+        has_transition = has_sae and "WPA-PSK" in wpa_key_mgmt
+        has_wpa = "2" in tlv_values.get("wpa", "")
+        has_pmf = "ieee80211w" in tlv_values
+        band = tlv_values.get("hw_mode")
+        channel = int(tlv_values["channel"]) if "channel" in tlv_values else None
+        enable_ac = "1" in tlv_values.get("ieee80211ac", "")
+        enable_ax = "1" in tlv_values.get("ieee80211ax", "")
+        chwidthset = "he_oper_chwidth" in tlv_values
+        vht_chwidthset = "vht_oper_chwidth" in tlv_values
+        use_mbss = "bss_identifier" in tlv_values
+        enable_wps = "wps_enable" in tlv_values
         chwidth = 1
-        enable_ax = enable_ac = False
-        chwidthset = vht_chwidthset = False
-        enable_muedca = False
-        has_sae_groups = False
-        enable_wps = False
-        use_mbss = False
         for tlv_value in tlv_values:
-            if tlv_value == "wpa_key_mgmt" and "SAE" in tlv_values[tlv_value] and "WPA-PSK" in tlv_values[tlv_value]:
-                has_transition = True
-            if tlv_value == "wpa_key_mgmt" and "OWE" in tlv_values[tlv_value]:
-                has_owe = True
-            if tlv_value == "wpa_key_mgmt" and "SAE" in tlv_values[tlv_value]:
-                has_sae = True
-            if tlv_value == "wpa" and "2" in tlv_values[tlv_value]:
-                has_wpa = True
-            if tlv_value == "ieee80211w":
-                has_pmf = True
-            if tlv_value == "hw_mode":
-                band = tlv_values[tlv_value]
-            if tlv_value == "channel":
-                channel = int(tlv_values[tlv_value])
-            if tlv_value == "he_oper_chwidth":
+            if tlv_value in ("he_oper_chwidth", "vht_oper_chwidth"):
                 chwidth = int(tlv_values[tlv_value])
-                chwidthset = True
-            if tlv_value == "vht_oper_chwidth":
-                chwidth = int(tlv_values[tlv_value])
-                vht_chwidthset = True
-            if tlv_value == "ieee80211ac" and "1" in tlv_values[tlv_value]:
-                enable_ac = True
-            if tlv_value == "ieee80211ax" and "1" in tlv_values[tlv_value]:
-                enable_ax = True
-            if tlv_value == "he_mu_edca":
-                enable_muedca = True
-            if tlv_value == "sae_groups":
-                has_sae_groups = True
             if tlv_value == "bss_identifier":
-                use_mbss = True
                 continue
             if tlv_value == "wps_enable":
                 wps_setting = CommandHelper.get_wps_settings(WpsDeviceRole.WPS_AP)
-                enable_wps = True
                 if tlv_values[tlv_value] == "1":
                     # Normal, set wps state and wps common settings
                     for cfg_item in wps_setting:
                         if cfg_item[2][0] == "1":
                             # OOB only
                             if cfg_item[0] == "wps_state":
-                                hostapd_config += "\n" + cfg_item[0] + "=" + "2"
+                                section.set(cfg_item[0], "2")
                         elif cfg_item[2][0] == "2":
                             # Common settings
-                            hostapd_config += "\n" + cfg_item[0] + "=" + cfg_item[1]
+                            section.set(cfg_item[0], cfg_item[1])
                 elif tlv_values[tlv_value] == "2":
                     # OOB, set all settings
                     DutLogger.log(LogCategory.INFO, "APUT Configure WPS: OOB.")
                     for cfg_item in wps_setting:
-                        hostapd_config += "\n" + cfg_item[0] + "=" + cfg_item[1]
+                        section.set(cfg_item[0], cfg_item[1])
                 else:
                     DutLogger.log(LogCategory.ERROR, "Unknown WPS TLV value: {}".format(tlv_values[tlv_value]))
                 continue
@@ -223,155 +256,306 @@ class ApCommandHelper:
                 if not owe_if:
                     owe_if = CommandHelper.set_interface_bss_id(band=bss_band, bss_id=identifier)
                 if owe_if:
-                    hostapd_config += "\n" + "owe_transition_ifname" + "=" + owe_if
+                    section.set("owe_transition_ifname", owe_if)
                     if has_owe:
-                        hostapd_config += "\n" + "ignore_broadcast_ssid=1"
+                        section.set("ignore_broadcast_ssid", "1")
                 else:
                     DutLogger.log(LogCategory.ERROR, "Can't find owe transition ifname")
             elif tlv_value == "transition_disable":
-                hostapd_config += "\n" + tlv_value + "=" + hex(int(tlv_values[tlv_value]))
+                section.set(tlv_value, hex(int(tlv_values[tlv_value])))
             elif tlv_value == "auth_algorithm":
-                hostapd_config += "\n" + "auth_algs" + "=" + tlv_values[tlv_value]
+                section.set("auth_algs", tlv_values[tlv_value])
             elif tlv_value == "he_mu_edca":
-                hostapd_config += "\n" + "he_mu_edca_qos_info_param_count" + "=" + tlv_values[tlv_value]
+                section.set("he_mu_edca_qos_info_param_count", tlv_values[tlv_value])
             else:
-                hostapd_config += "\n" + tlv_value + "=" + tlv_values[tlv_value]
+                section.set(tlv_value, tlv_values[tlv_value])
 
         if not has_pmf:
             if has_transition:
-                hostapd_config += "\nieee80211w=1"
+                section.set("ieee80211w", "1")
             elif has_sae and has_wpa:
-                hostapd_config += "\nieee80211w=2"
+                section.set("ieee80211w", "2")
             elif has_owe:
-                hostapd_config += "\nieee80211w=2"
+                section.set("ieee80211w", "2")
             elif has_wpa:
-                hostapd_config += "\nieee80211w=1"
+                section.set("ieee80211w", "1")
         if has_sae:
-            hostapd_config += "\nsae_require_mfp=1"
-        # Note: if any new DUT configuration is added for sae_groups,
-        # then the following unconditional sae_groups addition should be
-        # changed to become conditional on there being no other sae_groups
-        # configuration
-        # e.g.:
-            if not has_sae_groups:
-                hostapd_config += "\nsae_groups=15 16 17 18 19 20 21"
-
-        # Todo: Add 6G conf
+            section.set("sae_require_mfp", "1")
+            # Note: if any new DUT configuration is added for sae_groups,
+            # then the following unconditional sae_groups addition should be
+            # changed to become conditional on there being no other sae_groups
+            # configuration
+            if "sae_groups" not in tlv_values:
+                section.set("sae_groups", "15 16 17 18 19 20 21")
+
         #Channel width configuration
-        #Default: 20MHz in 2.4G(No configuration required) 80MHz in 5G
-        if band == "a":
+        #Default: 20MHz in 2.4G(No configuration required) 80MHz in 5G and 6G
+        if band == "a" and "he_6g_only" in tlv_values and not dut_capabilities.supports_band(BAND_6GHZ):
+            return None, "6GHz is not supported by the wireless phys: " + dut_capabilities.format_phys()
+        if band == "a" and "he_6g_only" in tlv_values:
+            width = OPER_CHWIDTH_TO_MHZ.get(chwidth, 20)
+            # oper_chwidth 0 is 20 MHz unless 40 MHz is asked with HT40 or its operating class
+            if "op_class" in section:
+                width = ChannelPlan.get_6ghz_width(int(section.get("op_class"))) or width
+            elif chwidth == 0 and "HT40" in section.get("ht_capab", ""):
+                width = 40
+            channel_info = ChannelPlan.get_channel_info(BAND_6GHZ, channel, width)
+            if channel_info is None:
+                DutLogger.log(LogCategory.ERROR, "Channel {} is not a 6GHz channel of {}MHz".format(channel, width))
+            else:
+                if "op_class" not in section:
+                    section.set("op_class", channel_info.op_class)
+                if width == 320:
+                    # The HE operation of a 320 MHz BSS covers the 160 MHz channel of the primary
+                    section.set("ieee80211be", "1")
+                    section.set("eht_oper_chwidth", EHT_OPER_CHWIDTH_320MHZ)
+                    section.set("eht_oper_centr_freq_seg0_idx", channel_info.center_idx)
+                    section.set("he_oper_chwidth", MHZ_TO_OPER_CHWIDTH[160])
+                    section.set("he_oper_centr_freq_seg0_idx",
+                                ChannelPlan.get_center_freq_idx(BAND_6GHZ, channel, 160))
+                elif width > 20:
+                    if not chwidthset:
+                        section.set("he_oper_chwidth", MHZ_TO_OPER_CHWIDTH[width])
+                    section.set("he_oper_centr_freq_seg0_idx", channel_info.center_idx)
+        elif band == "a":
             if __class__.is_ht40plus_chan(channel):
-                hostapd_config += "\nht_capab=[HT40+]"
+                section.set("ht_capab", "[HT40+]")
             elif __class__.is_ht40minus_chan(channel):
-                hostapd_config += "\nht_capab=[HT40-]"
+                section.set("ht_capab", "[HT40-]")
             else:
-                chwidth = 0    
+                chwidth = 0
             if chwidth > 0:
                 center_freq = ApCommandHelper.get_center_freq_idx(channel, chwidth)
                 if enable_ac:
-                    if vht_chwidthset == False:
-                        hostapd_config += "\nvht_oper_chwidth="+str(chwidth)
-                    hostapd_config += "\nvht_oper_centr_freq_seg0_idx="+str(center_freq)
+                    if not vht_chwidthset:
+                        section.set("vht_oper_chwidth", chwidth)
+                    section.set("vht_oper_centr_freq_seg0_idx", center_freq)
                 if enable_ax:
-                    if chwidthset == False:
-                        hostapd_config += "\nhe_oper_chwidth="+str(chwidth)
-                    hostapd_config += "\nhe_oper_centr_freq_seg0_idx="+str(center_freq)
-
-        if enable_muedca:
-            hostapd_config += "\nhe_mu_edca_qos_info_queue_request=1"
-            hostapd_config += "\nhe_mu_edca_ac_be_aifsn=0"
-            hostapd_config += "\nhe_mu_edca_ac_be_ecwmin=15"
-            hostapd_config += "\nhe_mu_edca_ac_be_ecwmax=15"
-            hostapd_config += "\nhe_mu_edca_ac_be_timer=255"
-            hostapd_config += "\nhe_mu_edca_ac_bk_aifsn=0"
-            hostapd_config += "\nhe_mu_edca_ac_bk_aci=1"
-            hostapd_config += "\nhe_mu_edca_ac_bk_ecwmin=15"
-            hostapd_config += "\nhe_mu_edca_ac_bk_ecwmax=15"
-            hostapd_config += "\nhe_mu_edca_ac_bk_timer=255"
-            hostapd_config += "\nhe_mu_edca_ac_vi_ecwmin=15"
-            hostapd_config += "\nhe_mu_edca_ac_vi_ecwmax=15"
-            hostapd_config += "\nhe_mu_edca_ac_vi_aifsn=0"
-            hostapd_config += "\nhe_mu_edca_ac_vi_aci=2"
-            hostapd_config += "\nhe_mu_edca_ac_vi_timer=255"
-            hostapd_config += "\nhe_mu_edca_ac_vo_aifsn=0"
-            hostapd_config += "\nhe_mu_edca_ac_vo_aci=3"
-            hostapd_config += "\nhe_mu_edca_ac_vo_ecwmin=15"
-            hostapd_config += "\nhe_mu_edca_ac_vo_ecwmax=15"
-            hostapd_config += "\nhe_mu_edca_ac_vo_timer=255"
-        
+                    if not chwidthset:
+                        section.set("he_oper_chwidth", chwidth)
+                    section.set("he_oper_centr_freq_seg0_idx", center_freq)
+
+        if "he_mu_edca" in tlv_values:
+            section.add_block(MU_EDCA_BLOCK)
+
         if enable_wps:
             if use_mbss:
-               hostapd_config += "\nwps_rf_bands=ag"
-            else: 
-                if band == "a":
-                    hostapd_config += "\nwps_rf_bands=a"
-                elif band == "g":
-                    hostapd_config += "\nwps_rf_bands=g"
-
-        '''
-        if merge_config_file:
-            appended_hostapd_conf_str = ""
-            existing_conf = ApCommandHelper.get_existing_hostapd_conf()
-            hostapd_config_dict = ApCommandHelper.__convert_config_str_to_dict(config=hostapd_config)
-            for each_key in existing_conf:
-                if each_key not in hostapd_config_dict:
-                    hostapd_config_dict[each_key] = existing_conf[each_key]
-            for each_hostapd_conf in hostapd_config_dict:
-                appended_hostapd_conf_str += each_hostapd_conf + "=" + hostapd_config_dict[each_hostapd_conf] + "\n"
-            hostapd_config = appended_hostapd_conf_str.rstrip()
-        '''
-
-        hostapd_config += "\n"
-        return hostapd_config, None
-
-    @staticmethod
-    def __convert_config_str_to_dict(config: str):
-        """Converting string into dictionary using dict comprehension
-        Parameters
-        -----------
-        config : [str]
-            Converts the configuration from datatype string to dictionary.
-        """
-        config_dict = dict(each_config.split("=") for each_config in config.split("\n"))
-        return config_dict
+                section.set("wps_rf_bands", "ag")
+            elif band == "a":
+                section.set("wps_rf_bands", "a")
+            elif band == "g":
+                section.set("wps_rf_bands", "g")
 
+        return hostapd_config, None
 
     @staticmethod
     def ap_start_up():
-        """Starts the hostapd service on the AP."""
-        global hostapd_config_files
+        """Starts the hostapd service on the AP.
+
+        If hostapd is already running and the new configuration only differs by parameters
+        hostapd can change at runtime, they are applied through its control interface instead.
+        With the fast path enabled, a hostapd running or parked with the exact same configuration
+        is resumed and checked instead of restarted.
+        """
+        global hostapd_config_files, running_hostapd_configs, running_hostapd_debug_level
         #ApCommandHelper.store_test_artifcats = True
         debug_log_level = ApCommandHelper.__get_ap_debug_log_level()
         now = datetime.now()
         dt_string = now.isoformat()
 
-        ApCommandHelper.__killall_hostapd()
+        hostapd_start_command = [hostapd_binary_path, "-t", "-g", hostapd_global_ctrl_path]
+        config_paths = [os.path.join(hostapd_config_dir, each_hostapd_file) for each_hostapd_file in hostapd_config_files]
+        hostapd_start_command += config_paths
+        if debug_log_level:
+            hostapd_start_command += ["-f", hostapd_log_folder_path, debug_log_level]
+        start_hash = config_fingerprints.get_start_hash(hostapd_start_command, config_paths)
+
+        new_configs = {file_name: hostapd_config_models.get(file_name, HostapdConfig()) for file_name in hostapd_config_files}
+        process = process_supervisor.get(HOSTAPD)
+        if config_fingerprints.matches(HOSTAPD, start_hash, process):
+            parked = config_fingerprints.is_parked(HOSTAPD, process)
+            if ApCommandHelper.__resume_hostapd(ApCommandHelper.get_hostapd_interfaces(new_configs), parked):
+                config_fingerprints.unpark(HOSTAPD)
+                running_hostapd_configs = new_configs
+                ApCommandHelper.update_bss_registry(ApCommandHelper.get_hostapd_interfaces(new_configs))
+                std_out, std_err = ApCommandHelper.__set_up_bridge()
+                if std_err is not None:
+                    return None, std_err
+                return "Hostapd service is active (fast path: same configuration {})".format(
+                    "resumed" if parked else "already running"), None
+            plan = HostapdReconfigPlan(HostapdReconfigPath.RESTART, "fast path check failed")
+        elif running_hostapd_configs and ApCommandHelper.check_hostapd_is_active():
+            plan = HostapdConfigDiff.compare(running_hostapd_configs, new_configs)
+            if debug_log_level != running_hostapd_debug_level:
+                plan = HostapdReconfigPlan(HostapdReconfigPath.RESTART, "debug level changed")
+            if plan.path != HostapdReconfigPath.RESTART and ApCommandHelper.apply_hostapd_reconfig_plan(plan):
+                running_hostapd_configs = new_configs
+                config_fingerprints.record(HOSTAPD, start_hash, process)
+                ApCommandHelper.update_bss_registry(ApCommandHelper.get_hostapd_interfaces(new_configs))
+                return "Hostapd service is active ({})".format(plan.describe()), None
+        else:
+            plan = HostapdReconfigPlan(HostapdReconfigPath.RESTART, "hostapd is not running")
+
+        ApCommandHelper.__stop_hostapd()
         ApCommandHelper.clear_hostapd_logs()
-        std_out, std_err = CommandHelper.run_shell_command("hostapd -v")
-        if std_err is None:
+        if dut_capabilities.is_installed(HOSTAPD):
             #Create new interfaces
 
-            hostapd_start_command = "/usr/local/bin/WFA-Hostapd-Supplicant/hostapd -B -t -g /run/hostapd-global"
-            for each_hostapd_file in hostapd_config_files:
-                hostapd_start_command += " /etc/hostapd/{}".format(each_hostapd_file)
-
-            if debug_log_level:
-                hostapd_start_command += " -f {} {}".format(hostapd_log_folder_path, debug_log_level)
-            CommandHelper.run_shell_command(hostapd_start_command)
-            CommandHelper.pause_execution(3)
-
-            if CommandHelper.BSSID_COUNT > 1: # More then one wlan interface
-                std_out, std_err = CommandHelper.create_new_interface_bridge_network()
-                if std_err is not None:
-                    return None, "Error when creating new interface: {}".format(std_err)
-                CommandHelper.add_all_interfaces_to_bridge()
+            ctrl_paths = [hostapd_global_ctrl_path, ApCommandHelper.get_ctrl_interface_path(CommandHelper.get_interface_name())]
+            process = process_supervisor.start(HOSTAPD, hostapd_start_command, stale_paths=ctrl_paths)
+            if process is None:
+                return None, "Unable to launch hostapd."
+            if not process_supervisor.wait_until_ready(HOSTAPD, ctrl_paths):
+                return None, "hostapd control interface is not ready."
+            # brctl addif fails on the secondary BSS interfaces until hostapd has brought them up
+            if not ApCommandHelper.__wait_until_enabled(ApCommandHelper.get_hostapd_interfaces(new_configs)):
+                return None, "hostapd interfaces are not enabled."
+
+            std_out, std_err = ApCommandHelper.__set_up_bridge()
+            if std_err is not None:
+                return None, std_err
             status = ApCommandHelper.check_hostapd_is_active()
             if status:
-                return "Hostapd service is active", None
+                running_hostapd_configs = new_configs
+                running_hostapd_debug_level = debug_log_level
+                config_fingerprints.record(HOSTAPD, start_hash, process)
+                ApCommandHelper.update_bss_registry(ApCommandHelper.get_hostapd_interfaces(new_configs))
+                return "Hostapd service is active ({})".format(plan.describe()), None
             else:
                 return None, "Unable to start hostapd service."
         else:
-            return None, "Hostapd service is not installed." + str(std_out)
+            return None, "Hostapd service is not installed: " + dut_capabilities.get_daemon(HOSTAPD).format()
+
+    @staticmethod
+    def __set_up_bridge():
+        """Creates the bridge of the wlan interfaces when more than one BSS is configured."""
+        if CommandHelper.BSSID_COUNT > 1: # More then one wlan interface
+            std_out, std_err = CommandHelper.create_new_interface_bridge_network()
+            if std_err is not None:
+                return None, "Error when creating new interface: {}".format(std_err)
+            CommandHelper.add_all_interfaces_to_bridge()
+        return None, None
+
+    @staticmethod
+    def update_bss_registry(if_names: list):
+        """Records SSID, frequency and BSSID of all the BSSes of each radio from a single hostapd STATUS."""
+        for if_name in if_names:
+            status = ctrl_request(ApCommandHelper.get_ctrl_interface_path(if_name), "STATUS")
+            if status is None:
+                DutLogger.log(LogCategory.ERROR, "Unable to get hostapd status of {}".format(if_name))
+                continue
+            for entry in bss_registry.update_from_hostapd_status(status):
+                DutLogger.log(LogCategory.DEBUG, "BSS {} on {}: ssid {} freq {} bssid {}".format(
+                    entry.bss_id, entry.if_name, entry.ssid, entry.freq, entry.mac_addr))
+
+    @staticmethod
+    def get_hostapd_interfaces(configs: dict):
+        """Returns the interface names of hostapd configurations, one per configuration file."""
+        if_names = []
+        for config in configs.values():
+            if_names += config.get_interface_names()
+        return if_names
+
+    @staticmethod
+    def __resume_hostapd(if_names: list, parked: bool):
+        """Fast path: enables the interfaces of a parked hostapd and checks that they are up.
+
+        Returns
+        -------
+        bool
+            True if every interface answers PING and reaches the ENABLED state.
+        """
+        for if_name in if_names:
+            ctrl_path = ApCommandHelper.get_ctrl_interface_path(if_name)
+            reply = ctrl_request(ctrl_path, "PING")
+            if reply is None or not reply.startswith("PONG"):
+                return False
+            if parked:
+                reply = ctrl_request(ctrl_path, "ENABLE")
+                if reply is None or not reply.startswith("OK"):
+                    DutLogger.log(LogCategory.ERROR, "hostapd {} rejected ENABLE: {}".format(if_name, reply))
+                    return False
+        return ApCommandHelper.__wait_until_enabled(if_names)
+
+    @staticmethod
+    def __wait_until_enabled(if_names: list):
+        """Polls the hostapd STATUS of each interface until it reports state=ENABLED.
+
+        Returns
+        -------
+        bool
+            True if every interface is enabled before timeout.
+        """
+        deadline = time.monotonic() + DEFAULT_READY_TIMEOUT
+        for if_name in if_names:
+            ctrl_path = ApCommandHelper.get_ctrl_interface_path(if_name)
+            while True:
+                # The control socket of a secondary BSS may not exist yet right after start up
+                reply = ctrl_request(ctrl_path, "STATUS")
+                if reply is not None and "state=ENABLED" in reply.splitlines():
+                    break
+                if time.monotonic() >= deadline:
+                    DutLogger.log(LogCategory.ERROR, "hostapd {} is not enabled: {}".format(if_name, reply))
+                    return False
+                time.sleep(READY_POLL_INTERVAL)
+        return True
+
+    @staticmethod
+    def __park_hostapd():
+        """Fast path: disables the interfaces of hostapd instead of stopping it.
+
+        Returns
+        -------
+        bool
+            True if hostapd is parked, False if it has to be stopped.
+        """
+        global running_hostapd_configs
+        process = process_supervisor.get(HOSTAPD)
+        if not config_fingerprints.enabled:
+            return False
+        if config_fingerprints.is_parked(HOSTAPD, process):
+            return True
+        if not running_hostapd_configs or not config_fingerprints.is_recorded(HOSTAPD, process):
+            return False
+        for if_name in ApCommandHelper.get_hostapd_interfaces(running_hostapd_configs):
+            reply = ctrl_request(ApCommandHelper.get_ctrl_interface_path(if_name), "DISABLE")
+            if reply is None or not reply.startswith("OK"):
+                DutLogger.log(LogCategory.ERROR, "hostapd {} rejected DISABLE: {}".format(if_name, reply))
+                return False
+        config_fingerprints.park(HOSTAPD)
+        running_hostapd_configs = {}
+        return config_fingerprints.is_parked(HOSTAPD, process)
+
+    @staticmethod
+    def apply_hostapd_reconfig_plan(plan):
+        """Applies the changed parameters to the running hostapd through its control interface.
+
+        Parameters
+        ----------
+        plan : HostapdReconfigPlan
+            Parameters to set per interface and the command that makes them effective.
+
+        Returns
+        -------
+        bool
+            True if hostapd accepted all the commands, False if it has to be restarted.
+        """
+        DutLogger.log(LogCategory.INFO, "Applying hostapd configuration changes by {}: {}".format(plan.path.value, plan.changes))
+        for if_name, params in plan.changes.items():
+            ctrl_path = ApCommandHelper.get_ctrl_interface_path(if_name)
+            commands = ["SET {} {}".format(key, value) for key, value in params]
+            if plan.path == HostapdReconfigPath.RELOAD:
+                commands.append("RELOAD")
+            elif plan.path == HostapdReconfigPath.UPDATE_BEACON:
+                commands.append("UPDATE_BEACON")
+            for command in commands:
+                reply = ctrl_request(ctrl_path, command)
+                if reply is None or not reply.startswith("OK"):
+                    DutLogger.log(LogCategory.ERROR, "hostapd {} rejected {}: {}, restart hostapd".format(if_name, command, reply))
+                    plan.path = HostapdReconfigPath.RESTART
+                    plan.reason = "{} rejected".format(command.split(" ")[0])
+                    return False
+        return True
 
     @staticmethod
     def ap_stop():
@@ -383,12 +567,13 @@ class ApCommandHelper:
             #ApCommandHelper.__log_hostapd_logs()
             ApCommandHelper.store_test_artifcats = False
         hostapd_config_files = []
+        hostapd_config_models.clear()
         status = ApCommandHelper.check_hostapd_is_active()
         if status:
+            if ApCommandHelper.__park_hostapd():
+                return "Hostapd service is parked (fast path).", None
             CommandHelper.run_shell_command("sudo rfkill unblock wlan")
-            interface_name = CommandHelper.get_interface_name()
-            ApCommandHelper.__killall_hostapd()
-            CommandHelper.pause_execution(3)
+            ApCommandHelper.__stop_hostapd()
             status = ApCommandHelper.check_hostapd_is_active()
 
             if not status:
@@ -435,16 +620,25 @@ class ApCommandHelper:
         bool
             Boolean representing if hostapd service is active or not.
         """
-        res, _ = CommandHelper.run_shell_command("sudo pidof hostapd")
-        if res:
+        if process_supervisor.is_alive(HOSTAPD):
             return True
         else:
             DutLogger.log(LogCategory.DEBUG, "Hostapd service is inactive.")
             return False
 
     @staticmethod
-    def __killall_hostapd():
-        CommandHelper.run_shell_command("sudo killall hostapd")
+    def __stop_hostapd():
+        """Stops the managed hostapd with a bounded wait, and once any hostapd not started by the app."""
+        global running_hostapd_configs
+        running_hostapd_configs = {}
+        config_fingerprints.forget(HOSTAPD)
+        process_supervisor.reap_strays(HOSTAPD)
+        process_supervisor.stop(HOSTAPD)
+
+    @staticmethod
+    def get_ctrl_interface_path(if_name):
+        """Returns the path of the hostapd control interface socket of an interface."""
+        return os.path.join(hostapd_ctrl_interface_path, if_name)
 
     @staticmethod
     def clear_hostapd_logs():
@@ -471,43 +665,18 @@ class ApCommandHelper:
         return interface_freq, interface_ssid, mac_addr
 
     @staticmethod
-    def get_center_freq_idx(chan, width: int = 1):
-        if (width == 1):
-            if chan >= 36 and chan <= 48:
-                return "42"
-            elif chan <= 64:
-                return "58"
-            elif chan >= 100 and chan <= 112:
-                return "106"
-            elif chan <= 128:
-                return "122"
-            elif chan <= 144:
-                return "138"
-            elif chan >= 149 and chan <= 161:
-                return  "155"
-        elif (width == 2):
-            if chan >= 36 and chan <= 64:
-                return "50"
-            elif chan >= 100 and chan <= 128:
-                return "114"
-
-    @staticmethod
-    def is_ht40plus_chan(chan):
-        if (chan == 36 or chan == 44 or chan == 52 or chan == 60 or
-            chan == 100 or chan == 108 or chan == 116 or chan == 124 or
-            chan == 132 or chan == 140 or chan == 149 or chan == 157):
-            return True
-        else:
-            return False
+    def get_center_freq_idx(chan, width: int = 1, band: str = BAND_5GHZ):
+        """Returns the center channel index of a channel for a hostapd oper_chwidth value, None if there is none."""
+        center_idx = ChannelPlan.get_center_freq_idx(band, chan, OPER_CHWIDTH_TO_MHZ.get(width))
+        return str(center_idx) if center_idx is not None else None
 
     @staticmethod
-    def is_ht40minus_chan(chan):
-        if (chan == 40 or chan == 48 or chan == 56 or chan == 64 or
-            chan == 104 or chan == 112 or chan == 120 or chan == 128 or
-            chan == 136 or chan == 144 or chan == 153 or chan == 161):
-            return True
-        else:
-            return False
+    def is_ht40plus_chan(chan, band: str = BAND_5GHZ):
+        return ChannelPlan.get_ht40_offset(band, chan) == 1
+
+    @staticmethod
+    def is_ht40minus_chan(chan, band: str = BAND_5GHZ):
+        return ChannelPlan.get_ht40_offset(band, chan) == -1
 
     '''
     @staticmethod
@@ -539,13 +708,15 @@ class ApCommandHelper:
     @staticmethod
     def ap_chan_switch(channel, freq):
         if_name = CommandHelper.get_interface_name()
-        center_freq = 5000 + int(__class__.get_center_freq_idx(int(channel))) * 5
-        if center_freq == int(freq) + 30 or center_freq == int(freq) - 10:
-            offset = 1
-        else:
-            offset = -1
+        band, _ = ChannelPlan.get_channel_from_freq(int(freq))
+        # Switch to the 80MHz channel in 5G and 6G, 20MHz in 2.4G
+        channel_info = ChannelPlan.get_channel_info(band, int(channel), 80) or ChannelPlan.get_channel_info(band, int(channel), 20)
+        if channel_info is None:
+            return None, "Unknown channel {} at {}MHz".format(channel, freq)
+        mode = {BAND_5GHZ: " vht", BAND_6GHZ: " he"}.get(band, "") if channel_info.width == 80 else ""
         return CommandHelper.run_shell_command(
-            ("sudo hostapd_cli -i {} chan_switch 10 {} center_freq1={} sec_channel_offset={} bandwidth=80 vht").format(if_name, freq, center_freq, offset)
+            ("sudo hostapd_cli -i {} chan_switch 10 {} center_freq1={} sec_channel_offset={} bandwidth={}{}").format(
+                if_name, freq, channel_info.center_freq, channel_info.ht40_offset, channel_info.width, mode)
         )
 
     @staticmethod
@@ -586,7 +757,7 @@ class ApCommandHelper:
         # Get SSID, key_mgmt and Passphrase from config file
         key_list = ["ssid=", "wpa_passphrase=", "wpa_key_mgmt="]
         config_list = []
-        file_path = "/etc/hostapd/{}".format(hostapd_config_files[0])
+        file_path = os.path.join(hostapd_config_dir, hostapd_config_files[0])
         with open(file_path, "r") as config_f:
             config =config_f.read()
             for key in key_list:
@@ -0,0 +1,211 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""On-demand cProfile of the handler of chosen QuickTrack messages.
+
+The handler of a message is profiled when its type was selected with --profile or when the
+message carries the PROFILE TLV. Each profiled invocation leaves a pstats dump (.prof) and a
+collapsed-stack summary (.folded, one "caller;...;function microseconds" line per stack, for
+flame graph tools) in PROFILE_DIR, which only keeps the latest PROFILE_MAX_INVOCATIONS.
+"""
+import cProfile
+import glob
+import io
+import os
+import pstats
+import threading
+import time
+from Commands.dut_logger import DutLogger, LogCategory
+from Commands.dut_environment import dut_path
+from Commands.shared_enums import QuickTrackRequestTLV
+
+PROFILE_DIR = dut_path("/var/log/dut_control_app_profiles")
+PROFILE_MAX_INVOCATIONS = 20
+PROFILE_SUFFIXES = (".prof", ".folded")
+# Stacks are rebuilt from the caller graph of pstats, which cProfile keeps one level deep
+FOLDED_MAX_DEPTH = 32
+FOLDED_MIN_US = 1
+# Value of the summary TLVs is limited to one TLV length byte
+SUMMARY_MAX_LENGTH = 255
+SUMMARY_TOP_FUNCTIONS = 5
+
+
+class ApiProfiler:
+    """Profiles the selected QuickTrack messages and keeps their latest profiles."""
+
+    def __init__(self):
+        self.__message_types = set()
+        self.__lock = threading.Lock()
+
+    def set_message_types(self, message_types: str):
+        """Selects the message types profiled on every invocation.
+
+        Parameters
+        ----------
+        message_types : str
+            Comma separated QuickTrackMessageType names, ex: AP_START_UP,STA_ASSOCIATE. Empty to
+            profile only the messages carrying the PROFILE TLV.
+        """
+        self.__message_types = {name.strip().upper() for name in message_types.split(",") if name.strip()}
+
+    def get_message_types(self):
+        return sorted(self.__message_types)
+
+    def is_selected(self, message):
+        if message.message_params and QuickTrackRequestTLV.PROFILE in message.message_params:
+            return True
+        return message.message_type is not None and message.message_type.name in self.__message_types
+
+    def execute(self, message, handler):
+        """Runs handler(message), under cProfile if the message is selected.
+
+        The PROFILE TLV is removed from the message before it is handled so that the APIs
+        rejecting unknown TLVs accept it.
+        """
+        if not self.is_selected(message):
+            return handler(message)
+        if message.message_params:
+            message.message_params.pop(QuickTrackRequestTLV.PROFILE, None)
+        profile = cProfile.Profile()
+        start = time.monotonic()
+        try:
+            return profile.runcall(handler, message)
+        finally:
+            duration = time.monotonic() - start
+            try:
+                self.save(profile, message, duration)
+            except Exception as err:
+                DutLogger.log(LogCategory.ERROR, "Failed to save the profile of {}: {}".format(message.message_type.name, err))
+
+    def save(self, profile: cProfile.Profile, message, duration: float):
+        """Writes the .prof and .folded files of a profiled invocation and drops the oldest ones."""
+        base_name = "{}_{}_{}".format(
+            time.strftime("%Y%m%dT%H%M%S"), message.message_type.name, message.message_id)
+        base_path = os.path.join(PROFILE_DIR, base_name)
+        with self.__lock:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profile.dump_stats(base_path + ".prof")
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            with open(base_path + ".folded", "w") as folded_file:
+                for stack, microseconds in ApiProfiler.get_folded_stacks(stats):
+                    folded_file.write("{} {}\n".format(stack, microseconds))
+            self.__prune()
+        DutLogger.log(LogCategory.INFO, "Profile of {} ({:.0f} ms) saved to {}.prof".format(
+            message.message_type.name, duration * 1000, base_path))
+
+    def __prune(self):
+        names = self.get_profile_names()
+        for name in names[:-PROFILE_MAX_INVOCATIONS]:
+            for suffix in PROFILE_SUFFIXES:
+                try:
+                    os.remove(os.path.join(PROFILE_DIR, name + suffix))
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def get_profile_names(message_type_name: str = None):
+        """Returns the names (without suffix) of the stored profiles, oldest first.
+
+        Parameters
+        ----------
+        message_type_name : str
+            Only the profiles of this QuickTrackMessageType name, all of them if None.
+        """
+        pattern = "*_{}_*.prof".format(message_type_name) if message_type_name else "*.prof"
+        paths = glob.glob(os.path.join(PROFILE_DIR, pattern))
+        paths.sort(key=lambda path: (os.path.getmtime(path), path))
+        return [os.path.basename(path)[:-len(".prof")] for path in paths]
+
+    @staticmethod
+    def get_profile_path(name: str):
+        return os.path.join(PROFILE_DIR, name + ".prof")
+
+    @staticmethod
+    def get_function_name(function):
+        file_name, line, name = function
+        if file_name == "~":
+            # Built-in functions, ex: <built-in method time.sleep>
+            return name
+        return "{}:{}:{}".format(os.path.basename(file_name), line, name)
+
+    @staticmethod
+    def get_folded_stacks(stats: pstats.Stats):
+        """Returns [(collapsed stack, self time in microseconds)], hottest first.
+
+        cProfile only records the direct callers of each function, so the self time of a
+        function is split between its callers in proportion of the time spent in each call
+        edge, and so on up to the functions without callers.
+        """
+        folded = {}
+
+        def add_stacks(function, stack, microseconds, depth):
+            callers = stats.stats[function][4]
+            if not callers or depth >= FOLDED_MAX_DEPTH:
+                key = ";".join(ApiProfiler.get_function_name(frame) for frame in reversed(stack))
+                folded[key] = folded.get(key, 0) + microseconds
+                return
+            total = sum(edge[3] for edge in callers.values())
+            for caller, edge in callers.items():
+                share = edge[3] / total if total else 1 / len(callers)
+                if caller in stack or caller not in stats.stats:
+                    # Recursion, the stack is cut at the first repetition
+                    key = ";".join(ApiProfiler.get_function_name(frame) for frame in reversed(stack))
+                    folded[key] = folded.get(key, 0) + microseconds * share
+                elif microseconds * share >= FOLDED_MIN_US:
+                    add_stacks(caller, stack + [caller], microseconds * share, depth + 1)
+
+        for function, (_, _, self_time, _, _) in stats.stats.items():
+            if self_time * 1e6 >= FOLDED_MIN_US:
+                add_stacks(function, [function], self_time * 1e6, 0)
+        return sorted(((stack, round(us)) for stack, us in folded.items() if round(us) > 0),
+                      key=lambda item: item[1], reverse=True)
+
+    @staticmethod
+    def format_summary(name: str):
+        """Returns the total time and the functions with the highest cumulative time of a stored profile.
+
+        Returns
+        -------
+        str
+            ex: total_ms=812,calls=10512,top=ap_command_helper.py:120:start_hostapd/640;time.sleep/600
+        """
+        stats = pstats.Stats(ApiProfiler.get_profile_path(name), stream=io.StringIO())
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        # The entry points are the profiled handler and cProfile itself
+        top = [(function, entry) for function, entry in top
+               if function[2] not in ("<method 'disable' of '_lsprof.Profiler' objects>",)][1:]
+        summary = "total_ms={:.0f},calls={},top=".format(stats.total_tt * 1000, stats.total_calls)
+        for index, (function, entry) in enumerate(top[:SUMMARY_TOP_FUNCTIONS]):
+            item = "{}{}/{:.0f}".format(";" if index else "", ApiProfiler.get_function_name(function), entry[3] * 1000)
+            if len(summary) + len(item) > SUMMARY_MAX_LENGTH:
+                break
+            summary += item
+        return summary
+
+    @staticmethod
+    def format_hottest_stack(name: str):
+        """Returns the hottest line of the collapsed stacks of a stored profile, cut from its root
+        side to fit in a TLV."""
+        try:
+            with open(os.path.join(PROFILE_DIR, name + ".folded")) as folded_file:
+                line = folded_file.readline().strip()
+        except OSError:
+            return ""
+        if len(line) > SUMMARY_MAX_LENGTH:
+            line = "..." + line[-(SUMMARY_MAX_LENGTH - 3):]
+        return line
+
+
+api_profiler = ApiProfiler()
@@ -0,0 +1,161 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Optional JSONL trace of the QuickTrack API transactions, for offline analysis and replay.
+
+One compact JSON line is written per QuickTrack message with the received TLVs (secrets
+redacted), the shell and control interface commands issued while handling it with their
+duration and status, the handler duration and the response status.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+import time
+from Commands.dut_logger import BufferedFileHandler, LogListener, RecordQueueHandler
+from Commands.dut_environment import dut_path
+
+TRACE_DIR = dut_path("/var/log")
+TRACE_MAX_BYTES = 50 * 1024 * 1024
+TRACE_BACKUP_COUNT = 5
+REDACTED = "<redacted>"
+
+# TLV names whose values are never written to the trace
+SECRET_TLV_NAMES = ("PASSPHRASE", "PASSWORD", "PSK", "SECRET", "WEP_KEY0", "PIN_CODE")
+# Command arguments redacted in the trace: group 1 is kept, group 2 is the secret. A quoted
+# secret is redacted up to its closing quote, an unquoted one up to the end of the line
+SECRET_ARG_PATTERNS = (
+    re.compile(r"((?<!-)(?:passphrase|password|psk|secret|wep_key\d)[\s=]+)(\"[^\"]*\"?|'[^']*'?|\S.*)",
+               re.IGNORECASE),
+    # wps_pin [any|<UUID>] <PIN> and the PIN checksum script
+    re.compile(r"((?:wps_pin|pin_checksum\.sh)\s+(?:any\s+|[0-9a-f-]{36}\s+)?)(\d+)", re.IGNORECASE),
+    # p2p_connect <peer address> <PIN> <method>
+    re.compile(r"(p2p_connect\s+\S+\s+)(\d+)", re.IGNORECASE),
+)
+
+
+class ApiTrace:
+    """Collects the transaction of the message being handled and writes it as a JSON line."""
+
+    def __init__(self):
+        self.__logger = logging.getLogger("dut_control_app.trace")
+        self.__logger.propagate = False
+        self.__listener = None
+        self.__file_path = None
+        self.__local = threading.local()
+
+    def enabled(self):
+        return self.__listener is not None
+
+    def get_file_path(self):
+        return self.__file_path
+
+    def start(self, trace_file_name: str):
+        """Writes the trace to a size-rotated file in TRACE_DIR.
+
+        Parameters
+        ----------
+        trace_file_name : str
+            Name of the trace file.
+        """
+        self.__file_path = "{}/{}".format(TRACE_DIR, trace_file_name)
+        file_handler = logging.handlers.RotatingFileHandler(
+            self.__file_path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT)
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_queue = queue.SimpleQueue()
+        self.__listener = LogListener(trace_queue, BufferedFileHandler(file_handler))
+        self.__logger.addHandler(RecordQueueHandler(trace_queue))
+        self.__logger.setLevel(logging.INFO)
+        self.__listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self.__listener is not None:
+            self.__listener.stop()
+            for handler in self.__listener.handlers:
+                handler.close()
+            self.__listener = None
+
+    @staticmethod
+    def redact_tlvs(tlvs: dict):
+        """Returns {TLV name: value} with the values of the secret TLVs replaced."""
+        if not tlvs:
+            return {}
+        redacted = {}
+        for tlv, value in tlvs.items():
+            name = getattr(tlv, "name", str(tlv))
+            redacted[name] = REDACTED if any(secret in name for secret in SECRET_TLV_NAMES) else str(value)
+        return redacted
+
+    @staticmethod
+    def redact_command(command: str):
+        for pattern in SECRET_ARG_PATTERNS:
+            command = pattern.sub(r"\1" + REDACTED, command)
+        return command
+
+    def begin(self, message, client_address):
+        """Starts the transaction of a received message on the current thread."""
+        if self.__listener is None:
+            return
+        self.__local.transaction = {
+            "ts": time.time(),
+            "client": "{}:{}".format(*client_address[:2]) if client_address else None,
+            "message_id": message.message_id,
+            "type": message.message_type.name if message.message_type is not None else None,
+            "tlvs": ApiTrace.redact_tlvs(message.message_params),
+            "commands": [],
+        }
+        self.__local.start = time.monotonic()
+
+    def record_command(self, kind: str, command: str, duration: float, status):
+        """Adds a command issued by the current thread to its transaction, if any.
+
+        Parameters
+        ----------
+        kind : str
+            "shell" or "ctrl".
+        command : str
+            Command line or control interface command.
+        duration : float
+            Duration of the command in seconds.
+        status : int or str
+            Exit status of a shell command, reply status of a control interface command.
+        """
+        transaction = getattr(self.__local, "transaction", None)
+        if transaction is None:
+            return
+        transaction["commands"].append({
+            "kind": kind,
+            "cmd": ApiTrace.redact_command(command),
+            "ms": round(duration * 1000, 3),
+            "status": status,
+        })
+
+    def end(self, result):
+        """Completes the transaction of the current thread with the response and writes it."""
+        transaction = getattr(self.__local, "transaction", None)
+        if transaction is None:
+            return
+        self.__local.transaction = None
+        transaction["ms"] = round((time.monotonic() - self.__local.start) * 1000, 3)
+        transaction["status"] = result.status if result is not None else None
+        transaction["response_tlvs"] = ApiTrace.redact_tlvs(result.tlvs) if result is not None else {}
+        self.__logger.info(json.dumps(transaction, separators=(",", ":")))
+
+
+api_trace = ApiTrace()
@@ -0,0 +1,167 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Registry of the wireless interfaces used as BSSes, indexed by BSS identifier, interface name and band."""
+from .shared_enums import BssIdentifierBand, OperationalBand
+from .channel_plan import ChannelPlan
+
+# OperationalBand name of a frequency to BssIdentifierBand value
+OPERATIONAL_TO_BSS_BAND = {
+    OperationalBand._24GHz.name: BssIdentifierBand._24GHz.value,
+    OperationalBand._5GHz.name: BssIdentifierBand._5GHz.value,
+    OperationalBand._6GHz.name: BssIdentifierBand._6GHz.value,
+}
+
+
+class BssEntry:
+    """A wireless interface, the BSS identifier assigned to it and the BSS hostapd runs on it."""
+
+    __slots__ = ("band", "if_name", "bss_id", "ssid", "freq", "mac_addr")
+
+    def __init__(self, band: int, if_name: str):
+        # BssIdentifierBand value
+        self.band = band
+        self.if_name = if_name
+        # 0 while no BSS identifier is assigned
+        self.bss_id = 0
+        # Filled from hostapd STATUS at AP_START_UP
+        self.ssid = None
+        self.freq = None
+        self.mac_addr = None
+
+    def get_status(self):
+        """Returns (frequency, ssid, mac address) as get_ap_if_status does."""
+        return self.freq, self.ssid, self.mac_addr
+
+
+class BssRegistry:
+    """Wireless interfaces given with --interface and the BSSes running on them."""
+
+    def __init__(self):
+        # Interfaces given with --interface, in registration order
+        self.__entries = []
+        # Interfaces only seen in hostapd status, never assigned a BSS identifier
+        self.__discovered = []
+        self.__by_if_name = {}
+        self.__by_bss_id = {}
+        # {band: [entries in registration order]}
+        self.__by_band = {}
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __iter__(self):
+        return iter(list(self.__entries))
+
+    def add_interface(self, band: int, if_name: str):
+        """Registers a wireless interface of a band, returns its entry."""
+        entry = self.__by_if_name.get(if_name)
+        if entry is None:
+            entry = BssEntry(band, if_name)
+            self.__entries.append(entry)
+            self.__by_if_name[if_name] = entry
+            self.__by_band.setdefault(band, []).append(entry)
+        return entry
+
+    def get_by_bss_id(self, bss_id: int):
+        return self.__by_bss_id.get(bss_id)
+
+    def get_by_if_name(self, if_name: str):
+        return self.__by_if_name.get(if_name)
+
+    def get_first(self):
+        return self.__entries[0] if self.__entries else None
+
+    def get_assigned(self):
+        """Returns the entries with a BSS identifier, in registration order."""
+        return [entry for entry in self.__entries if entry.bss_id > 0]
+
+    def assign_bss_id(self, band: int, bss_id: int):
+        """Assigns a BSS identifier to the first free interface of a band.
+
+        Returns
+        -------
+        BssEntry
+            The entry, None if there is no free interface in that band.
+        """
+        for entry in self.__by_band.get(band, []):
+            if entry.bss_id == 0:
+                entry.bss_id = bss_id
+                self.__by_bss_id[bss_id] = entry
+                return entry
+        return None
+
+    def clear_bss_ids(self):
+        """Frees all the interfaces and forgets the BSSes running on them."""
+        for entry in self.__entries:
+            entry.bss_id = 0
+            entry.ssid = entry.freq = entry.mac_addr = None
+        for entry in self.__discovered:
+            del self.__by_if_name[entry.if_name]
+        self.__discovered = []
+        self.__by_bss_id.clear()
+
+    def update_from_hostapd_status(self, status: str):
+        """Records the BSSes of a radio from the reply of hostapd STATUS.
+
+        Interfaces that were not given with --interface are recorded with the band of their frequency
+        but are not used for BSS identifier assignment.
+
+        Parameters
+        ----------
+        status : str
+            Reply of STATUS on the control interface of the first BSS of a radio
+
+        Returns
+        -------
+        list
+            Entries updated.
+        """
+        values = dict(line.split("=", 1) for line in status.splitlines() if "=" in line)
+        freq = values.get("freq")
+        updated = []
+        index = 0
+        while "bss[{}]".format(index) in values:
+            if_name = values["bss[{}]".format(index)]
+            entry = self.__by_if_name.get(if_name)
+            if entry is None:
+                entry = BssEntry(OPERATIONAL_TO_BSS_BAND.get(ChannelPlan.get_band_from_freq(freq)), if_name)
+                self.__discovered.append(entry)
+                self.__by_if_name[if_name] = entry
+            entry.freq = freq
+            entry.ssid = values.get("ssid[{}]".format(index))
+            entry.mac_addr = values.get("bssid[{}]".format(index))
+            updated.append(entry)
+            index += 1
+        return updated
+
+    def find_bss(self, match):
+        """Returns the first entry with a running BSS for which match(if_name, status) returns a value.
+
+        Returns
+        -------
+        tuple
+            (interface name, value returned by match), (None, None) if no BSS matches.
+        """
+        for entry in self.__entries + self.__discovered:
+            if entry.mac_addr is None:
+                continue
+            matched = match(entry.if_name, entry.get_status())
+            if matched:
+                return entry.if_name, matched
+        return None, None
+
+
+bss_registry = BssRegistry()
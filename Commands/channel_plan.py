@@ -0,0 +1,235 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Channel plan of the 2.4, 5 and 6 GHz bands for 20 to 320 MHz channels.
+
+All lookups are served from tables built once at import time and indexed by
+(band, channel, width).
+"""
+from .shared_enums import OperationalBand
+
+BAND_24GHZ = OperationalBand._24GHz.name
+BAND_5GHZ = OperationalBand._5GHz.name
+BAND_6GHZ = OperationalBand._6GHz.name
+
+CHANNEL_WIDTHS = (20, 40, 80, 160, 320)
+
+# hostapd vht/he/eht_oper_chwidth values to channel width in MHz, 0 is 40 MHz only with HT40
+OPER_CHWIDTH_TO_MHZ = {0: 20, 1: 80, 2: 160, 9: 320}
+MHZ_TO_OPER_CHWIDTH = {20: 0, 40: 0, 80: 1, 160: 2}
+# eht_oper_chwidth value of 320 MHz channels, not accepted by vht/he_oper_chwidth
+EHT_OPER_CHWIDTH_320MHZ = 9
+
+# Channel spacing is 5 MHz from the start frequency of each band
+BAND_START_FREQ = {BAND_24GHZ: 2407, BAND_5GHZ: 5000, BAND_6GHZ: 5950}
+
+_24GHZ_CHANNELS = tuple(range(1, 14))
+# Channels of the supported 5 GHz channel sets (UNII-1 to UNII-3), 165 is 20 MHz only
+_5GHZ_CHANNEL_SETS = (
+    tuple(range(36, 65, 4)),
+    tuple(range(100, 145, 4)),
+    tuple(range(149, 162, 4)) + (165,),
+)
+_6GHZ_CHANNELS = tuple(range(1, 234, 4))
+
+# Global operating classes (IEEE 802.11 Annex E-4) of the 5 GHz channels
+_5GHZ_20MHZ_OP_CLASSES = ((48, 115), (64, 118), (144, 121), (161, 124), (165, 125))
+_5GHZ_40MHZ_OP_CLASSES = ((48, 116, 117), (64, 119, 120), (144, 122, 123), (161, 126, 127))
+_6GHZ_OP_CLASSES = {20: 131, 40: 132, 80: 133, 160: 134, 320: 137}
+_6GHZ_OP_CLASS_WIDTHS = {op_class: width for width, op_class in _6GHZ_OP_CLASSES.items()}
+# Frequency ranges of the bands, for frequencies missing from the channel tables
+_BAND_FREQ_RANGES = ((2401, 2495, BAND_24GHZ), (5150, 5925, BAND_5GHZ), (5925, 7125, BAND_6GHZ))
+
+
+class ChannelInfo:
+    """A channel of a given width: primary frequency, center and operating class."""
+
+    __slots__ = ("band", "channel", "width", "freq", "center_idx", "center_freq", "ht40_offset", "op_class")
+
+    def __init__(self, band, channel, width, center_idx, ht40_offset, op_class):
+        self.band = band
+        self.channel = channel
+        self.width = width
+        self.freq = BAND_START_FREQ[band] + 5 * channel if channel != 14 else 2484
+        self.center_idx = center_idx
+        self.center_freq = BAND_START_FREQ[band] + 5 * center_idx if center_idx != 14 else 2484
+        # 1 if the secondary 20 MHz channel is above the primary, -1 if below, 0 for 20 MHz
+        self.ht40_offset = ht40_offset
+        self.op_class = op_class
+
+
+def _get_blocks(channels, width):
+    """Splits contiguous 20 MHz channels into the blocks of width MHz aligned on the first channel."""
+    size = width // 20
+    return [channels[index:index + size] for index in range(0, len(channels) - size + 1, size)]
+
+
+def _build_tables():
+    table = {}
+    for channel in _24GHZ_CHANNELS + (14,):
+        table[(BAND_24GHZ, channel, 20)] = ChannelInfo(BAND_24GHZ, channel, 20, channel, 0, 82 if channel == 14 else 81)
+    for channel in _24GHZ_CHANNELS:
+        # HT40+ for channels 1-7 (operating class 83), HT40- for 8-13 (operating class 84)
+        offset = 1 if channel <= 7 else -1
+        table[(BAND_24GHZ, channel, 40)] = ChannelInfo(
+            BAND_24GHZ, channel, 40, channel + 2 * offset, offset, 83 if offset > 0 else 84)
+
+    for channel_set in _5GHZ_CHANNEL_SETS:
+        for channel in channel_set:
+            op_class = next(op_class for last, op_class in _5GHZ_20MHZ_OP_CLASSES if channel <= last)
+            table[(BAND_5GHZ, channel, 20)] = ChannelInfo(BAND_5GHZ, channel, 20, channel, 0, op_class)
+        for width, op_class in ((40, None), (80, 128), (160, 129)):
+            for block in _get_blocks([channel for channel in channel_set if channel != 165], width):
+                center_idx = (block[0] + block[-1]) // 2
+                for position, channel in enumerate(block):
+                    offset = 1 if position % 2 == 0 else -1
+                    if op_class is None:
+                        classes = next(classes for classes in _5GHZ_40MHZ_OP_CLASSES if channel <= classes[0])
+                        block_op_class = classes[1] if offset > 0 else classes[2]
+                    else:
+                        block_op_class = op_class
+                    table[(BAND_5GHZ, channel, width)] = ChannelInfo(
+                        BAND_5GHZ, channel, width, center_idx, offset, block_op_class)
+
+    for width in CHANNEL_WIDTHS:
+        # 320 MHz uses the 320-1 channelization (centers 31, 95, 159)
+        for block in _get_blocks(_6GHZ_CHANNELS, width):
+            center_idx = (block[0] + block[-1]) // 2
+            for position, channel in enumerate(block):
+                offset = 0 if width == 20 else (1 if position % 2 == 0 else -1)
+                table[(BAND_6GHZ, channel, width)] = ChannelInfo(
+                    BAND_6GHZ, channel, width, center_idx, offset, _6GHZ_OP_CLASSES[width])
+
+    freq_table = {}
+    freq_band_table = {}
+    band_channels = {}
+    for (band, channel, width), info in table.items():
+        if width == 20:
+            freq_table[info.freq] = (band, channel)
+            # Frequencies reported by wpa_cli/hostapd_cli are strings, both forms are indexed
+            freq_band_table[info.freq] = band
+            freq_band_table[str(info.freq)] = band
+            band_channels.setdefault(band, []).append(channel)
+    return (table, freq_table, freq_band_table,
+            {band: tuple(sorted(channels)) for band, channels in band_channels.items()})
+
+
+_channel_table, _freq_table, _freq_band_table, _band_channels = _build_tables()
+
+
+class ChannelPlan:
+    """Lookups in the channel plan tables."""
+
+    @staticmethod
+    def get_channel_info(band: str, channel: int, width: int = 20):
+        """Returns the channel of the given width containing the primary channel.
+
+        Parameters
+        ----------
+        band : str
+            OperationalBand name
+        channel : int
+            Primary channel number
+        width : int
+            Channel width in MHz
+
+        Returns
+        -------
+        ChannelInfo
+            The channel, None if the channel doesn't exist with this width.
+        """
+        return _channel_table.get((band, channel, width))
+
+    @staticmethod
+    def get_freq(band: str, channel: int):
+        info = _channel_table.get((band, channel, 20))
+        return info.freq if info else None
+
+    @staticmethod
+    def get_channel_from_freq(freq: int):
+        """Returns (band, channel) of a 20 MHz channel center frequency, (None, None) if unknown."""
+        return _freq_table.get(freq, (None, None))
+
+    @staticmethod
+    def get_center_freq_idx(band: str, channel: int, width: int):
+        info = _channel_table.get((band, channel, width))
+        return info.center_idx if info else None
+
+    @staticmethod
+    def get_ht40_offset(band: str, channel: int):
+        """Returns 1 for HT40+, -1 for HT40-, 0 if the channel can't be used for 40 MHz."""
+        info = _channel_table.get((band, channel, 40))
+        return info.ht40_offset if info else 0
+
+    @staticmethod
+    def get_op_class(band: str, channel: int, width: int = 20):
+        info = _channel_table.get((band, channel, width))
+        return info.op_class if info else None
+
+    @staticmethod
+    def get_6ghz_width(op_class: int):
+        """Returns the channel width in MHz of a 6 GHz operating class, None if it isn't one."""
+        return _6GHZ_OP_CLASS_WIDTHS.get(op_class)
+
+    @staticmethod
+    def get_band_channels(band: str):
+        """Returns the sorted 20 MHz channel numbers of a band."""
+        return _band_channels.get(band, ())
+
+    @staticmethod
+    def get_band_from_freq(freq):
+        """Returns the OperationalBand name of a frequency.
+
+        Parameters
+        ----------
+        freq : int or str
+            Frequency in MHz
+
+        Returns
+        -------
+        str
+            Band name, None if the frequency is not in a Wi-Fi band.
+        """
+        band = _freq_band_table.get(freq)
+        if band is not None or freq is None:
+            return band
+        try:
+            return ChannelPlan.get_band_from_freq_range(int(freq))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def get_bands_from_freqs(freqs):
+        """Batch variant of get_band_from_freq, e.g. for the frequencies of all the interfaces.
+
+        Returns
+        -------
+        list
+            Band name of each frequency, in the same order.
+        """
+        freq_band_table_get = _freq_band_table.get
+        bands = [freq_band_table_get(freq) for freq in freqs]
+        for index, band in enumerate(bands):
+            if band is None and freqs[index] is not None:
+                bands[index] = ChannelPlan.get_band_from_freq(freqs[index])
+        return bands
+
+    @staticmethod
+    def get_band_from_freq_range(freq: int):
+        """Classifies a frequency in MHz by band range, for frequencies that are not a channel center."""
+        for low, high, band in _BAND_FREQ_RANGES:
+            if low <= freq <= high:
+                return band
+        return None
@@ -73,6 +73,9 @@ class ApiReturnStatus:
 class ApiInterface:  # pragma: no cover
     """Method to execute the QuickTrack api command."""
 
+    # Set to False by the APIs that can run before the wireless interfaces exist
+    uses_wireless_if = True
+
     def __init__(self, params: dict = None):
         self.params = params
         self.std_err = None
@@ -86,6 +89,41 @@ class ApiInterface:  # pragma: no cover
         """Gets the return status of the executed QuickTrack api."""
         pass
 
+    @staticmethod
+    def get_numeric_param(params: dict, tlv: QuickTrackRequestTLV, default=None, minimum=None, maximum=None,
+                          convert=int):
+        """Converts and range-checks a numeric TLV, so that a malformed value fails the API instead of the control app.
+
+        Parameters
+        ----------
+        params : dict
+            TLVs of the request, may be None.
+        tlv : QuickTrackRequestTLV
+            TLV to read.
+        default
+            Value returned when the TLV is absent.
+        minimum, maximum
+            Inclusive range of the value, not checked if None.
+        convert : callable
+            int or float.
+
+        Returns
+        -------
+        tuple
+            (value, None) or (None, error message).
+        """
+        if not params or tlv not in params:
+            return default, None
+        try:
+            value = convert(params[tlv])
+        except (TypeError, ValueError):
+            return None, "Invalid {} {}".format(tlv.name, params[tlv])
+        # Written so that NaN fails the range check
+        if (minimum is not None and not value >= minimum) or (maximum is not None and not value <= maximum):
+            return None, "{} {} out of range [{}, {}]".format(
+                tlv.name, params[tlv], "" if minimum is None else minimum, "" if maximum is None else maximum)
+        return value, None
+
 
 class Command(str, Enum):
     """Enum class for instructions/commands used to apply  regex and fetch the output."""
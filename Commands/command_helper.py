@@ -16,6 +16,8 @@
 """Utility module used in api commands."""
 import subprocess
 import os
+import re
+import time
 from pathlib import Path
 from .shared_enums import *
 import fcntl
@@ -29,21 +31,34 @@ debug_file_path = (
     current_path / "QuickTrack-Tool/Test-Services/command_execution_debug_file.txt"
 )
 from time import sleep
+from threading import Thread
 from Commands.dut_logger import DutLogger, LogCategory
 from .command import Command
 from .command_interpreter import CommandInterpreter
+from .channel_plan import ChannelPlan
+from .bss_registry import bss_registry
+from .netlink_monitor import netlink_monitor
+from .api_trace import api_trace
+from .dut_environment import dut_path, is_stand_in
 
 command_interpreter_obj = CommandInterpreter()
+builtin_dhcp_server = None
 
 class CommandHelper:
     """Class that contains all the utility methods for processing api commands."""
 
     INTERFACE_LOGICAL_NAME = None
     STATIC_IP = None
-    INTERFACE_LIST = []
     BSSID_COUNT = 0
     BRIDGE_WLANS = "br-wlans"
     DHCP_SERVER_IP = "192.168.65.1"
+    # In-process DHCP server, ISC dhcpd is used when False or when the built-in one can't start
+    USE_BUILTIN_DHCP_SERVER = True
+    # Polling period of wait_for_ip_addr when the netlink monitor is not running
+    IP_ADDR_POLL_INTERVAL = 0.1
+    SYSFS_NET_PATH = dut_path("/sys/class/net")
+    # Background creation of the --interface entries, see create_wlan_if_deferred
+    wlan_if_creation_thread = None
 
     @staticmethod
     def add_tlvs(command_type, command_data):
@@ -78,6 +93,7 @@ class CommandHelper:
             os.system("gnome-terminal -- /bin/bash -c '" + shell_command + "'")
             CommandHelper.__write_commands_into_debug_file(shell_command, "")
         else:
+            start = time.monotonic()
             output = subprocess.Popen(
                 shell_command,
                 shell=True,
@@ -85,6 +101,7 @@ class CommandHelper:
                 stderr=subprocess.STDOUT,
             )
             std_out, std_err = output.communicate()
+            api_trace.record_command("shell", shell_command, time.monotonic() - start, output.returncode)
             if type(std_out) is bytes:
                 std_out = std_out.decode("utf-8")
 
@@ -131,7 +148,7 @@ class CommandHelper:
     def check_if_root_user():
         """checks if the app is run as root user
         """
-        if CommandHelper.run_shell_command("whoami")[0].strip() != "root":
+        if os.geteuid() != 0 and not is_stand_in():
             DutLogger.log(LogCategory.ERROR, "Please restart the DUT control app with root permission to continue\n")
             exit()
 
@@ -139,6 +156,32 @@ class CommandHelper:
     def check_wlan_created(if_name):
         return CommandHelper.run_shell_command("iw dev | grep {}".format(if_name))
 
+    @staticmethod
+    def create_wlan_if_deferred(if_names):
+        """Creates the given wireless interfaces from a background thread, so that the
+        control app starts listening without waiting for them.
+
+        Parameters
+        ----------
+        if_names : list
+            names of the wireless interfaces to create
+        """
+        def create_all():
+            for if_name in if_names:
+                CommandHelper.create_wlan_if(if_name)
+                DutLogger.log(LogCategory.INFO, "Created wireless interface {}\n".format(if_name))
+
+        CommandHelper.wlan_if_creation_thread = Thread(target=create_all, daemon=True)
+        CommandHelper.wlan_if_creation_thread.start()
+
+    @staticmethod
+    def wait_for_wlan_if():
+        """Waits until the wireless interfaces created by create_wlan_if_deferred exist."""
+        creation_thread = CommandHelper.wlan_if_creation_thread
+        if creation_thread is not None:
+            creation_thread.join()
+            CommandHelper.wlan_if_creation_thread = None
+
     @staticmethod
     def create_wlan_if(if_name):
         CommandHelper.run_shell_command(
@@ -183,23 +226,24 @@ class CommandHelper:
         """Creates a bridge network with the existing wireless interface and the
         wireless interface name sent from the tool
         """
-        for if_info in CommandHelper.INTERFACE_LIST:
-            if if_info[2] > 0:
-                CommandHelper.run_shell_command(
-                    ("sudo brctl addif {} {}").format(CommandHelper.BRIDGE_WLANS, if_info[1])
-                )   
+        for entry in bss_registry.get_assigned():
+            CommandHelper.run_shell_command(
+                ("sudo brctl addif {} {}").format(CommandHelper.BRIDGE_WLANS, entry.if_name)
+            )
 
     @staticmethod
-    def get_all_interface_ip():
-        return CommandHelper.run_shell_command("sudo ip addr")
+    def is_interface_present(if_name):
+        """Checks if a network interface exists, from the netlink inventory or sysfs without spawning any process."""
+        if netlink_monitor.is_running():
+            return netlink_monitor.has_interface(if_name)
+        return os.path.exists(os.path.join(CommandHelper.SYSFS_NET_PATH, if_name))
 
     @staticmethod
     def reset_bridge_network():
         """Clears all the bridge network if any and will reassign the ip that was
         assigned to the wireless interface before bridge was created
         """
-        std_out, std_err = CommandHelper.get_all_interface_ip()
-        if CommandHelper.BRIDGE_WLANS in std_out:
+        if CommandHelper.is_interface_present(CommandHelper.BRIDGE_WLANS):
             CommandHelper.run_shell_command("sudo ip link set {} down".format(CommandHelper.BRIDGE_WLANS))
             CommandHelper.run_shell_command(
                 "sudo timeout -k 5 10 brctl delbr {}".format(CommandHelper.BRIDGE_WLANS)
@@ -214,8 +258,7 @@ class CommandHelper:
         """Assigns the static IP for the DUT."""
         CommandHelper.STATIC_IP = dut_static_ip
 
-        std_out, std_err = CommandHelper.get_all_interface_ip()
-        if CommandHelper.BRIDGE_WLANS in std_out:#If bridge network present assign ip to it.
+        if CommandHelper.is_interface_present(CommandHelper.BRIDGE_WLANS):#If bridge network present assign ip to it.
             CommandHelper.run_shell_command("sudo ip addr add {}/24 dev {}".format(dut_static_ip, CommandHelper.BRIDGE_WLANS))
             return True
 
@@ -237,19 +280,16 @@ class CommandHelper:
     @staticmethod
     def clear_bss_identifiers():
         # Reset bss_id in interface list
-        for x in CommandHelper.INTERFACE_LIST:
-            x[2] = 0
+        bss_registry.clear_bss_ids()
         CommandHelper.BSSID_COUNT = 0
         # Todo: Need to create not first WLAN again as hostapd will remove bss in appending conf case
 
     @staticmethod
     def set_interface_bss_id(band, bss_id):
-        if CommandHelper.INTERFACE_LIST:
-            for if_info in CommandHelper.INTERFACE_LIST:
-                if if_info[0] == band and if_info[2] == 0:
-                    if_info[2] = bss_id
-                    CommandHelper.BSSID_COUNT += 1
-                    return if_info[1]
+        entry = bss_registry.assign_bss_id(band, bss_id)
+        if entry is not None:
+            CommandHelper.BSSID_COUNT += 1
+            return entry.if_name
         DutLogger.log(LogCategory.INFO, "Can't set bss id to available interface based on band, Please check --interface argument")
         DutLogger.log(LogCategory.INFO, "use default wireless interface")
         return CommandHelper.INTERFACE_LOGICAL_NAME
@@ -257,33 +297,57 @@ class CommandHelper:
     @staticmethod
     def get_interface_name(bss_id = None):
         if bss_id is not None:
-            for if_info in CommandHelper.INTERFACE_LIST:
-                if if_info[2] == bss_id:
-                    return if_info[1]
-            return None
+            entry = bss_registry.get_by_bss_id(bss_id)
+            return entry.if_name if entry is not None else None
         if CommandHelper.INTERFACE_LOGICAL_NAME: 
             return CommandHelper.INTERFACE_LOGICAL_NAME
-        elif CommandHelper.INTERFACE_LIST:
-            for if_info in CommandHelper.INTERFACE_LIST:
-                if if_info[2] > 0:
-                    return if_info[1]
-            return CommandHelper.INTERFACE_LIST[0][1]
+        elif len(bss_registry):
+            assigned = bss_registry.get_assigned()
+            if assigned:
+                return assigned[0].if_name
+            return bss_registry.get_first().if_name
         DutLogger.log(LogCategory.ERROR, "Can't get any valid interface, Please check --interface argument")
         return None
 
     # Return the list of all wireless interface name
     @staticmethod
     def get_all_wlan_name():
+        wlan_names = CommandHelper.get_sysfs_wlan_names()
+        if wlan_names:
+            return wlan_names
         return command_interpreter_obj.execute_array(
             Command.GET_INTERFACE_NAME.value, ["wl"]
         )
 
+    @staticmethod
+    def get_sysfs_wlan_names():
+        """Returns the sorted names of the wireless interfaces found in /sys/class/net,
+        an empty list when sysfs is not available or lists none."""
+        try:
+            if_names = os.listdir(CommandHelper.SYSFS_NET_PATH)
+        except OSError:
+            return []
+        return sorted(
+            if_name for if_name in if_names
+            if os.path.exists(os.path.join(CommandHelper.SYSFS_NET_PATH, if_name, "phy80211"))
+        )
+
     @staticmethod
     def get_if_ip_addr(if_name):
+        if netlink_monitor.is_running():
+            return netlink_monitor.get_ipv4_addr(if_name)
         return command_interpreter_obj.execute(
             Command.GET_INTERFACE_IP_ADD.value, [if_name]
         )
 
+    @staticmethod
+    def get_if_ip_addrs(if_name):
+        """Returns all the IPv4 addresses of an interface."""
+        if netlink_monitor.is_running():
+            return netlink_monitor.get_ipv4_addrs(if_name)
+        std_out, _ = CommandHelper.run_shell_command("ip -4 addr show {}".format(if_name))
+        return re.findall(r"inet ([\d.]+)/", std_out or "")
+
     @staticmethod
     def get_if_mac_addr(if_name):
         return command_interpreter_obj.execute(
@@ -300,18 +364,18 @@ class CommandHelper:
         band : OperationalBand
             Band value to be verified with
         """
-        current_op_band = None
-        _, _24G_frequencies = ChannelFreqConfig.get_24G_channels_frequencies()
-        _, _5G_frequencies = ChannelFreqConfig.get_5G_channels_frequencies()
-        if freq in _24G_frequencies:
-            current_op_band = OperationalBand._24GHz.name
-        elif freq in _5G_frequencies:
-            current_op_band = OperationalBand._5GHz.name
-
-        if current_op_band == band:
-            return True
-        else:
-            return False
+        return ChannelPlan.get_band_from_freq(freq) == band
+
+    @staticmethod
+    def verify_band_from_freqs(freqs: list, band: str):
+        """Batch variant of verify_band_from_freq.
+
+        Returns
+        -------
+        list
+            For each frequency, True if it is in band.
+        """
+        return [each_band == band for each_band in ChannelPlan.get_bands_from_freqs(freqs)]
 
     # Return addr of P2P-device if there is no GO or client interface
     @staticmethod
@@ -347,6 +411,33 @@ class CommandHelper:
         DutLogger.log(LogCategory.INFO, "Can't get P2P Group Interface")
         return None
 
+    @staticmethod
+    def get_data_interface():
+        """Returns the interface carrying the test traffic: the bridge or the P2P group interface
+        if they have an address, else the wireless interface.
+
+        Returns
+        -------
+        tuple
+            (interface name, IPv4 address or None)
+        """
+        interface_name = None
+        ip_address = None
+        if CommandHelper.is_interface_present(CommandHelper.BRIDGE_WLANS):
+            ip_address = CommandHelper.get_if_ip_addr(CommandHelper.BRIDGE_WLANS)
+            if ip_address is not None:
+                interface_name = CommandHelper.BRIDGE_WLANS
+        p2p_group_if = CommandHelper.get_p2p_group_interface()
+        if p2p_group_if:
+            p2p_ip_address = CommandHelper.get_if_ip_addr(p2p_group_if)
+            if p2p_ip_address is not None:
+                interface_name = p2p_group_if
+                ip_address = p2p_ip_address
+        if interface_name is None:
+            interface_name = CommandHelper.get_interface_name()
+            ip_address = CommandHelper.get_if_ip_addr(interface_name)
+        return interface_name, ip_address
+
     @staticmethod
     def get_p2p_dev_interface():
         p2p_dev = "p2p-dev-{}".format(CommandHelper.INTERFACE_LOGICAL_NAME)
@@ -354,10 +445,24 @@ class CommandHelper:
 
     @staticmethod
     def start_dhcp_server(if_name, ip_addr):
+        global builtin_dhcp_server
+        if CommandHelper.USE_BUILTIN_DHCP_SERVER:
+            CommandHelper.stop_dhcp_server()
+            # Imported here as asyncio adds tens of milliseconds to the control app startup
+            from .dhcp_server import DhcpServer
+            dhcp_server = DhcpServer(if_name, ip_addr)
+            try:
+                dhcp_server.start()
+                builtin_dhcp_server = dhcp_server
+                return
+            except OSError as err:
+                DutLogger.log(LogCategory.ERROR, "Built-in DHCP server failed to start, using dhcpd: {}".format(err))
         offset = ip_addr.rfind(".")
         ip_sub = ip_addr[0:offset]
-        CommandHelper.run_shell_command("cp QT_dhcpd.conf /etc/dhcp/QT_dhcpd.conf")
-        f = open("/etc/dhcp/QT_dhcpd.conf", "a")
+        dhcpd_config_path = dut_path("/etc/dhcp/QT_dhcpd.conf")
+        dhcpd_leases_path = dut_path("/var/lib/dhcp/dhcpd.leases_QT")
+        CommandHelper.run_shell_command("cp QT_dhcpd.conf {}".format(dhcpd_config_path))
+        f = open(dhcpd_config_path, "a")
         cmd = "\nsubnet {}.0 netmask 255.255.255.0".format(ip_sub)
         cmd += " {\n"
         f.write(cmd)
@@ -365,8 +470,8 @@ class CommandHelper:
         f.write(cmd)
         f.write("}\n")
         f.close()
-        CommandHelper.run_shell_command("touch /var/lib/dhcp/dhcpd.leases_QT")
-        cmd = "dhcpd -4 -cf /etc/dhcp/QT_dhcpd.conf -lf /var/lib/dhcp/dhcpd.leases_QT {}".format(if_name)
+        CommandHelper.run_shell_command("touch {}".format(dhcpd_leases_path))
+        cmd = "dhcpd -4 -cf {} -lf {} {}".format(dhcpd_config_path, dhcpd_leases_path, if_name)
         CommandHelper.run_shell_command(cmd)
 
     @staticmethod
@@ -374,8 +479,39 @@ class CommandHelper:
         cmd = "dhclient -4 {} &".format(if_name)
         CommandHelper.run_shell_command(cmd)
 
+    @staticmethod
+    def get_ip_addr_mark(if_name):
+        """Returns the state of the IPv4 addresses of an interface that wait_for_ip_addr starts from."""
+        if netlink_monitor.is_running():
+            return netlink_monitor.get_ipv4_addr_events(if_name)
+        return set(CommandHelper.get_if_ip_addrs(if_name))
+
+    @staticmethod
+    def wait_for_ip_addr(if_name, timeout, mark):
+        """Waits until an IPv4 address is bound to an interface after get_ip_addr_mark(), woken up by
+        the netlink address events. Without them, the addresses present at the mark are ignored.
+
+        Returns
+        -------
+        str
+            The address, None if there is none after timeout.
+        """
+        if netlink_monitor.is_running():
+            return netlink_monitor.wait_for_ipv4_addr(if_name, timeout, mark)
+        deadline = time.monotonic() + timeout
+        while True:
+            new_addrs = [ip_addr for ip_addr in CommandHelper.get_if_ip_addrs(if_name) if ip_addr not in mark]
+            if new_addrs or time.monotonic() >= deadline:
+                return new_addrs[0] if new_addrs else None
+            sleep(CommandHelper.IP_ADDR_POLL_INTERVAL)
+
     @staticmethod
     def stop_dhcp_server():
+        global builtin_dhcp_server
+        if builtin_dhcp_server is not None:
+            builtin_dhcp_server.stop()
+            builtin_dhcp_server = None
+            return
         CommandHelper.run_shell_command("killall dhcpd 1>/dev/null 2>/dev/null")
 
     @staticmethod
@@ -18,8 +18,10 @@ import json
 import os
 import re
 import subprocess
+import time
 from .command import Command
 from Commands.dut_logger import DutLogger, LogCategory
+from .api_trace import api_trace
 
 
 class CommandInterpreter:
@@ -28,26 +30,38 @@ class CommandInterpreter:
     on the output of the command to extract the required information from the output.
     """
 
-    def __init__(self):
-        self.commands_json = None
-        self.__load_commands_son()
+    # commands.json is read once, on first use, and shared by all the instances
+    __commands_json = None
+    __commands_by_name = None
 
-    def __load_commands_son(self):
-        """Reads & returns the commands json file."""
+    @property
+    def commands_json(self):
+        """List of the command objects of commands.json, loaded on first access."""
+        if CommandInterpreter.__commands_json is None:
+            CommandInterpreter.__load_commands_son()
+        return CommandInterpreter.__commands_json
+
+    @staticmethod
+    def __load_commands_son():
+        """Reads the commands json file and indexes its entries by command name."""
         dir_path = os.path.dirname(__file__)
         json_path = os.path.join(dir_path, "commands.json")
         with open(json_path) as commands_json:
-            self.commands_json = json.load(commands_json)["commands"]
+            commands = json.load(commands_json)["commands"]
+        commands_by_name = {}
+        for each_cmd_obj in commands:
+            commands_by_name.setdefault(each_cmd_obj["cmd_name"], each_cmd_obj)
+        CommandInterpreter.__commands_by_name = commands_by_name
+        CommandInterpreter.__commands_json = commands
 
     def __json_obj_of_cmd_name(self, cmd_name):
         """
         json is intentionally not having the command names(cmd_name) as key as
         the equalent 'C' Language DUT doesn't have proper json dictionary to retrieve
         """
-        for each_cmd_obj in self.commands_json:
-            if cmd_name == each_cmd_obj["cmd_name"]:
-                return each_cmd_obj
-        return None
+        if CommandInterpreter.__commands_by_name is None:
+            CommandInterpreter.__load_commands_son()
+        return CommandInterpreter.__commands_by_name.get(getattr(cmd_name, "value", cmd_name))
 
     def execute(self, cmd_name, cmd_args=[], regex_args=[]):
         """Takes the command input and executes it."""
@@ -73,7 +87,9 @@ class CommandInterpreter:
         else:
             str_cmd = shell_cmd
         # execute the command and get results
+        start = time.monotonic()
         status = subprocess.run(str_cmd, capture_output=True, shell=True, text=True)
+        api_trace.record_command("shell", str_cmd, time.monotonic() - start, status.returncode)
         std_out = status.stdout
         std_err = status.stderr
 
@@ -186,7 +202,6 @@ class CommandInterpreter:
         json
             Details about the requested command.
         """
-        for each_cmd_obj in self.commands_json:
-            if cmd_name == each_cmd_obj["cmd_name"]:
-                return each_cmd_obj
-        return None
+        if CommandInterpreter.__commands_by_name is None:
+            CommandInterpreter.__load_commands_son()
+        return CommandInterpreter.__commands_by_name.get(getattr(cmd_name, "value", cmd_name))
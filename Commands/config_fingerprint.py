@@ -0,0 +1,141 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Fingerprints of the configuration the managed daemons are running with.
+
+With the fast path enabled (--fast-path), AP_STOP/STA_DISCONNECT park the daemon instead
+of stopping it, and AP_START_UP/STA_ASSOCIATE resume it when the exact same configuration
+is applied again, instead of a stop and start.
+"""
+import hashlib
+from Commands.dut_logger import DutLogger, LogCategory
+
+
+class DaemonFingerprint:
+    """Identity of a running daemon and hash of the configuration it was started with."""
+
+    def __init__(self, config_hash: str, pid: int, start_time: float):
+        self.config_hash = config_hash
+        self.pid = pid
+        self.start_time = start_time
+        self.parked = False
+
+
+class ConfigFingerprints:
+    """Content hashes of the generated configuration files and of the running daemons."""
+
+    def __init__(self):
+        self.enabled = False
+        # {config file path: sha256 of the generated content}
+        self.__file_hashes = {}
+        # {daemon name: DaemonFingerprint}
+        self.__daemons = {}
+
+    @staticmethod
+    def get_hash(content: str):
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def set_file_content(self, path: str, content: str):
+        """Records the content hash of a configuration file written by the control app."""
+        self.__file_hashes[path] = ConfigFingerprints.get_hash(content)
+
+    def get_file_hash(self, path: str):
+        return self.__file_hashes.get(path)
+
+    def forget_file(self, path: str):
+        self.__file_hashes.pop(path, None)
+
+    def get_start_hash(self, args: list, config_paths: list):
+        """Hash of a daemon start: its command line and the content of its configuration files.
+
+        Returns
+        -------
+        str
+            The hash, None if a configuration file was not generated by the control app.
+        """
+        digest = hashlib.sha256("\0".join(args).encode())
+        for path in config_paths:
+            file_hash = self.__file_hashes.get(path)
+            if file_hash is None:
+                return None
+            digest.update(file_hash.encode())
+        return digest.hexdigest()
+
+    def record(self, name: str, config_hash: str, process):
+        """Records the configuration hash of a daemon that has just been started.
+
+        Parameters
+        ----------
+        name : str
+            Name of the daemon in the ProcessSupervisor
+        config_hash : str
+            Hash returned by get_start_hash
+        process : ManagedProcess
+            The started daemon
+        """
+        if config_hash is None or process is None:
+            self.__daemons.pop(name, None)
+            return
+        self.__daemons[name] = DaemonFingerprint(config_hash, process.pid, process.start_time)
+
+    def forget(self, name: str):
+        self.__daemons.pop(name, None)
+
+    def park(self, name: str):
+        fingerprint = self.__daemons.get(name)
+        if fingerprint is not None:
+            fingerprint.parked = True
+
+    def unpark(self, name: str):
+        fingerprint = self.__daemons.get(name)
+        if fingerprint is not None:
+            fingerprint.parked = False
+
+    def is_recorded(self, name: str, process):
+        """Checks that the fingerprint of a daemon belongs to its running instance."""
+        fingerprint = self.__daemons.get(name)
+        return fingerprint is not None and self.__is_same_process(fingerprint, process)
+
+    def is_parked(self, name: str, process):
+        fingerprint = self.__daemons.get(name)
+        return fingerprint is not None and fingerprint.parked and self.__is_same_process(fingerprint, process)
+
+    def matches(self, name: str, config_hash: str, process):
+        """Checks that a running daemon is the one recorded with exactly this configuration.
+
+        Returns
+        -------
+        bool
+            True if the fast path is enabled, the daemon is alive, has not been restarted since it
+            was recorded and was started with the same configuration.
+        """
+        if not self.enabled or config_hash is None:
+            return False
+        fingerprint = self.__daemons.get(name)
+        if fingerprint is None or not self.__is_same_process(fingerprint, process):
+            return False
+        if fingerprint.config_hash != config_hash:
+            DutLogger.log(LogCategory.DEBUG, "{} configuration changed, fast path not taken".format(name))
+            return False
+        return True
+
+    @staticmethod
+    def __is_same_process(fingerprint, process):
+        # The start time guards against a recycled pid
+        return (process is not None and process.is_alive() and process.pid == fingerprint.pid
+                and process.start_time == fingerprint.start_time)
+
+
+config_fingerprints = ConfigFingerprints()
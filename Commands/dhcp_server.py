@@ -0,0 +1,301 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Minimal in-process DHCPv4 server for the /24 test subnet.
+
+Serves DISCOVER/OFFER and REQUEST/ACK (plus RELEASE, DECLINE and INFORM) from an asyncio
+event loop running in a daemon thread, with the leases kept in memory. The pool is the
+.50-.200 range of the subnet of the server address, like the dhcpd configuration it replaces.
+"""
+import asyncio
+import ipaddress
+import socket
+import struct
+import threading
+import time
+from Commands.dut_logger import DutLogger, LogCategory
+
+DHCP_SERVER_PORT = 67
+DHCP_CLIENT_PORT = 68
+DHCP_POOL_START = 50
+DHCP_POOL_END = 200
+DHCP_LEASE_TIME = 600
+# Lifetime of an offer not followed by a REQUEST
+DHCP_OFFER_TIME = 30
+DHCP_MIN_PACKET_SIZE = 300
+
+BOOTREQUEST = 1
+BOOTREPLY = 2
+BOOTP_HEADER = struct.Struct("!BBBBIHH4s4s4s4s16s64s128s")
+DHCP_MAGIC_COOKIE = b"\x63\x82\x53\x63"
+BOOTP_BROADCAST_FLAG = 0x8000
+
+DHCPDISCOVER = 1
+DHCPOFFER = 2
+DHCPREQUEST = 3
+DHCPDECLINE = 4
+DHCPACK = 5
+DHCPNAK = 6
+DHCPRELEASE = 7
+DHCPINFORM = 8
+
+OPTION_PAD = 0
+OPTION_SUBNET_MASK = 1
+OPTION_BROADCAST_ADDRESS = 28
+OPTION_REQUESTED_IP = 50
+OPTION_LEASE_TIME = 51
+OPTION_MESSAGE_TYPE = 53
+OPTION_SERVER_ID = 54
+OPTION_RENEWAL_TIME = 58
+OPTION_REBINDING_TIME = 59
+OPTION_END = 255
+
+SO_BINDTODEVICE = getattr(socket, "SO_BINDTODEVICE", 25)
+
+
+class DhcpMessage:
+    """BOOTP header fields and DHCP options of a message."""
+
+    def __init__(self, op=BOOTREPLY, xid=0, flags=0, ciaddr=b"\0" * 4, yiaddr=b"\0" * 4,
+                 siaddr=b"\0" * 4, giaddr=b"\0" * 4, chaddr=b"\0" * 16, options=None):
+        self.op = op
+        self.xid = xid
+        self.flags = flags
+        self.ciaddr = ciaddr
+        self.yiaddr = yiaddr
+        self.siaddr = siaddr
+        self.giaddr = giaddr
+        self.chaddr = chaddr
+        # {option code: raw value}
+        self.options = options if options is not None else {}
+
+    @staticmethod
+    def parse(data: bytes):
+        """Returns the DhcpMessage of a datagram, None if it is not a DHCP message."""
+        if len(data) < BOOTP_HEADER.size + len(DHCP_MAGIC_COOKIE):
+            return None
+        op, _, _, _, xid, _, flags, ciaddr, yiaddr, siaddr, giaddr, chaddr, _, _ = BOOTP_HEADER.unpack_from(data)
+        if data[BOOTP_HEADER.size:BOOTP_HEADER.size + 4] != DHCP_MAGIC_COOKIE:
+            return None
+        options = {}
+        offset = BOOTP_HEADER.size + 4
+        while offset < len(data):
+            code = data[offset]
+            if code == OPTION_END:
+                break
+            if code == OPTION_PAD:
+                offset += 1
+                continue
+            if offset + 1 >= len(data):
+                break
+            length = data[offset + 1]
+            options[code] = data[offset + 2:offset + 2 + length]
+            offset += 2 + length
+        return DhcpMessage(op, xid, flags, ciaddr, yiaddr, siaddr, giaddr, chaddr, options)
+
+    def get_message_type(self):
+        value = self.options.get(OPTION_MESSAGE_TYPE)
+        return value[0] if value else None
+
+    def get_mac_addr(self):
+        return ":".join("%02x" % b for b in self.chaddr[:6])
+
+    def to_bytes(self):
+        data = bytearray(BOOTP_HEADER.pack(self.op, 1, 6, 0, self.xid, 0, self.flags, self.ciaddr, self.yiaddr,
+                                           self.siaddr, self.giaddr, self.chaddr, b"", b""))
+        data += DHCP_MAGIC_COOKIE
+        for code, value in self.options.items():
+            data += bytes((code, len(value))) + value
+        data.append(OPTION_END)
+        if len(data) < DHCP_MIN_PACKET_SIZE:
+            data += bytes(DHCP_MIN_PACKET_SIZE - len(data))
+        return bytes(data)
+
+
+class DhcpLease:
+    __slots__ = ("mac_addr", "ip_addr", "expiry", "bound")
+
+    def __init__(self, mac_addr: str, ip_addr: str, expiry: float, bound: bool):
+        self.mac_addr = mac_addr
+        self.ip_addr = ip_addr
+        self.expiry = expiry
+        self.bound = bound
+
+
+class DhcpServer(asyncio.DatagramProtocol):
+    """DHCPv4 server of the .50-.200 pool of a /24 subnet, bound to one interface."""
+
+    def __init__(self, if_name: str, server_ip: str, server_port: int = DHCP_SERVER_PORT,
+                 client_port: int = DHCP_CLIENT_PORT, lease_time: int = DHCP_LEASE_TIME):
+        self.if_name = if_name
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.client_port = client_port
+        self.lease_time = lease_time
+        network = ipaddress.ip_network("{}/24".format(server_ip), strict=False)
+        self.netmask = network.netmask.packed
+        self.broadcast = network.broadcast_address.packed
+        self.pool = [str(network.network_address + host) for host in range(DHCP_POOL_START, DHCP_POOL_END + 1)
+                     if str(network.network_address + host) != server_ip]
+        # {MAC address: DhcpLease}, offered or bound
+        self.leases = {}
+        self.declined = set()
+        self.transport = None
+        self.loop = None
+        self.thread = None
+        self.started = threading.Event()
+        self.start_error = None
+
+    def start(self):
+        """Starts the server thread, raises OSError if the server socket can't be set up."""
+        self.thread = threading.Thread(target=self.__run, name="dhcp_server", daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.start_error is not None:
+            raise self.start_error
+        DutLogger.log(LogCategory.INFO, "DHCP server on {} ({}), pool {} - {}".format(
+            self.if_name, self.server_ip, self.pool[0], self.pool[-1]))
+
+    def __run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                sock.setsockopt(socket.SOL_SOCKET, SO_BINDTODEVICE, self.if_name.encode())
+                sock.bind(("", self.server_port))
+            except OSError:
+                sock.close()
+                raise
+            self.loop.run_until_complete(self.loop.create_datagram_endpoint(lambda: self, sock=sock))
+        except OSError as err:
+            self.start_error = err
+            self.started.set()
+            self.loop.close()
+            return
+        self.started.set()
+        self.loop.run_forever()
+        self.transport.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join()
+        DutLogger.log(LogCategory.INFO, "DHCP server on {} stopped".format(self.if_name))
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        request = DhcpMessage.parse(data)
+        if request is None or request.op != BOOTREQUEST:
+            return
+        message_type = request.get_message_type()
+        mac_addr = request.get_mac_addr()
+        if message_type == DHCPDISCOVER:
+            ip_addr = self.__allocate(mac_addr, request.options.get(OPTION_REQUESTED_IP))
+            if ip_addr is None:
+                DutLogger.log(LogCategory.ERROR, "DHCP pool exhausted, no offer for {}".format(mac_addr))
+                return
+            self.leases[mac_addr] = DhcpLease(mac_addr, ip_addr, time.monotonic() + DHCP_OFFER_TIME, False)
+            self.__reply(request, DHCPOFFER, ip_addr)
+        elif message_type == DHCPREQUEST:
+            self.__handle_request(request, mac_addr)
+        elif message_type == DHCPRELEASE:
+            lease = self.leases.get(mac_addr)
+            if lease is not None and lease.ip_addr == socket.inet_ntoa(request.ciaddr):
+                del self.leases[mac_addr]
+        elif message_type == DHCPDECLINE:
+            declined = request.options.get(OPTION_REQUESTED_IP)
+            if declined is not None:
+                self.declined.add(socket.inet_ntoa(declined))
+            self.leases.pop(mac_addr, None)
+        elif message_type == DHCPINFORM:
+            self.__reply(request, DHCPACK, None)
+
+    def __handle_request(self, request, mac_addr):
+        server_id = request.options.get(OPTION_SERVER_ID)
+        if server_id is not None and server_id != socket.inet_aton(self.server_ip):
+            # The client took the offer of another server
+            lease = self.leases.get(mac_addr)
+            if lease is not None and not lease.bound:
+                del self.leases[mac_addr]
+            return
+        requested = request.options.get(OPTION_REQUESTED_IP, request.ciaddr)
+        ip_addr = socket.inet_ntoa(requested) if requested and requested != b"\0" * 4 else None
+        lease = self.leases.get(mac_addr)
+        if ip_addr is None or ip_addr not in self.pool or self.__get_owner(ip_addr) not in (None, mac_addr):
+            self.__reply(request, DHCPNAK, None)
+            return
+        if lease is None:
+            lease = self.leases[mac_addr] = DhcpLease(mac_addr, ip_addr, 0, True)
+        lease.ip_addr = ip_addr
+        lease.bound = True
+        lease.expiry = time.monotonic() + self.lease_time
+        DutLogger.log(LogCategory.INFO, "DHCP lease {} to {}".format(ip_addr, mac_addr))
+        self.__reply(request, DHCPACK, ip_addr)
+
+    def __get_owner(self, ip_addr):
+        now = time.monotonic()
+        for lease in self.leases.values():
+            if lease.ip_addr == ip_addr and lease.expiry > now:
+                return lease.mac_addr
+        return None
+
+    def __allocate(self, mac_addr, requested):
+        """Returns the address to offer: the current one of the client, the requested one if free, or the first free one."""
+        now = time.monotonic()
+        lease = self.leases.get(mac_addr)
+        if lease is not None and lease.expiry > now:
+            return lease.ip_addr
+        in_use = {lease.ip_addr for lease in self.leases.values() if lease.expiry > now and lease.mac_addr != mac_addr}
+        in_use |= self.declined
+        if requested is not None:
+            requested_ip = socket.inet_ntoa(requested)
+            if requested_ip in self.pool and requested_ip not in in_use:
+                return requested_ip
+        for ip_addr in self.pool:
+            if ip_addr not in in_use:
+                return ip_addr
+        return None
+
+    def __reply(self, request, message_type, ip_addr):
+        server_id = socket.inet_aton(self.server_ip)
+        options = {OPTION_MESSAGE_TYPE: bytes((message_type,)), OPTION_SERVER_ID: server_id}
+        if message_type != DHCPNAK:
+            options[OPTION_SUBNET_MASK] = self.netmask
+            options[OPTION_BROADCAST_ADDRESS] = self.broadcast
+        if ip_addr is not None:
+            options[OPTION_LEASE_TIME] = struct.pack("!I", self.lease_time)
+            options[OPTION_RENEWAL_TIME] = struct.pack("!I", self.lease_time // 2)
+            options[OPTION_REBINDING_TIME] = struct.pack("!I", self.lease_time * 7 // 8)
+        reply = DhcpMessage(BOOTREPLY, request.xid, request.flags, request.ciaddr if message_type == DHCPACK else b"\0" * 4,
+                            socket.inet_aton(ip_addr) if ip_addr else b"\0" * 4, server_id, request.giaddr,
+                            request.chaddr, options)
+        # A client without address can only receive broadcasts (no ARP entry is set for yiaddr)
+        if request.ciaddr != b"\0" * 4 and message_type != DHCPNAK:
+            destination = socket.inet_ntoa(request.ciaddr)
+        else:
+            destination = "255.255.255.255"
+        self.transport.sendto(reply.to_bytes(), (destination, self.client_port))
+
+    def get_leases(self):
+        """Returns {MAC address: IP address} of the bound leases."""
+        now = time.monotonic()
+        return {lease.mac_addr: lease.ip_addr for lease in list(self.leases.values()) if lease.bound and lease.expiry > now}
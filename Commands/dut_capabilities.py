@@ -0,0 +1,250 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Capabilities of the DUT: hostapd/wpa_supplicant binaries and wireless phys.
+
+The binaries and phys are probed once, on first use or from the startup warm-up, and the
+result is kept in memory: start-up APIs check that a daemon is installed, and requests the
+binary or the driver cannot serve are refused, without running any command.
+"""
+import mmap
+import re
+import subprocess
+from threading import Lock, Thread
+from Commands.dut_logger import DutLogger, LogCategory
+from .process_supervisor import HOSTAPD, WPA_SUPPLICANT
+from .channel_plan import ChannelPlan, BAND_24GHZ, BAND_5GHZ, BAND_6GHZ
+
+PROBE_TIMEOUT = 5
+# Control interface commands sent by the control app, looked up in the string table of each binary.
+# The ones taking arguments are matched with their trailing space, as hostapd/wpa_supplicant compare them.
+# The linker may only keep a command as the tail of a longer string and a build may compare them
+# differently, so a command that isn't found is reported as unknown, never refused.
+KNOWN_CTRL_COMMANDS = {
+    HOSTAPD: [
+        "PING", "STATUS", "ENABLE", "DISABLE", "RELOAD", "UPDATE_BEACON", "SET ", "DISASSOCIATE ",
+        "CHAN_SWITCH ", "BSS_TM_REQ ", "WPS_PIN ", "WPS_PBC", "WPS_AP_PIN ",
+    ],
+    WPA_SUPPLICANT: [
+        "PING", "STATUS", "SCAN", "DISCONNECT", "RECONNECT", "REMOVE_NETWORK ", "WNM_BSS_QUERY ",
+        "ANQP_GET ", "WPS_PIN ", "WPS_PBC", "P2P_FIND", "P2P_LISTEN", "P2P_GROUP_ADD", "P2P_CONNECT ",
+        "P2P_INVITE ", "P2P_GROUP_REMOVE ", "P2P_SERV_DISC_REQ ", "P2P_SERVICE_ADD ", "P2P_EXT_LISTEN",
+    ],
+}
+# Band names in the GET_DUT_CAPABILITIES response
+BAND_LABELS = {BAND_24GHZ: "2.4", BAND_5GHZ: "5", BAND_6GHZ: "6"}
+MAX_TLV_VALUE_LENGTH = 255
+
+
+class DaemonCapabilities:
+    """Path, version and control interface commands found in a hostapd/wpa_supplicant binary."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.installed = False
+        self.version = None
+        # None when the binary couldn't be read
+        self.ctrl_commands = None
+
+    def format(self):
+        if not self.installed:
+            return "not installed,path={}".format(self.path)
+        return "version={},path={}".format(self.version, self.path)
+
+
+class PhyCapabilities:
+    """Bands, interface modes and 802.11n/ac/ax/be support of a wireless phy, from iw phy."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bands = set()
+        self.if_modes = []
+        self.ht = False
+        self.vht = False
+        self.he = False
+        self.eht = False
+
+    def format(self):
+        bands = [label for band, label in BAND_LABELS.items() if band in self.bands]
+        return "{}:bands={},modes={},ht={:d},vht={:d},he={:d},eht={:d}".format(
+            self.name, "/".join(bands), "/".join(self.if_modes), self.ht, self.vht, self.he, self.eht
+        )
+
+
+class DutCapabilities:
+    """Probes the hostapd/wpa_supplicant binaries and the phys once and caches the result."""
+
+    def __init__(self):
+        self.__lock = Lock()
+        # {daemon name: binary path}, set by the AP and STA helpers
+        self.__binary_paths = {}
+        # {daemon name: DaemonCapabilities}
+        self.__daemons = {}
+        # [PhyCapabilities], None until probed
+        self.__phys = None
+
+    def set_binary_path(self, name: str, path: str):
+        with self.__lock:
+            self.__binary_paths[name] = path
+            self.__daemons.pop(name, None)
+
+    def probe(self):
+        """Probes everything not probed yet."""
+        for name in list(self.__binary_paths):
+            self.get_daemon(name)
+        self.get_phys()
+
+    def probe_in_background(self):
+        """Probes from a thread, so that the first start-up API finds the result in the cache."""
+        Thread(target=self.probe, daemon=True).start()
+
+    def refresh(self):
+        """Drops the cached result, e.g. after the binaries were updated."""
+        with self.__lock:
+            self.__daemons.clear()
+            self.__phys = None
+
+    def get_daemon(self, name: str):
+        """Returns the DaemonCapabilities of hostapd or wpa_supplicant, probing the binary on first use."""
+        with self.__lock:
+            daemon = self.__daemons.get(name)
+            if daemon is None:
+                daemon = DutCapabilities.probe_binary(name, self.__binary_paths.get(name, name))
+                self.__daemons[name] = daemon
+            return daemon
+
+    def is_installed(self, name: str):
+        return self.get_daemon(name).installed
+
+    def get_phys(self):
+        """Returns the PhyCapabilities of all the wireless phys, from iw phy on first use."""
+        with self.__lock:
+            if self.__phys is None:
+                self.__phys = DutCapabilities.probe_phys()
+            return self.__phys
+
+    def supports_band(self, band: str):
+        """Checks if a phy has channels in a band of the channel plan, even disabled ones, True when no phy was found."""
+        phys = self.get_phys()
+        return not phys or any(band in phy.bands for phy in phys)
+
+    def get_unknown_ctrl_commands(self):
+        """Returns {daemon name: [known control interface commands not found in the binary]}."""
+        unknown = {}
+        for name in list(self.__binary_paths):
+            daemon = self.get_daemon(name)
+            if daemon.ctrl_commands is not None:
+                unknown[name] = [
+                    known.strip() for known in KNOWN_CTRL_COMMANDS.get(name, []) if known not in daemon.ctrl_commands
+                ]
+        return unknown
+
+    def format_unknown_ctrl_commands(self):
+        unknown = self.get_unknown_ctrl_commands()
+        value = ";".join("{}:{}".format(name, "/".join(commands) or "none") for name, commands in unknown.items()) or "unknown"
+        return DutCapabilities.truncate(value)
+
+    def format_phys(self):
+        return DutCapabilities.truncate(";".join(phy.format() for phy in self.get_phys()) or "none")
+
+    @staticmethod
+    def truncate(value: str):
+        return value[:MAX_TLV_VALUE_LENGTH]
+
+    @staticmethod
+    def probe_binary(name: str, path: str):
+        """Runs the binary with -v for its version and reads its string table for the control commands."""
+        daemon = DaemonCapabilities(name, path)
+        try:
+            output = subprocess.run(
+                [path, "-v"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=PROBE_TIMEOUT
+            ).stdout.decode("utf-8", "replace")
+        except (OSError, subprocess.SubprocessError) as err:
+            DutLogger.log(LogCategory.ERROR, "{} is not usable at {}: {}".format(name, path, err))
+            return daemon
+        daemon.installed = True
+        version = re.search(r"\bv(\d\S*)", output)
+        daemon.version = version.group(1) if version else "unknown"
+        daemon.ctrl_commands = DutCapabilities.find_ctrl_commands(path, KNOWN_CTRL_COMMANDS.get(name, []))
+        DutLogger.log(LogCategory.INFO, "{} {}".format(name, daemon.format()))
+        return daemon
+
+    @staticmethod
+    def find_ctrl_commands(path: str, commands: list):
+        """Returns the set of commands found as null terminated strings in a binary, None if it can't be read."""
+        try:
+            with open(path, "rb") as binary, mmap.mmap(binary.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return {
+                    command for command in commands
+                    if re.search(re.escape(command.encode()) + rb"\x00", content)
+                }
+        except (OSError, ValueError) as err:
+            DutLogger.log(LogCategory.ERROR, "Unable to read {}: {}".format(path, err))
+            return None
+
+    @staticmethod
+    def probe_phys():
+        try:
+            output = subprocess.run(
+                ["iw", "phy"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=PROBE_TIMEOUT
+            ).stdout.decode("utf-8", "replace")
+        except (OSError, subprocess.SubprocessError) as err:
+            DutLogger.log(LogCategory.ERROR, "Unable to get the phy capabilities: {}".format(err))
+            return []
+        return DutCapabilities.parse_iw_phy(output)
+
+    @staticmethod
+    def parse_iw_phy(output: str):
+        """Parses the output of iw phy into a list of PhyCapabilities."""
+        phys = []
+        phy = None
+        in_if_modes = False
+        for line in output.splitlines():
+            if line.startswith("Wiphy "):
+                phy = PhyCapabilities(line.split()[1])
+                phys.append(phy)
+                in_if_modes = False
+                continue
+            if phy is None:
+                continue
+            stripped = line.strip()
+            if in_if_modes:
+                if line.startswith("\t\t") and stripped.startswith("* "):
+                    phy.if_modes.append(stripped[2:])
+                    continue
+                in_if_modes = False
+            if stripped == "Supported interface modes:":
+                in_if_modes = True
+            elif stripped.startswith("Capabilities: 0x"):
+                phy.ht = True
+            elif stripped.startswith("VHT Capabilities"):
+                phy.vht = True
+            elif stripped.startswith("HE Iftypes"):
+                phy.he = True
+            elif stripped.startswith("EHT Iftypes"):
+                phy.eht = True
+            else:
+                # A band is a hardware capability: its channels are listed as disabled until
+                # the regulatory domain allows them, which may happen after the probe
+                freq = re.match(r"\* (\d+)(?:\.\d+)? MHz", stripped)
+                if freq:
+                    band = ChannelPlan.get_band_from_freq(int(freq.group(1)))
+                    if band is not None:
+                        phy.bands.add(band)
+        return phys
+
+
+dut_capabilities = DutCapabilities()
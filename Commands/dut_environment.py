@@ -0,0 +1,35 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Root of the files the control app reads and writes on the DUT.
+
+QUICKTRACK_DUT_ROOT is set by the stand-in DUT (standInDut) to run the control app
+against fake hostapd, wpa_supplicant and network tools: the configuration files,
+control interface sockets, logs and daemon binaries are then looked up under it,
+and the app runs without root permission.
+"""
+import os
+
+DUT_ROOT_ENV = "QUICKTRACK_DUT_ROOT"
+dut_root = os.environ.get(DUT_ROOT_ENV, "").rstrip("/")
+
+
+def dut_path(path: str):
+    """Returns an absolute DUT path under the stand-in DUT root, unchanged on a real DUT."""
+    return dut_root + path if dut_root else path
+
+
+def is_stand_in():
+    return bool(dut_root)
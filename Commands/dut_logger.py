@@ -13,29 +13,165 @@
 # CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
 # OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+import atexit
 import logging
-from enum import Enum, auto
+import logging.handlers
+import queue
+import time
+from enum import Enum
+from Commands.dut_environment import dut_path
+
+LOG_DIR = dut_path("/var/log")
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# Number of records buffered before they are written to the log file
+LOG_BUFFER_CAPACITY = 256
+# Maximum time a record stays in the buffer when the control app is idle
+LOG_FLUSH_INTERVAL = 1.0
 
 
 class LogCategory(Enum):
-    DEBUG = auto()
-    INFO = auto()
-    ERROR = auto()
+    DEBUG = logging.DEBUG
+    INFO = logging.INFO
+    WARNING = logging.WARNING
+    ERROR = logging.ERROR
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Queues the records as they are, they are formatted by the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class BufferedFileHandler(logging.handlers.MemoryHandler):
+    """Buffers the records of the log file, flushed when full, on ERROR or after LOG_FLUSH_INTERVAL."""
+
+    def __init__(self, target):
+        super().__init__(LOG_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=target, flushOnClose=True)
+        self.last_flush = time.monotonic()
+
+    def shouldFlush(self, record):
+        return super().shouldFlush(record) or time.monotonic() - self.last_flush >= LOG_FLUSH_INTERVAL
+
+    def flush(self):
+        super().flush()
+        self.last_flush = time.monotonic()
+
+
+class LogListener(logging.handlers.QueueListener):
+    """Writes the queued records, and flushes the buffered ones while the queue stays empty."""
+
+    def __init__(self, record_queue, *handlers, respect_handler_level=False):
+        super().__init__(record_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.__running = False
+
+    def start(self):
+        super().start()
+        self.__running = True
+
+    def stop(self):
+        """Writes the queued records and stops the thread, does nothing if it isn't running."""
+        if self.__running:
+            super().stop()
+            self.__running = False
+
+    def is_alive(self):
+        return self.__running
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
+
 
 class DutLogger:
     log_file_name = ""
+    __logger = logging.getLogger("dut_control_app")
+    __queue = queue.SimpleQueue()
+    __listener = None
+    __file_handler = None
+
+    @staticmethod
+    def __start():
+        """Sets up the queue, the console handler and the listener thread on first use."""
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        DutLogger.__listener = LogListener(DutLogger.__queue, console_handler, respect_handler_level=True)
+        DutLogger.__logger.addHandler(RecordQueueHandler(DutLogger.__queue))
+        # Keep a level set by set_level before the first log
+        if DutLogger.__logger.level == logging.NOTSET:
+            DutLogger.__logger.setLevel(logging.DEBUG)
+        DutLogger.__logger.propagate = False
+        DutLogger.__listener.start()
+        atexit.register(DutLogger.stop)
+
+    @staticmethod
+    def set_log_file_name(log_file_name: str):
+        """Writes the logs to a size-rotated file in LOG_DIR, in addition to the console.
+
+        Parameters
+        ----------
+        log_file_name : str
+            Name of the log file.
+        """
+        if DutLogger.__listener is None:
+            DutLogger.__start()
+        file_handler = logging.handlers.RotatingFileHandler(
+            "{}/{}".format(LOG_DIR, log_file_name), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+        file_handler.setFormatter(logging.Formatter("%(levelname)s :  %(message)s"))
+        buffered_handler = BufferedFileHandler(file_handler)
+        # The listener thread is the only user of its handlers, restart it to add the file
+        DutLogger.__listener.stop()
+        if DutLogger.__file_handler is not None:
+            DutLogger.__close_file_handler()
+        DutLogger.__listener.handlers += (buffered_handler,)
+        DutLogger.__listener.start()
+        DutLogger.__file_handler = buffered_handler
+        DutLogger.log_file_name = log_file_name
+
+    @staticmethod
+    def __close_file_handler():
+        DutLogger.__listener.handlers = tuple(
+            handler for handler in DutLogger.__listener.handlers if handler is not DutLogger.__file_handler)
+        DutLogger.__file_handler.close()
+        DutLogger.__file_handler.target.close()
+        DutLogger.__file_handler = None
+
+    @staticmethod
+    def set_level(log_type: LogCategory):
+        """Drops the logs below log_type before they are formatted or queued."""
+        DutLogger.__logger.setLevel(log_type.value)
+
+    @staticmethod
+    def is_enabled(log_type: LogCategory):
+        return DutLogger.__logger.isEnabledFor(log_type.value)
+
+    @staticmethod
+    def log(log_type: LogCategory, log_msg: str, *args):
+        """Queues a log, it is written to the console and the log file by the listener thread.
+
+        Parameters
+        ----------
+        log_type : LogCategory
+            Level of the log.
+        log_msg : str
+            Message, formatted with args (%-style) only if the level is enabled.
+        """
+        if DutLogger.__listener is None:
+            DutLogger.__start()
+        DutLogger.__logger.log(log_type.value, log_msg, *args)
 
     @staticmethod
-    def log(log_type:LogCategory, log_msg: str):
-        if log_type == LogCategory.DEBUG:
-            logging.basicConfig(level=logging.DEBUG)
-            logging.debug(log_msg)
-        elif log_type == LogCategory.INFO:
-            logging.basicConfig(level=logging.INFO)
-            logging.info(log_msg)
-        else:
-            logging.error(log_msg)
-
-        if DutLogger.log_file_name :
-            with open(("/var/log/{}").format(DutLogger.log_file_name), "a") as file:
-                file.write(f"{log_type.name} :  {log_msg}"+"\n")
+    def stop():
+        """Writes the queued and buffered logs and stops the listener thread."""
+        if DutLogger.__listener is None or not DutLogger.__listener.is_alive():
+            return
+        DutLogger.__listener.stop()
+        if DutLogger.__file_handler is not None:
+            DutLogger.__file_handler.flush()
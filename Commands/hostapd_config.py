@@ -0,0 +1,278 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Ordered model of a hostapd configuration file.
+
+A configuration is a list of sections: the lines before the first interface=,
+then one section per interface= or bss= line. Lines keep their order so that a
+parsed file is rendered back unchanged.
+"""
+
+# Default HE MU EDCA parameters set along with he_mu_edca_qos_info_param_count
+MU_EDCA_BLOCK = (
+    ("he_mu_edca_qos_info_queue_request", "1"),
+    ("he_mu_edca_ac_be_aifsn", "0"),
+    ("he_mu_edca_ac_be_ecwmin", "15"),
+    ("he_mu_edca_ac_be_ecwmax", "15"),
+    ("he_mu_edca_ac_be_timer", "255"),
+    ("he_mu_edca_ac_bk_aifsn", "0"),
+    ("he_mu_edca_ac_bk_aci", "1"),
+    ("he_mu_edca_ac_bk_ecwmin", "15"),
+    ("he_mu_edca_ac_bk_ecwmax", "15"),
+    ("he_mu_edca_ac_bk_timer", "255"),
+    ("he_mu_edca_ac_vi_ecwmin", "15"),
+    ("he_mu_edca_ac_vi_ecwmax", "15"),
+    ("he_mu_edca_ac_vi_aifsn", "0"),
+    ("he_mu_edca_ac_vi_aci", "2"),
+    ("he_mu_edca_ac_vi_timer", "255"),
+    ("he_mu_edca_ac_vo_aifsn", "0"),
+    ("he_mu_edca_ac_vo_aci", "3"),
+    ("he_mu_edca_ac_vo_ecwmin", "15"),
+    ("he_mu_edca_ac_vo_ecwmax", "15"),
+    ("he_mu_edca_ac_vo_timer", "255"),
+)
+
+SECTION_KEYS = ("interface", "bss")
+
+
+class HostapdConfigSection:
+    """Lines of one interface= or bss= section, or of the lines before the first interface=."""
+
+    def __init__(self, header: str = None, name: str = "", raw: str = None):
+        # "interface", "bss" or None for the lines before the first interface=
+        self.header = header
+        self.name = name
+        # [key, value, raw line], key is None for comments and blank lines kept as is in value,
+        # the raw line of a parsed line is rendered as long as its value is unchanged
+        self.__lines = []
+        # {key: position of its last line}
+        self.__index = {}
+        if header is not None:
+            self.add(header, name, raw)
+
+    def add(self, key: str, value: str, raw: str = None):
+        """Appends a line, even if the key is already set."""
+        self.__index[key] = len(self.__lines)
+        self.__lines.append([key, str(value), raw])
+
+    def add_block(self, params):
+        """Appends a block of (key, value) lines, e.g. MU_EDCA_BLOCK."""
+        for key, value in params:
+            self.set(key, value)
+
+    def set(self, key: str, value: str):
+        """Sets a key in place if it is already set, appends it otherwise."""
+        position = self.__index.get(key)
+        if position is None:
+            self.add(key, value)
+        elif self.__lines[position][1] != str(value):
+            self.__lines[position][1:] = [str(value), None]
+
+    def set_all(self, key: str, values: list):
+        """Replaces all the lines of a repeated key (e.g. nai_realm) in place, appends them if it isn't set."""
+        positions = [position for position, line in enumerate(self.__lines) if line[0] == key]
+        if not positions:
+            for value in values:
+                self.add(key, value)
+            return
+        old_lines = [self.__lines[position] for position in positions]
+        new_lines = [old_lines[index] if index < len(old_lines) and old_lines[index][1] == str(value)
+                     else [key, str(value), None] for index, value in enumerate(values)]
+        self.__lines = [line for line in self.__lines[:positions[0]] if line[0] != key] + new_lines + \
+            [line for line in self.__lines[positions[0]:] if line[0] != key]
+        self.__reindex()
+
+    def add_comment(self, line: str):
+        self.__lines.append([None, line, None])
+
+    def get(self, key: str, default=None):
+        position = self.__index.get(key)
+        if position is None:
+            return default
+        return self.__lines[position][1]
+
+    def get_all(self, key: str):
+        """Returns the values of all the lines of a key, in file order."""
+        return [line[1] for line in self.__lines if line[0] == key]
+
+    def remove(self, key: str):
+        if key not in self.__index:
+            return
+        self.__lines = [line for line in self.__lines if line[0] != key]
+        self.__reindex()
+
+    def __reindex(self):
+        self.__index = {line[0]: position for position, line in enumerate(self.__lines) if line[0] is not None}
+
+    def __contains__(self, key):
+        return key in self.__index
+
+    def items(self):
+        """Returns the (key, value) lines in file order, comments excluded."""
+        return [(key, value) for key, value, _ in self.__lines if key is not None]
+
+    def to_dict(self):
+        """Returns {key: value}, the last line wins as in hostapd."""
+        return {key: self.__lines[position][1] for key, position in self.__index.items()}
+
+    def to_list_dict(self):
+        """Returns {key: [values]}, with all the lines of the repeated keys."""
+        params = {}
+        for key, value, _ in self.__lines:
+            if key is not None:
+                params.setdefault(key, []).append(value)
+        return params
+
+    def get_lines(self):
+        return [value if key is None else raw if raw is not None else key + "=" + value
+                for key, value, raw in self.__lines]
+
+    def copy(self):
+        section = HostapdConfigSection()
+        section.header = self.header
+        section.name = self.name
+        section.__lines = [list(line) for line in self.__lines]
+        section.__index = dict(self.__index)
+        return section
+
+
+class HostapdConfig:
+    """Ordered hostapd configuration that can be parsed, merged, compared and rendered."""
+
+    def __init__(self, sections: list = None):
+        self.sections = sections if sections is not None else []
+
+    def get_preamble(self):
+        """Returns the section of the lines before the first interface=, created if needed."""
+        if not self.sections or self.sections[0].header is not None:
+            self.sections.insert(0, HostapdConfigSection())
+        return self.sections[0]
+
+    def add_section(self, header: str, name: str, raw: str = None):
+        section = HostapdConfigSection(header, name, raw)
+        self.sections.append(section)
+        return section
+
+    def get_section(self, name: str):
+        for section in self.sections:
+            if section.header is not None and section.name == name:
+                return section
+        return None
+
+    def get_interface_names(self):
+        return [section.name for section in self.sections if section.header == "interface"]
+
+    def get_section_dict(self, repeated: bool = False):
+        """Returns {section name: {key: value}}, the lines before the first interface= under "".
+
+        Parameters
+        ----------
+        repeated : bool
+            True for {key: [values]} with all the lines of the repeated keys, the last line otherwise.
+        """
+        sections = {}
+        for section in self.sections:
+            params = section.to_list_dict() if repeated else section.to_dict()
+            if section.name in sections:
+                sections[section.name].update(params)
+            else:
+                sections[section.name] = params
+        return sections
+
+    @staticmethod
+    def parse(config: str):
+        """Parses the content of a hostapd configuration file.
+
+        Parameters
+        ----------
+        config : str
+            Content of a hostapd configuration file.
+
+        Returns
+        -------
+        HostapdConfig
+            The configuration, rendered back to the same content.
+        """
+        hostapd_config = HostapdConfig()
+        section = None
+        for line in config.splitlines():
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#") or "=" not in stripped:
+                if section is None:
+                    section = hostapd_config.get_preamble()
+                section.add_comment(line)
+                continue
+            key, value = stripped.split("=", 1)
+            if key in SECTION_KEYS:
+                section = hostapd_config.add_section(key, value, line)
+                continue
+            if section is None:
+                section = hostapd_config.get_preamble()
+            section.add(key, value, line)
+        return hostapd_config
+
+    def render(self):
+        """Returns the content of the configuration file."""
+        lines = [line for section in self.sections for line in section.get_lines()]
+        if not lines:
+            return ""
+        return "\n".join(lines) + "\n"
+
+    def merge(self, other):
+        """Returns a new configuration with the sections of other merged into this one.
+
+        Keys of a section already present are set in place, the lines of a key repeated in other
+        replace all the lines of this key. New sections are appended. Neither configuration is modified.
+        """
+        merged = HostapdConfig([section.copy() for section in self.sections])
+        for other_section in other.sections:
+            if other_section.header is None:
+                section = merged.get_preamble()
+            else:
+                section = merged.get_section(other_section.name)
+            if section is None:
+                merged.sections.append(other_section.copy())
+                continue
+            for key, values in other_section.to_list_dict().items():
+                if key in SECTION_KEYS:
+                    continue
+                if len(values) > 1:
+                    section.set_all(key, values)
+                else:
+                    section.set(key, values[0])
+        return merged
+
+    def diff(self, other):
+        """Compares this configuration with other.
+
+        Returns
+        -------
+        dict
+            {section name: {key: (values in self, values in other)}} of the keys that differ,
+            with all the lines of the repeated keys, [] for a missing key.
+        """
+        own_sections = self.get_section_dict(True)
+        other_sections = other.get_section_dict(True)
+        differences = {}
+        for name in list(own_sections) + [name for name in other_sections if name not in own_sections]:
+            own_params = own_sections.get(name, {})
+            other_params = other_sections.get(name, {})
+            changed = {}
+            for key in list(own_params) + [key for key in other_params if key not in own_params]:
+                if own_params.get(key, []) != other_params.get(key, []):
+                    changed[key] = (own_params.get(key, []), other_params.get(key, []))
+            if changed:
+                differences[name] = changed
+        return differences
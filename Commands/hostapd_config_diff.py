@@ -0,0 +1,148 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Compares hostapd configurations to find the cheapest way to apply a new one to a running hostapd."""
+from .shared_enums import HostapdReconfigPath
+from .hostapd_config import HostapdConfig
+
+# Parameters that hostapd applies at runtime with SET alone
+SET_ONLY_PARAMS = frozenset((
+    "gas_comeback_delay", "ap_max_inactivity", "max_num_sta",
+))
+
+# Parameters carried in Beacon/Probe Response frames: SET then UPDATE_BEACON
+BEACON_PARAMS = frozenset((
+    "ignore_broadcast_ssid", "mbo", "mbo_cell_data_conn_pref", "mbo_assoc_disallow",
+    "bss_transition", "interworking", "rrm_neighbor_report", "rrm_beacon_report",
+    "transition_disable", "he_mu_edca_qos_info_param_count", "he_mu_edca_qos_info_queue_request",
+    "he_mu_edca_ac_be_aifsn", "he_mu_edca_ac_be_ecwmin", "he_mu_edca_ac_be_ecwmax", "he_mu_edca_ac_be_timer",
+    "he_mu_edca_ac_bk_aifsn", "he_mu_edca_ac_bk_aci", "he_mu_edca_ac_bk_ecwmin", "he_mu_edca_ac_bk_ecwmax",
+    "he_mu_edca_ac_bk_timer", "he_mu_edca_ac_vi_aifsn", "he_mu_edca_ac_vi_aci", "he_mu_edca_ac_vi_ecwmin",
+    "he_mu_edca_ac_vi_ecwmax", "he_mu_edca_ac_vi_timer", "he_mu_edca_ac_vo_aifsn", "he_mu_edca_ac_vo_aci",
+    "he_mu_edca_ac_vo_ecwmin", "he_mu_edca_ac_vo_ecwmax", "he_mu_edca_ac_vo_timer",
+))
+
+# SSID and security parameters: SET then RELOAD so that the BSS is set up again with them
+RELOAD_PARAMS = frozenset((
+    "ssid", "wpa", "wpa_key_mgmt", "wpa_passphrase", "wpa_pairwise", "rsn_pairwise", "ieee80211w",
+    "sae_groups", "sae_pwe", "sae_require_mfp", "owe_groups", "auth_algs", "wep_key0", "wep_default_key",
+    "ieee8021x", "eap_server", "auth_server_addr", "auth_server_port", "auth_server_shared_secret",
+))
+
+# Everything else (interface, channel, band, width, country, WPS, ...) needs a restart
+
+
+class HostapdReconfigPlan:
+    """Result of the comparison of the running and the new hostapd configurations."""
+
+    def __init__(self, path: HostapdReconfigPath, reason: str = "", changes: dict = None):
+        self.path = path
+        self.reason = reason
+        # {interface or bss name: [(parameter, value), ...]}
+        self.changes = changes if changes is not None else {}
+
+    def get_change_count(self):
+        return sum(len(params) for params in self.changes.values())
+
+    def describe(self):
+        if self.path == HostapdReconfigPath.RESTART:
+            return "restarted: {}".format(self.reason)
+        return "hot reconfiguration by {} of {} parameter(s)".format(self.path.value, self.get_change_count())
+
+
+class HostapdConfigDiff:
+    """Diff engine between the configuration of the running hostapd and a newly generated one."""
+
+    @staticmethod
+    def parse_config(config: str):
+        """Splits a hostapd configuration into its interface and bss sections.
+
+        Parameters
+        ----------
+        config : str
+            Content of a hostapd configuration file.
+
+        Returns
+        -------
+        list
+            List of (section name, {parameter: value}) in file order.
+        """
+        return [(section.name, section.to_dict()) for section in HostapdConfig.parse(config).sections]
+
+    @staticmethod
+    def __get_section_dict(configs: dict):
+        """Returns {section name: {parameter: [values]}} of all configuration files, in file order."""
+        sections = {}
+        for file_name in configs:
+            config = configs[file_name]
+            if isinstance(config, str):
+                config = HostapdConfig.parse(config)
+            for name, params in config.get_section_dict(True).items():
+                if name in sections:
+                    sections[name].update(params)
+                else:
+                    sections[name] = params
+        return sections
+
+    @staticmethod
+    def compare(running_configs: dict, new_configs: dict):
+        """Decides how to go from the running hostapd configuration to the new one.
+
+        Parameters
+        ----------
+        running_configs : dict
+            {file name: HostapdConfig or content} of the configuration hostapd was started or last reconfigured with.
+        new_configs : dict
+            {file name: HostapdConfig or content} of the configuration to apply.
+
+        Returns
+        -------
+        HostapdReconfigPlan
+            The path to take and the parameters to set per interface.
+        """
+        if list(running_configs) != list(new_configs):
+            return HostapdReconfigPlan(HostapdReconfigPath.RESTART, "configuration files changed")
+
+        running_sections = HostapdConfigDiff.__get_section_dict(running_configs)
+        new_sections = HostapdConfigDiff.__get_section_dict(new_configs)
+        if list(running_sections) != list(new_sections):
+            return HostapdReconfigPlan(HostapdReconfigPath.RESTART, "interfaces changed")
+
+        path = HostapdReconfigPath.SET
+        changes = {}
+        for name, new_params in new_sections.items():
+            running_params = running_sections[name]
+            removed = [key for key in running_params if key not in new_params]
+            if removed:
+                return HostapdReconfigPlan(HostapdReconfigPath.RESTART, "{} removed".format(",".join(removed)))
+            for key, values in new_params.items():
+                if running_params.get(key) == values:
+                    continue
+                if len(values) > 1 or len(running_params.get(key, [])) > 1:
+                    # SET replaces one value, the lines of a repeated key (nai_realm...) are only read at startup
+                    return HostapdReconfigPlan(HostapdReconfigPath.RESTART, "{} is repeated".format(key))
+                value = values[0]
+                if key in RELOAD_PARAMS:
+                    path = HostapdReconfigPath.RELOAD
+                elif key in BEACON_PARAMS:
+                    if path == HostapdReconfigPath.SET:
+                        path = HostapdReconfigPath.UPDATE_BEACON
+                elif key not in SET_ONLY_PARAMS:
+                    return HostapdReconfigPlan(HostapdReconfigPath.RESTART, "{} needs a restart".format(key))
+                changes.setdefault(name, []).append((key, value))
+
+        if not changes:
+            return HostapdReconfigPlan(HostapdReconfigPath.RESTART, "configuration unchanged")
+        return HostapdReconfigPlan(path, changes=changes)
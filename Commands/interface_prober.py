@@ -0,0 +1,65 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Concurrent probing of the wireless interfaces, e.g. hostapd_cli/wpa_cli status of each one."""
+from concurrent.futures import ThreadPoolExecutor
+from Commands.dut_logger import DutLogger, LogCategory
+
+DEFAULT_MAX_PROBE_WORKERS = 8
+
+
+class InterfaceProber:
+    """Runs a probe on several interfaces at the same time with a bounded thread pool."""
+
+    @staticmethod
+    def probe_first(if_names: list, probe, match, max_workers: int = DEFAULT_MAX_PROBE_WORKERS):
+        """Probes all the interfaces concurrently and returns the first match in if_names order.
+
+        Probes that have not started yet are cancelled once there is a match, the running ones
+        are waited for so that no hostapd_cli/wpa_cli call outlives the API.
+
+        Parameters
+        ----------
+        if_names : list
+            Interfaces to probe
+        probe : callable
+            probe(if_name) returns the probe result of an interface
+        match : callable
+            match(if_name, result) returns a value if the interface matches, None otherwise
+        max_workers : int
+            Maximum number of probes running at the same time
+
+        Returns
+        -------
+        tuple
+            (interface name, value returned by match), (None, None) if no interface matches.
+        """
+        if not if_names:
+            return None, None
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(if_names)), thread_name_prefix="if_probe")
+        futures = [(if_name, executor.submit(probe, if_name)) for if_name in if_names]
+        try:
+            for if_name, future in futures:
+                try:
+                    result = future.result()
+                except Exception as err:
+                    DutLogger.log(LogCategory.ERROR, "Probe of {} failed: {}".format(if_name, err))
+                    continue
+                matched = match(if_name, result)
+                if matched:
+                    return if_name, matched
+            return None, None
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
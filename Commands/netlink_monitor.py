@@ -0,0 +1,342 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""In-memory inventory of the network interfaces kept up to date from rtnetlink events.
+
+A background thread subscribes to RTNLGRP_LINK and RTNLGRP_IPV4_IFADDR and applies each
+event to the inventory. The inventory is loaded with a full dump at start, and dumped
+again if the kernel reports that events were dropped (ENOBUFS).
+"""
+import errno
+import itertools
+import socket
+import struct
+import threading
+from Commands.dut_logger import DutLogger, LogCategory
+
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+
+NLMSG_HEADER = struct.Struct("=IHHII")
+IFINFOMSG = struct.Struct("=BxHiII")
+IFADDRMSG = struct.Struct("=BBBBI")
+RTATTR = struct.Struct("=HH")
+
+OPERSTATES = ("UNKNOWN", "NOTPRESENT", "DOWN", "LOWERLAYERDOWN", "TESTING", "DORMANT", "UP")
+
+NETLINK_RCVBUF_SIZE = 1024 * 1024
+NETLINK_RECV_SIZE = 65536
+# Raised by a truncated or malformed netlink message
+NETLINK_PARSE_ERRORS = (struct.error, IndexError, UnicodeDecodeError)
+
+
+class InterfaceState:
+    """Link and IPv4 state of a network interface."""
+
+    __slots__ = ("index", "name", "mac_addr", "operstate", "flags", "ipv4_addrs", "ipv4_addr_events", "last_ipv4_addr")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.name = None
+        self.mac_addr = None
+        self.operstate = "UNKNOWN"
+        self.flags = 0
+        # [(address, prefix length)]
+        self.ipv4_addrs = []
+        # Number of RTM_NEWADDR received and address of the last one, also counts renewed addresses
+        self.ipv4_addr_events = 0
+        self.last_ipv4_addr = None
+
+
+def _parse_attrs(data: bytes, offset: int, end: int):
+    """Returns {attribute type: payload} of the rtattrs in data[offset:end]."""
+    attrs = {}
+    while offset + RTATTR.size <= end:
+        length, attr_type = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        attrs[attr_type] = data[offset + RTATTR.size:offset + length]
+        offset += (length + 3) & ~3
+    return attrs
+
+
+class NetlinkMonitor:
+    """Keeps the inventory of interfaces, MACs, operstate and IPv4 addresses from netlink events."""
+
+    def __init__(self):
+        self.__interfaces = {}
+        self.__condition = threading.Condition()
+        self.__sock = None
+        self.__thread = None
+        self.__running = False
+        self.__seq = itertools.count(1)
+        self.resync_count = 0
+
+    def start(self):
+        """Subscribes to the link and IPv4 address events and loads the inventory.
+
+        Returns
+        -------
+        bool
+            True if the monitor is running, False if netlink is not available and commands must be used.
+        """
+        if self.__running:
+            return True
+        try:
+            self.__sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+            self.__sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, NETLINK_RCVBUF_SIZE)
+            self.__sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR))
+            self.resync()
+        except (AttributeError, OSError) as err:
+            DutLogger.log(LogCategory.INFO, "Netlink monitor not available, using commands: {}".format(err))
+            if self.__sock is not None:
+                self.__sock.close()
+                self.__sock = None
+            return False
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__run, name="netlink_monitor", daemon=True)
+        self.__thread.start()
+        return True
+
+    def stop(self):
+        self.__running = False
+        if self.__sock is not None:
+            self.__sock.close()
+            self.__sock = None
+
+    def is_running(self):
+        return self.__running
+
+    def resync(self):
+        """Replaces the inventory with a full dump of the links and IPv4 addresses."""
+        interfaces = {}
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as dump_sock:
+            dump_sock.bind((0, 0))
+            self.__dump(dump_sock, RTM_GETLINK, IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0), interfaces)
+            self.__dump(dump_sock, RTM_GETADDR, IFADDRMSG.pack(socket.AF_INET, 0, 0, 0, 0), interfaces)
+        with self.__condition:
+            for index, state in interfaces.items():
+                old_state = self.__interfaces.get(index)
+                if old_state is None:
+                    continue
+                # Keep counting from the previous inventory so that wait_for_ipv4_addr callers see only
+                # the addresses that appeared meanwhile, not every address of the dump
+                new_addrs = [addr for addr in state.ipv4_addrs if addr not in old_state.ipv4_addrs]
+                state.ipv4_addr_events = old_state.ipv4_addr_events + len(new_addrs)
+                state.last_ipv4_addr = new_addrs[-1][0] if new_addrs else old_state.last_ipv4_addr
+            self.__interfaces = interfaces
+            self.resync_count += 1
+            self.__condition.notify_all()
+
+    def __dump(self, dump_sock, msg_type: int, payload: bytes, interfaces: dict):
+        seq = next(self.__seq)
+        dump_sock.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + len(payload), msg_type,
+                                         NLM_F_REQUEST | NLM_F_DUMP, seq, 0) + payload)
+        while True:
+            data = dump_sock.recv(NETLINK_RECV_SIZE)
+            if not self.__apply_messages(data, interfaces, seq):
+                return
+
+    def __run(self):
+        try:
+            while self.__running:
+                try:
+                    data = self.__sock.recv(NETLINK_RECV_SIZE)
+                except OSError as err:
+                    if not self.__running:
+                        return
+                    if err.errno == errno.ENOBUFS:
+                        # Events were dropped, the inventory can't be trusted anymore
+                        DutLogger.log(LogCategory.DEBUG, "Netlink events overflow, reloading the interfaces")
+                        self.__resync_after_overflow()
+                        continue
+                    DutLogger.log(LogCategory.ERROR, "Netlink monitor stopped: {}".format(err))
+                    return
+                malformed = None
+                with self.__condition:
+                    try:
+                        self.__apply_messages(data, self.__interfaces)
+                    except NETLINK_PARSE_ERRORS as err:
+                        malformed = err
+                    self.__condition.notify_all()
+                if malformed is not None:
+                    # The rest of the datagram is lost, as after an overflow
+                    DutLogger.log(LogCategory.ERROR, "Malformed netlink datagram, reloading the interfaces: {}".format(
+                        malformed))
+                    self.__resync_after_overflow()
+        finally:
+            # The commands are used again as soon as the monitor thread ends, whatever the reason
+            self.__running = False
+
+    def __resync_after_overflow(self):
+        try:
+            self.resync()
+        except (OSError,) + NETLINK_PARSE_ERRORS as err:
+            DutLogger.log(LogCategory.ERROR, "Netlink resync failed, using commands: {}".format(err))
+            self.__running = False
+
+    @staticmethod
+    def __apply_messages(data: bytes, interfaces: dict, seq: int = None):
+        """Applies the netlink messages of a datagram to interfaces.
+
+        Returns
+        -------
+        bool
+            False when the end of a dump (or an error) is reached.
+        """
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(data):
+            length, msg_type, _, msg_seq, _ = NLMSG_HEADER.unpack_from(data, offset)
+            if length < NLMSG_HEADER.size:
+                break
+            payload_offset = offset + NLMSG_HEADER.size
+            end = offset + length
+            if seq is not None and msg_seq != seq:
+                pass
+            elif msg_type == NLMSG_DONE:
+                return False
+            elif msg_type == NLMSG_ERROR:
+                error = struct.unpack_from("=i", data, payload_offset)[0]
+                if error:
+                    raise OSError(-error, "netlink dump failed")
+                return False
+            elif msg_type in (RTM_NEWLINK, RTM_DELLINK):
+                NetlinkMonitor.__apply_link(msg_type, data, payload_offset, end, interfaces)
+            elif msg_type in (RTM_NEWADDR, RTM_DELADDR):
+                NetlinkMonitor.__apply_addr(msg_type, data, payload_offset, end, interfaces)
+            offset += (length + 3) & ~3
+        return True
+
+    @staticmethod
+    def __apply_link(msg_type, data, offset, end, interfaces):
+        _, _, index, flags, _ = IFINFOMSG.unpack_from(data, offset)
+        if msg_type == RTM_DELLINK:
+            interfaces.pop(index, None)
+            return
+        state = interfaces.get(index)
+        if state is None:
+            state = interfaces[index] = InterfaceState(index)
+        state.flags = flags
+        attrs = _parse_attrs(data, offset + IFINFOMSG.size, end)
+        if IFLA_IFNAME in attrs:
+            state.name = attrs[IFLA_IFNAME].split(b"\0", 1)[0].decode()
+        if IFLA_ADDRESS in attrs:
+            state.mac_addr = ":".join("%02x" % b for b in attrs[IFLA_ADDRESS])
+        if IFLA_OPERSTATE in attrs:
+            operstate = attrs[IFLA_OPERSTATE][0]
+            state.operstate = OPERSTATES[operstate] if operstate < len(OPERSTATES) else "UNKNOWN"
+
+    @staticmethod
+    def __apply_addr(msg_type, data, offset, end, interfaces):
+        family, prefixlen, _, _, index = IFADDRMSG.unpack_from(data, offset)
+        if family != socket.AF_INET:
+            return
+        attrs = _parse_attrs(data, offset + IFADDRMSG.size, end)
+        raw_addr = attrs.get(IFA_LOCAL, attrs.get(IFA_ADDRESS))
+        if raw_addr is None:
+            return
+        addr = (socket.inet_ntoa(raw_addr), prefixlen)
+        state = interfaces.get(index)
+        if state is None:
+            state = interfaces[index] = InterfaceState(index)
+        if msg_type == RTM_DELADDR:
+            if addr in state.ipv4_addrs:
+                state.ipv4_addrs.remove(addr)
+            return
+        if addr not in state.ipv4_addrs:
+            state.ipv4_addrs.append(addr)
+        state.ipv4_addr_events += 1
+        state.last_ipv4_addr = addr[0]
+
+    def __get_by_name(self, if_name: str):
+        for state in self.__interfaces.values():
+            if state.name == if_name:
+                return state
+        return None
+
+    def has_interface(self, if_name: str):
+        with self.__condition:
+            return self.__get_by_name(if_name) is not None
+
+    def get_mac_addr(self, if_name: str):
+        with self.__condition:
+            state = self.__get_by_name(if_name)
+            return state.mac_addr if state else None
+
+    def get_operstate(self, if_name: str):
+        with self.__condition:
+            state = self.__get_by_name(if_name)
+            return state.operstate if state else None
+
+    def get_ipv4_addr(self, if_name: str):
+        """Returns the first IPv4 address of an interface, None if it has none."""
+        with self.__condition:
+            state = self.__get_by_name(if_name)
+            if state is None or not state.ipv4_addrs:
+                return None
+            return state.ipv4_addrs[0][0]
+
+    def get_ipv4_addrs(self, if_name: str):
+        with self.__condition:
+            state = self.__get_by_name(if_name)
+            return [addr for addr, _ in state.ipv4_addrs] if state else []
+
+    def get_ipv4_addr_events(self, if_name: str):
+        """Returns the number of RTM_NEWADDR received for an interface, see wait_for_ipv4_addr."""
+        with self.__condition:
+            return self.__get_ipv4_addr_events(if_name)
+
+    def wait_for_ipv4_addr(self, if_name: str, timeout: float, events: int):
+        """Waits until an IPv4 address is added or renewed on an interface, woken up by the netlink events.
+
+        Parameters
+        ----------
+        events : int
+            get_ipv4_addr_events() before the address is requested, the addresses present then are ignored.
+
+        Returns
+        -------
+        str
+            The address of the last RTM_NEWADDR after events, None if there is none after timeout.
+        """
+        with self.__condition:
+            if not self.__condition.wait_for(lambda: self.__get_ipv4_addr_events(if_name) > events, timeout):
+                return None
+            return self.__get_by_name(if_name).last_ipv4_addr
+
+    def __get_ipv4_addr_events(self, if_name: str):
+        state = self.__get_by_name(if_name)
+        return state.ipv4_addr_events if state else 0
+
+
+netlink_monitor = NetlinkMonitor()
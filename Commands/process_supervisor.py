@@ -0,0 +1,260 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Supervisor for the daemons (hostapd, wpa_supplicant) launched by the control app.
+
+The daemons are started in the foreground as children of the control app so that
+their liveness and exit status are known without forking pidof/killall.
+"""
+import os
+import select
+import signal
+import subprocess
+import threading
+import time
+from Commands.dut_logger import DutLogger, LogCategory
+
+HOSTAPD = "hostapd"
+WPA_SUPPLICANT = "wpa_supplicant"
+
+# Bounded wait after SIGTERM before the daemon is killed with SIGKILL
+DEFAULT_STOP_TIMEOUT = 3.0
+# Bounded wait for the control interface of a started daemon to show up
+DEFAULT_READY_TIMEOUT = 3.0
+READY_POLL_INTERVAL = 0.01
+
+
+class ManagedProcess:
+    """A daemon started and owned by the ProcessSupervisor."""
+
+    def __init__(self, name: str, args: list, popen: subprocess.Popen):
+        self.name = name
+        self.args = args
+        self.popen = popen
+        self.pid = popen.pid
+        self.start_time = time.monotonic()
+        self.exit_status = None
+        self.pidfd = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                self.pidfd = os.pidfd_open(self.pid)
+            except OSError:
+                # Kernel older than 5.3, fall back to plain pid handling
+                self.pidfd = None
+
+    def poll(self):
+        """Reaps the process if it has exited. Uses waitpid(WNOHANG), nothing is spawned.
+
+        Returns
+        -------
+        int
+            Exit status of the process, None if it is still running.
+        """
+        if self.exit_status is None:
+            status = self.popen.poll()
+            if status is not None:
+                self.__set_exited(status)
+        return self.exit_status
+
+    def is_alive(self):
+        return self.poll() is None
+
+    def send_signal(self, sig):
+        """Sends a signal through the pidfd when available so that a recycled pid is never hit."""
+        if not self.is_alive():
+            return
+        try:
+            if self.pidfd is not None:
+                signal.pidfd_send_signal(self.pidfd, sig)
+            else:
+                self.popen.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+    def wait(self, timeout: float):
+        """Waits at most timeout seconds for the process to exit.
+
+        Returns
+        -------
+        int
+            Exit status of the process, None if it is still running after timeout.
+        """
+        if self.poll() is not None:
+            return self.exit_status
+        if self.pidfd is not None:
+            # pidfd becomes readable as soon as the process exits
+            poller = select.poll()
+            poller.register(self.pidfd, select.POLLIN)
+            poller.poll(max(timeout, 0) * 1000)
+            return self.poll()
+        try:
+            self.__set_exited(self.popen.wait(timeout))
+        except subprocess.TimeoutExpired:
+            pass
+        return self.exit_status
+
+    def __set_exited(self, status):
+        self.exit_status = status
+        if self.pidfd is not None:
+            os.close(self.pidfd)
+            self.pidfd = None
+        DutLogger.log(LogCategory.DEBUG, "{} (pid {}) exited with status {}".format(self.name, self.pid, status))
+
+
+class ProcessSupervisor:
+    """Launches, tracks and stops the daemons used by the control app."""
+
+    def __init__(self):
+        self.__processes = {}
+        self.__strays_reaped = set()
+        self.__lock = threading.Lock()
+
+    def start(self, name: str, args: list, output_file: str = None, stale_paths: list = None):
+        """Starts a daemon in the foreground as a managed child, stopping any previous instance.
+
+        Parameters
+        ----------
+        name : str
+            Name used to refer to the daemon
+        args : list
+            Command line of the daemon, it must not daemonize itself (no -B)
+        output_file : str, optional
+            File where stdout/stderr of the daemon are appended, discarded if None
+        stale_paths : list, optional
+            Control interface sockets left behind by a previous instance, removed before the start
+
+        Returns
+        -------
+        ManagedProcess
+            The started process, None if it could not be launched.
+        """
+        self.stop(name)
+        for path in stale_paths or []:
+            if os.path.exists(path):
+                try:
+                    os.unlink(path)
+                except OSError as err:
+                    DutLogger.log(LogCategory.ERROR, "Unable to remove stale socket {}: {}".format(path, err))
+        DutLogger.log(LogCategory.DEBUG, "Starting managed process: " + " ".join(args))
+        output = None
+        try:
+            output = open(output_file, "a") if output_file else subprocess.DEVNULL
+            popen = subprocess.Popen(
+                args,
+                stdin=subprocess.DEVNULL,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        except OSError as err:
+            DutLogger.log(LogCategory.ERROR, "Unable to start {}: {}".format(name, err))
+            return None
+        finally:
+            if output_file and output:
+                output.close()
+        process = ManagedProcess(name, args, popen)
+        with self.__lock:
+            self.__processes[name] = process
+        return process
+
+    def stop(self, name: str, timeout: float = DEFAULT_STOP_TIMEOUT):
+        """Stops a managed daemon with SIGTERM, then SIGKILL if it is still alive after timeout.
+
+        Returns
+        -------
+        int
+            Exit status of the daemon, None if no daemon of that name was managed.
+        """
+        with self.__lock:
+            process = self.__processes.pop(name, None)
+        if process is None:
+            return None
+        if process.is_alive():
+            process.send_signal(signal.SIGTERM)
+            if process.wait(timeout) is None:
+                DutLogger.log(LogCategory.ERROR, "{} (pid {}) ignored SIGTERM, killing it".format(name, process.pid))
+                process.send_signal(signal.SIGKILL)
+                process.wait(timeout)
+        return process.exit_status
+
+    def stop_all(self, timeout: float = DEFAULT_STOP_TIMEOUT):
+        with self.__lock:
+            names = list(self.__processes)
+        for name in names:
+            self.stop(name, timeout)
+
+    def get(self, name: str):
+        with self.__lock:
+            return self.__processes.get(name)
+
+    def is_alive(self, name: str):
+        """Checks if the managed daemon is running without spawning any process."""
+        process = self.get(name)
+        return process is not None and process.is_alive()
+
+    def get_pid(self, name: str):
+        process = self.get(name)
+        if process is not None and process.is_alive():
+            return process.pid
+        return None
+
+    def get_exit_status(self, name: str):
+        process = self.get(name)
+        if process is None:
+            return None
+        return process.poll()
+
+    def wait_until_ready(self, name: str, ready_paths: list, timeout: float = DEFAULT_READY_TIMEOUT):
+        """Waits until all control interface sockets of a started daemon exist.
+
+        Returns early with False if the daemon exits in the meantime.
+
+        Returns
+        -------
+        bool
+            True if the daemon is running and all paths exist before timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if not self.is_alive(name):
+                DutLogger.log(LogCategory.ERROR, "{} exited during start up with status {}".format(
+                    name, self.get_exit_status(name)))
+                return False
+            if all(os.path.exists(path) for path in ready_paths):
+                return True
+            if time.monotonic() >= deadline:
+                DutLogger.log(LogCategory.ERROR, "{} is not ready after {} seconds".format(name, timeout))
+                return False
+            time.sleep(READY_POLL_INTERVAL)
+
+    def reap_strays(self, name: str, timeout: float = DEFAULT_STOP_TIMEOUT):
+        """Stops instances of a daemon that were not started by this supervisor.
+
+        Daemons may be left behind by a previous control app run or started manually.
+        This is only done once per daemon since every later instance is managed.
+        """
+        if name in self.__strays_reaped:
+            return
+        self.__strays_reaped.add(name)
+        DutLogger.log(LogCategory.DEBUG, "Stopping {} instances not started by the control app".format(name))
+        try:
+            # -w waits for the processes to die, bounded by timeout
+            subprocess.run(["killall", "-q", "-w", name], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as err:
+            DutLogger.log(LogCategory.ERROR, "Unable to stop stray {}: {}".format(name, err))
+
+
+process_supervisor = ProcessSupervisor()
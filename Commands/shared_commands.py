@@ -28,19 +28,27 @@ try:
 except ImportError:
     from .ap_command_helper import ApCommandHelper
 import shutil
-from loopBackClient.loop_back_client import LoopBackClient
+from loopBackClient.loop_back_client import LoopBackPrecision, LOOP_BACK_BUFFER_SIZE, MAX_LOOP_BACK_WORKERS, MAX_LOOP_BACK_CPU, MIN_FIFO_PRIORITY, MAX_FIFO_PRIORITY
+from loopBackClient.loop_back_sessions import loop_back_sessions
+from loopBackClient.loop_back_stats import SEQ_NUMBER
+from loopBackClient.traffic_generator import TrafficGenerator, MAX_PACKET_SIZE, MAX_DURATION
 from .dut_logger import DutLogger, LogCategory
+from .interface_prober import InterfaceProber
+from .bss_registry import bss_registry
+from .dut_capabilities import dut_capabilities
+from .process_supervisor import HOSTAPD, WPA_SUPPLICANT
+from .api_profiler import api_profiler
+from quicktrack_api_message.quicktrack_api_message import QuickTrackMessageType
 
-loop_back_client = None
+traffic_generator = None
 
 
 class GET_IP_ADDRESS(ApiInterface):
     def execute(self):
         """Method to execute and get the IP address ."""
 
-        std_out, _ = CommandHelper.get_all_interface_ip()
         interface_name = CommandHelper.get_interface_name()
-        if CommandHelper.BRIDGE_WLANS in std_out:
+        if CommandHelper.is_interface_present(CommandHelper.BRIDGE_WLANS):
             interface_name = CommandHelper.BRIDGE_WLANS
         if QuickTrackRequestTLV.ROLE in self.params:
             role = int(self.params[QuickTrackRequestTLV.ROLE])
@@ -87,67 +95,59 @@ class GET_MAC_ADDRESS(ApiInterface):
                 self.std_out = CommandHelper.get_p2p_mac_addr()
                 return
 
-            available_interface_names = CommandHelper.get_all_wlan_name()
-            for each_interface in available_interface_names:
-
-                if role == DutType.STAUT.value:
-                    interface_freq, interface_ssid, mac_addr = StaCommandHelper.get_sta_if_status(each_interface)
-                else:
-                    interface_freq, interface_ssid, mac_addr = ApCommandHelper.get_ap_if_status(each_interface)
-
-                if band and ssid:
-                    freq_verification_status = CommandHelper.verify_band_from_freq(
-                        interface_freq, band
-                    )
-                    if freq_verification_status:
-                        if ssid == interface_ssid:
-                            self.std_out = mac_addr
-                    else:
-                        self.std_err = "Unable to get mac address associated with the given band {}".format(
-                            band
-                        )
-                elif band:
-                    freq_verification_status = CommandHelper.verify_band_from_freq(
-                        interface_freq, band
-                    )
-                    if freq_verification_status:
-                        self.std_out = mac_addr
-                    else:
-                        self.std_err = "Unable to get mac address associated with the given band {}".format(
-                            band
-                        )
-                elif ssid:
-                    if ssid == interface_ssid:
-                        self.std_out = mac_addr
-                    else:
-                        self.std_err = "Unable to get mac address associated with the given ssid {}".format(
-                            ssid
-                        )
-                elif bss_identifier:
-                    identifier = (bss_identifier & 0xF0) >> 4
-                    band_bit = bss_identifier & 0x0F
-                    operational_band = None
-                    if band_bit == BssIdentifierBand._24GHz.value:
-                        operational_band = OperationalBand._24GHz.name
-                    elif band_bit == BssIdentifierBand._5GHz.value:
-                        operational_band = OperationalBand._5GHz.name
-                    elif band_bit == BssIdentifierBand._6GHz.value:
-                        operational_band = OperationalBand._6GHz.name
-                    freq_verification_status = CommandHelper.verify_band_from_freq(
-                        interface_freq, operational_band
-                    )
-                    interface_name = CommandHelper.get_interface_name(identifier)
-                    if each_interface == interface_name and freq_verification_status:
-                        self.std_out = mac_addr
-                    else:
-                        self.std_err = "Unable to get mac address associated with the given BSS Identifier {}".format(
-                            bss_identifier
-                        )
-                else:
-                    self.std_err = "Unable to get mac address as the required parameters to get the mac address is not passed."
+            if_names = CommandHelper.get_all_wlan_name()
+            if role == DutType.STAUT.value:
+                probe = StaCommandHelper.get_sta_if_status
+            else:
+                probe = ApCommandHelper.get_ap_if_status
+
+            # A status is (frequency, ssid, mac address)
+            if band and ssid:
+                def match(if_name, status):
+                    if CommandHelper.verify_band_from_freq(status[0], band) and ssid == status[1]:
+                        return status[2]
+                    return None
+                error = "Unable to get mac address associated with the given band {}".format(band)
+            elif band:
+                def match(if_name, status):
+                    return status[2] if CommandHelper.verify_band_from_freq(status[0], band) else None
+                error = "Unable to get mac address associated with the given band {}".format(band)
+            elif ssid:
+                def match(if_name, status):
+                    return status[2] if ssid == status[1] else None
+                error = "Unable to get mac address associated with the given ssid {}".format(ssid)
+            elif bss_identifier:
+                identifier = (bss_identifier & 0xF0) >> 4
+                band_bit = bss_identifier & 0x0F
+                operational_band = None
+                if band_bit == BssIdentifierBand._24GHz.value:
+                    operational_band = OperationalBand._24GHz.name
+                elif band_bit == BssIdentifierBand._5GHz.value:
+                    operational_band = OperationalBand._5GHz.name
+                elif band_bit == BssIdentifierBand._6GHz.value:
+                    operational_band = OperationalBand._6GHz.name
+                interface_name = CommandHelper.get_interface_name(identifier)
+                if_names = [interface_name]
+
+                def match(if_name, status):
+                    if if_name == interface_name and CommandHelper.verify_band_from_freq(status[0], operational_band):
+                        return status[2]
+                    return None
+                error = "Unable to get mac address associated with the given BSS Identifier {}".format(bss_identifier)
+            else:
+                self.std_err = "Unable to get mac address as the required parameters to get the mac address is not passed."
+                return
 
+            if role == DutType.APUT.value:
+                # BSSes recorded from hostapd status at AP_START_UP
+                _, self.std_out = bss_registry.find_bss(match)
                 if self.std_out:
-                    break
+                    return
+            # Probe the interfaces at the same time, the first match in interface order wins
+            _, self.std_out = InterfaceProber.probe_first(if_names, probe, match)
+            if not self.std_out:
+                self.std_out = None
+                self.std_err = error
 
     def get_return_status(self):
         """Returns the return status with the status code with following description.
@@ -167,6 +167,8 @@ class GET_MAC_ADDRESS(ApiInterface):
 
 
 class GET_CONTROL_APP_VERSION(ApiInterface):
+    uses_wireless_if = False
+
     def execute(self):
         """Method to execute and get the dut app version number."""
         self.std_out = "v1.0"
@@ -235,6 +237,7 @@ class DEVICE_RESET(ApiInterface):
     """ Class used to reset the device """
 
     def execute(self):
+        DEVICE_RESET.stop_data_path()
         role = self.params[QuickTrackRequestTLV.ROLE]
         role = int(role)
         interface_name = CommandHelper.get_interface_name()
@@ -254,6 +257,15 @@ class DEVICE_RESET(ApiInterface):
         elif role == DutType.P2PUT.value:
             StaCommandHelper.set_sta_debug_log_level(debug_log_level_enum)
 
+    @staticmethod
+    def stop_data_path():
+        """Stops the loopback servers and the traffic generator so that no thread or socket outlives the test."""
+        global traffic_generator
+        loop_back_sessions.stop_all()
+        if traffic_generator is not None:
+            traffic_generator.stop()
+            traffic_generator = None
+
     def get_return_status(self):
         if self.std_err is None:
             return ApiReturnStatus(0, "Device reset successfully")
@@ -267,6 +279,8 @@ class START_DHCP(ApiInterface):
             role = self.params[QuickTrackRequestTLV.ROLE]
             if int(role) == DutType.P2PUT.value:
                 if_name = CommandHelper.get_p2p_group_interface()
+            else:
+                if_name = CommandHelper.get_interface_name()
         else:
             self.std_err = "Missed TLV: ROLE"
             return
@@ -277,9 +291,28 @@ class START_DHCP(ApiInterface):
             CommandHelper.assign_static_ip(ip_addr, if_name)
             CommandHelper.start_dhcp_server(if_name, ip_addr)
         else:
+            timeout = None
+            if QuickTrackRequestTLV.DHCP_WAIT_TIMEOUT in self.params:
+                try:
+                    timeout = float(self.params[QuickTrackRequestTLV.DHCP_WAIT_TIMEOUT])
+                except ValueError:
+                    self.std_err = "Invalid DHCP_WAIT_TIMEOUT {}".format(self.params[QuickTrackRequestTLV.DHCP_WAIT_TIMEOUT])
+                    return
+                # A stale address or an earlier lease is not the address bound by this client
+                mark = CommandHelper.get_ip_addr_mark(if_name)
             CommandHelper.start_dhcp_client(if_name)
-        
+            if timeout is not None:
+                self.std_out = CommandHelper.wait_for_ip_addr(if_name, timeout, mark)
+                if self.std_out is None:
+                    self.std_err = "no IPv4 address on {} after {} s".format(if_name, timeout)
+
     def get_return_status(self):
+        if self.std_err is None and self.std_out is not None:
+            return ApiReturnStatus(
+                0,
+                "Start DHCP successfully",
+                {QuickTrackResponseTLV.DUT_WLAN_IP_ADD: self.std_out}
+            )
         if self.std_err is None:
             return ApiReturnStatus(0, "Start DHCP successfully")
         else:
@@ -355,69 +388,265 @@ class GET_WSC_CRED(ApiInterface):
 
 
 class START_LOOP_BACK_SERVER(ApiInterface):
-    """QuickTrack API for initializing the loopback server.
+    """QuickTrack API for initializing a loopback server.
     Creates a parser for echoing back loop back data to the test tool.
+    Several loopback servers can run at once, on different interfaces or ports.
     """
 
     def execute(self):
-        global loop_back_client
         tlv_dict = self.params
 
-        interface_name = None
-        std_out, _ = CommandHelper.get_all_interface_ip()
-        if CommandHelper.BRIDGE_WLANS in std_out:
-            dutIpAddress = CommandHelper.get_if_ip_addr(CommandHelper.BRIDGE_WLANS)
-            if dutIpAddress is not None:
-                interface_name = CommandHelper.BRIDGE_WLANS
-        p2p_group_if = CommandHelper.get_p2p_group_interface()
-        if p2p_group_if:
-            dutIpAddress = CommandHelper.get_if_ip_addr(p2p_group_if)
-            if dutIpAddress is not None:
-                interface_name = p2p_group_if
-        if interface_name is None:
-            interface_name = CommandHelper.get_interface_name()
+        if QuickTrackRequestTLV.INTERFACE_NAME in tlv_dict:
+            interface_name = tlv_dict[QuickTrackRequestTLV.INTERFACE_NAME]
             dutIpAddress = CommandHelper.get_if_ip_addr(interface_name)
-        DutLogger.log(LogCategory.INFO, "Use interface {} for Loopback test".format(interface_name))
- 
-        if dutIpAddress is not None:
-            loop_back_client = LoopBackClient(
-                dutIpAddress, 0
-            )
-            if loop_back_client is None:
-                self.std_err = "Failed to initialise loop back server"
-            return loop_back_client
         else:
-            return ApiReturnStatus(1, "Failed to initialise loopback server")
+            interface_name, dutIpAddress = CommandHelper.get_data_interface()
+        DutLogger.log(LogCategory.INFO, "Use interface {} for Loopback test".format(interface_name))
+        if dutIpAddress is None:
+            self.std_err = "No IP address on {}".format(interface_name)
+            return
 
-    def get_return_status(self):
-        global loop_back_client
-        server_port = loop_back_client.get_port()
+        precision = None
+        # The 4-byte sequence number must fit in a datagram
+        seq_offset, self.std_err = self.get_numeric_param(
+            tlv_dict, QuickTrackRequestTLV.LOOP_BACK_SEQ_OFFSET, None, 0, LOOP_BACK_BUFFER_SIZE - SEQ_NUMBER.size)
+        if self.std_err is None:
+            enabled, self.std_err = self.get_numeric_param(tlv_dict, QuickTrackRequestTLV.LOOP_BACK_PRECISION, 0, 0, 1)
+        if self.std_err is None and enabled:
+            cpu, self.std_err = self.get_numeric_param(
+                tlv_dict, QuickTrackRequestTLV.LOOP_BACK_CPU, None, 0, MAX_LOOP_BACK_CPU)
+            if self.std_err is None:
+                fifo_priority, self.std_err = self.get_numeric_param(
+                    tlv_dict, QuickTrackRequestTLV.LOOP_BACK_FIFO_PRIORITY, None, MIN_FIFO_PRIORITY, MAX_FIFO_PRIORITY)
+            if self.std_err is None:
+                precision = LoopBackPrecision(cpu, fifo_priority)
+        if self.std_err is None:
+            port, self.std_err = self.get_numeric_param(tlv_dict, QuickTrackRequestTLV.LOOP_BACK_PORT, 0, 0, 65535)
+        if self.std_err is None:
+            workers, self.std_err = self.get_numeric_param(
+                tlv_dict, QuickTrackRequestTLV.LOOP_BACK_WORKERS, 1, 1, MAX_LOOP_BACK_WORKERS)
+        if self.std_err is not None:
+            return
+        loop_back_client, self.std_err = loop_back_sessions.start(
+            interface_name,
+            dutIpAddress,
+            port,
+            workers=workers,
+            seq_offset=seq_offset,
+            precision=precision
+        )
+        if loop_back_client is not None:
+            self.std_out = loop_back_client.get_port()
 
-        if self.std_err is not None or server_port == 0:
-            return ApiReturnStatus(1, "Failed to initialise loop back server")
+    def get_return_status(self):
+        if self.std_err is not None:
+            return ApiReturnStatus(1, "Failed to initialise loop back server: {}".format(self.std_err))
         else:
             return ApiReturnStatus(
                 0,
                 "Loop back server initialized",
-                {QuickTrackResponseTLV.LOOP_BACK_SERVER_PORT: server_port}
+                {QuickTrackResponseTLV.LOOP_BACK_SERVER_PORT: self.std_out}
             )
 
 class STOP_LOOP_BACK_SERVER(ApiInterface):
-    """QuickTrack API for stopping the loopback server
+    """QuickTrack API for stopping the loopback servers selected by INTERFACE_NAME and/or LOOP_BACK_PORT,
+    all of them by default. Returns the statistics of the stopped servers.
     """
 
     def execute(self):
-        global loop_back_client
-        if loop_back_client is not None:
-            loop_back_client.close()
-            return True
+        if_name, port, self.std_err = GET_LOOP_BACK_STATS.get_session_filter(self.params)
+        if self.std_err is not None:
+            return
+        stopped = loop_back_sessions.stop(if_name, port)
+        if stopped:
+            self.std_out = GET_LOOP_BACK_STATS.get_stats_tlvs(stopped)
+
+    def get_return_status(self):
+        if self.std_err is not None:
+            return ApiReturnStatus(1, str(self.std_err))
+        elif self.std_out is not None:
+            return ApiReturnStatus(0, "Loop back server terminated successfully", self.std_out)
         else:
-            return False
+            return ApiReturnStatus(0, "Loopback server in idle state")
+
+
+class GET_LOOP_BACK_STATS(ApiInterface):
+    """QuickTrack API for getting the counters and statistics of the running loopback servers
+    selected by INTERFACE_NAME and/or LOOP_BACK_PORT, summed over all of them by default.
+    """
+
+    def execute(self):
+        if_name, port, self.std_err = GET_LOOP_BACK_STATS.get_session_filter(self.params)
+        if self.std_err is not None:
+            return
+        sessions = loop_back_sessions.find(if_name, port)
+        if sessions:
+            self.std_out = GET_LOOP_BACK_STATS.get_stats_tlvs(sessions)
+
+    @staticmethod
+    def get_session_filter(tlv_dict):
+        """Returns (interface name, port, error) selecting loopback sessions, None for any."""
+        if not tlv_dict:
+            return None, None, None
+        port, err = ApiInterface.get_numeric_param(tlv_dict, QuickTrackRequestTLV.LOOP_BACK_PORT, None, 0, 65535)
+        return tlv_dict.get(QuickTrackRequestTLV.INTERFACE_NAME), port, err
+
+    @staticmethod
+    def get_stats_tlvs(sessions):
+        """Returns the statistics of loopback sessions as response TLVs, each one fitting in 255 bytes."""
+        stats = loop_back_sessions.get_stats(sessions)
+        totals = stats.get_totals()
+        tlvs = {QuickTrackResponseTLV.LOOP_BACK_COUNTERS: stats.format_counters(totals)}
+        values = (
+            (QuickTrackResponseTLV.LOOP_BACK_SEQ_STATS, stats.format_sequence(totals)),
+            (QuickTrackResponseTLV.LOOP_BACK_INTERARRIVAL, stats.format_histogram("interarrival", totals)),
+            (QuickTrackResponseTLV.LOOP_BACK_TURNAROUND, stats.format_histogram("turnaround", totals)),
+            (QuickTrackResponseTLV.LOOP_BACK_KERNEL_TURNAROUND, stats.format_histogram("kernel_turnaround", totals)),
+        )
+        for tlv, value in values:
+            if value is not None:
+                tlvs[tlv] = value
+        return tlvs
 
     def get_return_status(self):
-        global loop_back_client
-        if loop_back_client is not None:
-            loop_back_client = None
-            return ApiReturnStatus(0, "Loop back server terminated successfully")
+        if self.std_err is not None:
+            return ApiReturnStatus(1, str(self.std_err))
+        elif self.std_out is None:
+            return ApiReturnStatus(1, "Loopback server in idle state")
+        return ApiReturnStatus(0, "Loop back statistics", self.std_out)
+
+
+class START_TRAFFIC_GEN(ApiInterface):
+    """QuickTrack API for starting a UDP stream from the DUT to the test tool.
+    """
+
+    def execute(self):
+        global traffic_generator
+        if traffic_generator is not None and traffic_generator.is_running():
+            self.std_err = "Traffic generator already running"
+            return
+        for tlv in (QuickTrackRequestTLV.TRAFFIC_GEN_DEST_IP, QuickTrackRequestTLV.TRAFFIC_GEN_DEST_PORT,
+                    QuickTrackRequestTLV.TRAFFIC_GEN_RATE):
+            if tlv not in self.params:
+                self.std_err = "Missed TLV: {}".format(tlv.name)
+                return
+
+        dest_port, self.std_err = self.get_numeric_param(
+            self.params, QuickTrackRequestTLV.TRAFFIC_GEN_DEST_PORT, minimum=1, maximum=65535)
+        if self.std_err is None:
+            rate, self.std_err = self.get_numeric_param(self.params, QuickTrackRequestTLV.TRAFFIC_GEN_RATE, minimum=1)
+        if self.std_err is None:
+            packet_size, self.std_err = self.get_numeric_param(
+                self.params, QuickTrackRequestTLV.TRAFFIC_GEN_PACKET_SIZE, 1000, 1, MAX_PACKET_SIZE)
+        if self.std_err is None:
+            duration, self.std_err = self.get_numeric_param(
+                self.params, QuickTrackRequestTLV.TRAFFIC_GEN_DURATION, 0, 0, MAX_DURATION, float)
+        if self.std_err is not None:
+            return
+
+        interface_name, dutIpAddress = CommandHelper.get_data_interface()
+        if dutIpAddress is None:
+            self.std_err = "No IP address on {}".format(interface_name)
+            return
+        DutLogger.log(LogCategory.INFO, "Use interface {} for the traffic generator".format(interface_name))
+        try:
+            traffic_generator = TrafficGenerator(
+                dutIpAddress,
+                self.params[QuickTrackRequestTLV.TRAFFIC_GEN_DEST_IP],
+                dest_port,
+                rate,
+                packet_size,
+                duration
+            )
+        except (OSError, ValueError) as err:
+            self.std_err = str(err)
+            return
+        traffic_generator.start()
+
+    def get_return_status(self):
+        if self.std_err is not None:
+            return ApiReturnStatus(1, "Failed to start the traffic generator: {}".format(self.std_err))
+        return ApiReturnStatus(0, "Traffic generator started")
+
+
+class STOP_TRAFFIC_GEN(ApiInterface):
+    """QuickTrack API for stopping the DUT UDP stream, returns its counters and achieved rate.
+    """
+
+    def execute(self):
+        global traffic_generator
+        if traffic_generator is not None:
+            traffic_generator.stop()
+            self.std_out = traffic_generator.format_stats()
+            traffic_generator = None
+
+    def get_return_status(self):
+        if self.std_out is None:
+            return ApiReturnStatus(0, "Traffic generator in idle state")
+        return ApiReturnStatus(
+            0,
+            "Traffic generator stopped",
+            {QuickTrackResponseTLV.TRAFFIC_GEN_STATS: self.std_out}
+        )
+
+
+class GET_DUT_CAPABILITIES(ApiInterface):
+    """QuickTrack API for getting the versions and paths of hostapd/wpa_supplicant, the control interface
+    commands not found in their binaries and the capabilities of the wireless phys, probed once and cached.
+    """
+    uses_wireless_if = False
+
+    def execute(self):
+        self.std_out = {
+            QuickTrackResponseTLV.DUT_HOSTAPD: dut_capabilities.truncate(dut_capabilities.get_daemon(HOSTAPD).format()),
+            QuickTrackResponseTLV.DUT_WPA_SUPPLICANT: dut_capabilities.truncate(dut_capabilities.get_daemon(WPA_SUPPLICANT).format()),
+            QuickTrackResponseTLV.DUT_PHY_CAPABILITIES: dut_capabilities.format_phys(),
+            QuickTrackResponseTLV.DUT_UNKNOWN_CTRL_COMMANDS: dut_capabilities.format_unknown_ctrl_commands(),
+        }
+
+    def get_return_status(self):
+        return ApiReturnStatus(0, "DUT capabilities", self.std_out)
+
+
+class GET_PROFILE(ApiInterface):
+    """QuickTrack API for selecting the message types profiled on every invocation and getting
+    the summary of a stored profile.
+    """
+    uses_wireless_if = False
+
+    def execute(self):
+        if QuickTrackRequestTLV.PROFILE_MESSAGE_TYPES in self.params:
+            message_types = self.params[QuickTrackRequestTLV.PROFILE_MESSAGE_TYPES]
+            unknown = [name for name in message_types.split(",")
+                       if name.strip() and name.strip().upper() not in QuickTrackMessageType.__members__]
+            if unknown:
+                self.std_err = "Unknown message types: {}".format(",".join(unknown))
+                return
+            api_profiler.set_message_types(message_types)
+        self.std_out = {
+            QuickTrackResponseTLV.PROFILED_MESSAGE_TYPES: ",".join(api_profiler.get_message_types()),
+        }
+
+        name = self.params.get(QuickTrackRequestTLV.PROFILE_NAME)
+        if name in QuickTrackMessageType.__members__:
+            names = api_profiler.get_profile_names(name)
+        elif name:
+            names = [name] if name in api_profiler.get_profile_names() else []
         else:
-            return ApiReturnStatus(0, "Loopback server in idle state")
\ No newline at end of file
+            names = api_profiler.get_profile_names()
+        if not names:
+            if name:
+                self.std_err = "No profile {}".format(name)
+            return
+        self.std_out.update({
+            QuickTrackResponseTLV.PROFILE_PATH: api_profiler.get_profile_path(names[-1]),
+            QuickTrackResponseTLV.PROFILE_SUMMARY: api_profiler.format_summary(names[-1]),
+            QuickTrackResponseTLV.PROFILE_HOT_STACK: api_profiler.format_hottest_stack(names[-1]),
+        })
+
+    def get_return_status(self):
+        if self.std_err:
+            return ApiReturnStatus(1, self.std_err)
+        if QuickTrackResponseTLV.PROFILE_PATH not in self.std_out:
+            return ApiReturnStatus(0, "No profile stored", self.std_out)
+        return ApiReturnStatus(0, "Profile summary", self.std_out)
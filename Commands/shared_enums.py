@@ -51,6 +51,14 @@ class BssIdentifierBand(Enum):
     _5GHz = 1
     _6GHz = 2
 
+class HostapdReconfigPath(Enum):
+    """Enum class that defines how a new hostapd configuration is applied, from cheapest to most expensive"""
+
+    SET = "SET"
+    UPDATE_BEACON = "SET+UPDATE_BEACON"
+    RELOAD = "SET+RELOAD"
+    RESTART = "restart"
+
 class DebugLogLevel(Enum):
     DISABLE = 0
     BASIC = 1
@@ -66,6 +74,10 @@ class DebugLogLevel(Enum):
             return DebugLogLevel.ADVANCED
 
 
+# {OperationalBand: (channels, frequencies)} of ChannelFreqConfig
+_channel_freq_cache = {}
+
+
 class ChannelFreqConfig(Enum):
     """Each configuration enum stores a tuple of channel and its corresponding frequency that will be used to house it."""
 
@@ -112,24 +124,25 @@ class ChannelFreqConfig(Enum):
     @staticmethod
     def get_24G_channels_frequencies():
         """Returns the list of supported channels in 2.4GHZ operational band"""
-        _24G_channels = []
-        _24G_frequencies = []
-        for each_channel_config in ChannelFreqConfig:
-            if int(each_channel_config.value[1]) < 5000:
-                _24G_channels.append(each_channel_config.value[0])
-                _24G_frequencies.append(each_channel_config.value[1])
-        return _24G_channels, _24G_frequencies
+        return ChannelFreqConfig.__get_band_channels_frequencies(OperationalBand._24GHz)
 
     @staticmethod
     def get_5G_channels_frequencies():
         """Returns the list of supported channels in 5GHZ operational band"""
-        _5G_channels = []
-        _5G_frequencies = []
-        for each_channel_config in ChannelFreqConfig:
-            if int(each_channel_config.value[1]) > 5000:
-                _5G_channels.append(each_channel_config.value[0])
-                _5G_frequencies.append(each_channel_config.value[1])
-        return _5G_channels, _5G_frequencies
+        return ChannelFreqConfig.__get_band_channels_frequencies(OperationalBand._5GHz)
+
+    @staticmethod
+    def __get_band_channels_frequencies(band):
+        """Returns the channels and frequencies of a band, computed once."""
+        if not _channel_freq_cache:
+            for each_band in (OperationalBand._24GHz, OperationalBand._5GHz):
+                _channel_freq_cache[each_band] = ([], [])
+            for each_channel_config in ChannelFreqConfig:
+                each_band = OperationalBand._24GHz if int(each_channel_config.value[1]) < 5000 else OperationalBand._5GHz
+                _channel_freq_cache[each_band][0].append(each_channel_config.value[0])
+                _channel_freq_cache[each_band][1].append(each_channel_config.value[1])
+        channels, frequencies = _channel_freq_cache[band]
+        return list(channels), list(frequencies)
 
 class QuickTrackRequestTLV(int, Enum):
     """List of parameters names that are used in the QuickTrack API request message and
@@ -240,6 +253,66 @@ class QuickTrackRequestTLV(int, Enum):
     PERSISTENT = 0x00d2
     WSC_CONFIG_ONLY = 0x00d3
 
+    ## @brief Number of loopback echo workers sharing the loopback server port (SO_REUSEPORT)
+    #  @note TLV Length: Variable, Value: Numeric value, 1 by default
+    LOOP_BACK_WORKERS = 0x00d4
+
+    ## @brief Offset in the loopback payload of the 32-bit big-endian sequence number of the test tool header
+    #  @note TLV Length: Variable, Value: Numeric value, no sequence number inspection if absent
+    LOOP_BACK_SEQ_OFFSET = 0x00d5
+
+    ## @brief Destination IPv4 address of the DUT traffic generator stream
+    #  @note TLV Length: Variable, Value: String - ex: 192.168.1.2
+    TRAFFIC_GEN_DEST_IP = 0x00d6
+
+    ## @brief Destination UDP port of the DUT traffic generator stream
+    #  @note TLV Length: Variable, Value: Numeric value
+    TRAFFIC_GEN_DEST_PORT = 0x00d7
+
+    ## @brief Rate of the DUT traffic generator stream, in kbit/s of UDP payload
+    #  @note TLV Length: Variable, Value: Numeric value
+    TRAFFIC_GEN_RATE = 0x00d8
+
+    ## @brief UDP payload size of the DUT traffic generator datagrams, in bytes (12 to 65507)
+    #  @note TLV Length: Variable, Value: Numeric value, 1000 by default
+    TRAFFIC_GEN_PACKET_SIZE = 0x00d9
+
+    ## @brief Duration of the DUT traffic generator stream, in seconds
+    #  @note TLV Length: Variable, Value: Numeric value, 0 (until STOP_TRAFFIC_GEN) by default
+    TRAFFIC_GEN_DURATION = 0x00da
+
+    ## @brief UDP port of a loopback server, to start it on that port or to select it
+    #  @note TLV Length: Variable, Value: Numeric value
+    LOOP_BACK_PORT = 0x00db
+
+    ## @brief Loopback precision mode: kernel receive timestamps and echo workers pinned to CPUs
+    #  @note TLV Length: 0x01, Value: 0 or 1
+    LOOP_BACK_PRECISION = 0x00dc
+
+    ## @brief CPU of the first loopback echo worker in precision mode, the next workers use the next CPUs
+    #  @note TLV Length: Variable, Value: Numeric value, the last CPU by default
+    LOOP_BACK_CPU = 0x00dd
+
+    ## @brief SCHED_FIFO priority of the loopback echo workers in precision mode
+    #  @note TLV Length: Variable, Value: Numeric value 1-99, not real-time by default
+    LOOP_BACK_FIFO_PRIORITY = 0x00de
+
+    ## @brief Time START_DHCP (client) waits for an IPv4 address on the interface, in seconds
+    #  @note TLV Length: Variable, Value: Numeric value, no wait if absent
+    DHCP_WAIT_TIMEOUT = 0x00df
+
+    ## @brief Profiles the handler of the message carrying it with cProfile, see GET_PROFILE
+    #  @note TLV Length: Variable, Value: Any, ex: 1
+    PROFILE = 0x00e0
+
+    ## @brief Message types profiled on every invocation, replaces the ones set with --profile
+    #  @note TLV Length: Variable, Value: String - comma separated message type names, ex: AP_START_UP,STA_ASSOCIATE. Empty to stop profiling
+    PROFILE_MESSAGE_TYPES = 0x00e1
+
+    ## @brief Stored profile returned by GET_PROFILE
+    #  @note TLV Length: Variable, Value: String - profile name or message type name for its latest profile, the latest profile by default
+    PROFILE_NAME = 0x00e2
+
     ## @brief Defines the version number of the Available Specutrum Inquiry Request
     #  @note TLV Length: Variable, Value: Float - ex: 1.3
     VERSION_NUMBER = 0xB000
@@ -389,6 +462,62 @@ class QuickTrackResponseTLV(int, Enum):
     WSC_WPA_KEY_MGMT = 0xa00d
     WSC_WPA_PASSPHRASE = 0xa00e
 
+    ## @brief Packet counters of the loopback server, summed over its workers
+    #  @note TLV Length: Variable, Value: String - ex: rx_packets=10,rx_bytes=640,tx_packets=10,tx_bytes=640,tx_errors=0
+    LOOP_BACK_COUNTERS = 0xa00f
+
+    ## @brief Sequence number statistics of the loopback server
+    #  @note TLV Length: Variable, Value: String - ex: packets=100,lost=2,duplicates=0,reordered=1
+    LOOP_BACK_SEQ_STATS = 0xa010
+
+    ## @brief Inter-arrival time of the loopback datagrams, log2 histogram bucket bounds in microseconds
+    #  @note TLV Length: Variable, Value: String - ex: count=99,p50_us=16,p90_us=32,p99_us=128,max_us=512
+    LOOP_BACK_INTERARRIVAL = 0xa011
+
+    ## @brief Time from the receive to the echo of the loopback datagrams (DUT part of the round trip time)
+    #  @note TLV Length: Variable, Value: String - ex: count=100,p50_us=8,p90_us=16,p99_us=32,max_us=64
+    LOOP_BACK_TURNAROUND = 0xa012
+
+    ## @brief Time from the kernel receive (SO_TIMESTAMPNS) to the echo of the loopback datagrams, in precision mode
+    #  @note TLV Length: Variable, Value: String - ex: count=100,p50_us=16,p90_us=16,p99_us=32,max_us=128
+    LOOP_BACK_KERNEL_TURNAROUND = 0xa014
+
+    ## @brief Counters and achieved rate of the DUT traffic generator stream
+    #  @note TLV Length: Variable, Value: String - ex: tx_packets=1250,tx_bytes=1250000,tx_errors=0,duration_ms=1000,rate_kbps=9998,rate_pps=1249
+    TRAFFIC_GEN_STATS = 0xa013
+
+    ## @brief Version and path of the hostapd binary
+    #  @note TLV Length: Variable, Value: String - ex: version=2.10-devel,path=/usr/local/bin/WFA-Hostapd-Supplicant/hostapd
+    DUT_HOSTAPD = 0xa015
+
+    ## @brief Version and path of the wpa_supplicant binary
+    #  @note TLV Length: Variable, Value: String - ex: version=2.10-devel,path=/usr/local/bin/WFA-Hostapd-Supplicant/wpa_supplicant
+    DUT_WPA_SUPPLICANT = 0xa016
+
+    ## @brief Bands, interface modes and HT/VHT/HE/EHT support of each wireless phy
+    #  @note TLV Length: Variable, Value: String - ex: phy0:bands=2.4/5/6,modes=managed/AP/P2P-client/P2P-GO,ht=1,vht=1,he=1,eht=0
+    DUT_PHY_CAPABILITIES = 0xa017
+
+    ## @brief Control interface commands used by the control app that were not found in the string table of the binaries, their support is unknown
+    #  @note TLV Length: Variable, Value: String - ex: hostapd:none;wpa_supplicant:P2P_FIND/P2P_LISTEN
+    DUT_UNKNOWN_CTRL_COMMANDS = 0xa018
+
+    ## @brief Path of the pstats dump of the returned profile, its collapsed stacks are in the .folded file next to it
+    #  @note TLV Length: Variable, Value: String - ex: /var/log/dut_control_app_profiles/20260101T120000_AP_START_UP_12.prof
+    PROFILE_PATH = 0xa019
+
+    ## @brief Total time, number of calls and functions with the highest cumulative time (ms) of the returned profile
+    #  @note TLV Length: Variable, Value: String - ex: total_ms=812,calls=10512,top=ap_command_helper.py:120:start_hostapd/640
+    PROFILE_SUMMARY = 0xa01a
+
+    ## @brief Hottest collapsed stack of the returned profile with its self time in microseconds
+    #  @note TLV Length: Variable, Value: String - ex: app.py:94:<module>;...;<built-in method time.sleep> 600000
+    PROFILE_HOT_STACK = 0xa01b
+
+    ## @brief Message types profiled on every invocation
+    #  @note TLV Length: Variable, Value: String - ex: AP_START_UP,STA_ASSOCIATE
+    PROFILED_MESSAGE_TYPES = 0xa01c
+
     ## @brief Current operating frequency
     #  @note TLV Length: Variable, Value: Numeric value
     OPER_FREQ = 0xBC00
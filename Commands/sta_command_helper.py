@@ -20,6 +20,12 @@ except ImportError:
 from .shared_enums import DebugLogLevel, P2PConnType, WpsDeviceRole
 from .command_interpreter import CommandInterpreter
 from .command import Command
+from .process_supervisor import process_supervisor, WPA_SUPPLICANT
+from .config_fingerprint import config_fingerprints
+from .wpa_ctrl import ctrl_request
+from .wpa_supplicant_config import WpaSupplicantConfig
+from .dut_capabilities import dut_capabilities
+from .dut_environment import dut_path
 import os
 from datetime import datetime
 from Commands.dut_logger import DutLogger, LogCategory
@@ -28,8 +34,11 @@ from datetime import datetime
 command_interpreter_obj = CommandInterpreter()
 store_wpas_config_for_debug = False
 sta_debug_log_level = DebugLogLevel.DISABLE
-wpa_supplicant_log_folder_path = "/var/log/supplicant.log"
-wpa_supplicant_config_file = "/etc/wpa_supplicant/wpa_supplicant.conf"
+wpa_supplicant_log_folder_path = dut_path("/var/log/supplicant.log")
+wpa_supplicant_config_file = dut_path("/etc/wpa_supplicant/wpa_supplicant.conf")
+wpa_supplicant_binary_path = dut_path("/usr/local/bin/WFA-Hostapd-Supplicant/wpa_supplicant")
+wpa_supplicant_ctrl_interface_path = dut_path("/var/run/wpa_supplicant")
+dut_capabilities.set_binary_path(WPA_SUPPLICANT, wpa_supplicant_binary_path)
 # Default DUT GO intent value
 P2P_GO_INTENT = 7
 
@@ -38,6 +47,34 @@ wpa_config_header = (
     "update_config",
 )
 
+# {TLV config name: (network block parameter, quoted)}, names not listed are used as is, unquoted
+wpa_network_param_mapper = {
+    "sta_ssid": ("ssid", True),
+    "key_mgmt": ("key_mgmt", False),
+    "sta_wep_key0": ("wep_key0", False),
+    "wep_tx_keyidx": ("wep_tx_keyidx", False),
+    "group": ("group", False),
+    "psk": ("psk", True),
+    "proto": ("proto", False),
+    "sta_ieee80211w": ("ieee80211w", False),
+    "pairwise": ("pairwise", False),
+    "eap": ("eap", False),
+    "phase2": ("phase2", True),
+    "phase1": ("phase1", True),
+    "identity": ("identity", True),
+    "password": ("password", True),
+    "ca_cert": ("ca_cert", True),
+    "server_cert": ("ca_cert", True),
+    "private_key": ("private_key", True),
+    "client_cert": ("client_cert", True),
+    "domain_match": ("domain_match", True),
+    "domain_suffix_match": ("domain_suffix_match", True),
+    "pac_file": ("pac_file", True),
+    "sta_owe_group": ("owe_group", False),
+}
+# Last configuration written into the wpa_supplicant configuration file
+last_wpa_supplicant_config = None
+
 def get_server_cert_hash(pem_file):
     # These were generated with: openssl x509 -outform der -in $pemname | openssl dgst -sha256
     entries = {
@@ -64,117 +101,107 @@ class StaCommandHelper:
         Returns
         -------
         WPA Configuration"""
+        wpa_config = StaCommandHelper.build_wpa_supp_config(config_enums)
+        if merge_config_file:
+            wpa_config = StaCommandHelper.get_wpa_supp_config_model().merge(wpa_config)
+        return wpa_config.render()
 
-        wpa_supplicant_config = "ctrl_interface=/var/run/wpa_supplicant\nap_scan=1\npmf=1\n"
+    @staticmethod
+    def build_wpa_supp_config(config_enums: dict):
+        """Builds the wpa supplicant configuration model with one network block from TLVs.
 
-        for each_config_enum in config_enums:
-            if each_config_enum in wpa_config_header:
-                field_value = config_enums.get(each_config_enum)
-                if each_config_enum == "sta_sae_groups":
-                    wpa_supplicant_config += "sae_groups" + "=" + field_value + "\n"
-                else:
-                    wpa_supplicant_config += each_config_enum + "=" + field_value + "\n"
-
-        wpa_supplicant_config += "network={\n"
-        wpa_supplicant_config_mapper = {
-            "sta_ssid": True,
-            "key_mgmt": False,
-            "sta_wep_key0": False,
-            "wep_tx_keyidx": False,
-            "group": False,
-            "psk": True,
-            "proto": False,
-            "sta_ieee80211w": False,
-            "pairwise": False,
-            "eap": False,
-            "phase2": True,
-            "phase1": True,
-            "identity": True,
-            "password": True,
-            "ca_cert": True,
-            "server_cert": True,
-            "private_key": True,
-            "client_cert": True,
-            "domain_match": True,
-            "domain_suffix_match": True,
-            "pac_file": True,
-            "sta_owe_group": False,
-        }
-        ieee80211w_configured = False
-        transition_mode_enabled = False
-        owe_configured = False
-        sae_configured = False
+        Parameters
+        ----------
+        config_enums: dict
+            Configurations in TLVs
+
+        Returns
+        -------
+        WpaSupplicantConfig
+            The configuration.
+        """
+        wpa_config = StaCommandHelper.__get_base_wpa_supp_config()
+        wpa_config.set("pmf", "1")
+        StaCommandHelper.__set_global_params(wpa_config, config_enums)
+
+        network = wpa_config.add_network()
         for each_config_enum in config_enums:
             if each_config_enum and each_config_enum not in wpa_config_header:
-                quoted_string = wpa_supplicant_config_mapper.get(each_config_enum)
                 field_value = config_enums[each_config_enum]
-
-                if each_config_enum == "key_mgmt":
-                    if "WPA-PSK" in field_value and "SAE" in field_value:
-                        transition_mode_enabled = True
-                    if "OWE" in field_value:
-                        owe_configured = True
-                    if "SAE" in field_value:
-                        sae_configured = True
-                elif each_config_enum == "sta_ieee80211w":
-                    ieee80211w_configured = True
-
                 if each_config_enum == "ca_cert":
                     if "DEFAULT" in field_value:
                         field_value = '/etc/ssl/certs/ca-certificates.crt'
-
                 if each_config_enum == "server_cert":
                     field_value = get_server_cert_hash(field_value)
-
-                if quoted_string:
-                    field_value = '"' + field_value + '"'
                 # Mapping to correct wpa_supplicant config name
-                if each_config_enum == "sta_ssid":
-                    wpa_supplicant_config += "ssid" + "=" + field_value + "\n"
-                elif each_config_enum == "sta_wep_key0":
-                    wpa_supplicant_config += "wep_key0" + "=" + field_value + "\n"
-                elif each_config_enum == "server_cert":
-                    wpa_supplicant_config += "ca_cert" + "=" + field_value + "\n"
-                elif each_config_enum == "sta_owe_group":
-                    wpa_supplicant_config += "owe_group" + "=" + field_value + "\n"
-                elif each_config_enum == "sta_ieee80211w":
-                    wpa_supplicant_config += "ieee80211w" + "=" + field_value + "\n"
+                name, quoted = wpa_network_param_mapper.get(each_config_enum, (each_config_enum, False))
+                network.set(name, field_value, quoted)
+
+        if "sta_ieee80211w" not in config_enums:
+            key_mgmt = config_enums.get("key_mgmt", "")
+            if "WPA-PSK" in key_mgmt and "SAE" in key_mgmt:
+                network.set("ieee80211w", "1")
+            elif "OWE" in key_mgmt:
+                network.set("ieee80211w", "2")
+            elif "SAE" in key_mgmt:
+                network.set("ieee80211w", "2")
+        return wpa_config
+
+    @staticmethod
+    def __get_base_wpa_supp_config():
+        wpa_config = WpaSupplicantConfig()
+        wpa_config.set("ctrl_interface", wpa_supplicant_ctrl_interface_path)
+        wpa_config.set("ap_scan", "1")
+        return wpa_config
+
+    @staticmethod
+    def __set_global_params(wpa_config, config_enums: dict):
+        for each_config_enum in config_enums:
+            if each_config_enum in wpa_config_header:
+                if each_config_enum == "sta_sae_groups":
+                    wpa_config.set("sae_groups", config_enums[each_config_enum])
                 else:
-                    wpa_supplicant_config += each_config_enum + "=" + field_value + "\n"
+                    wpa_config.set(each_config_enum, config_enums[each_config_enum])
+
+    @staticmethod
+    def get_wpa_supp_config_model():
+        """Returns the last configuration written, parsed from the configuration file if there is none."""
+        global last_wpa_supplicant_config
+        if last_wpa_supplicant_config is None:
+            if os.path.exists(wpa_supplicant_config_file):
+                with open(wpa_supplicant_config_file, "r") as file_reader:
+                    last_wpa_supplicant_config = WpaSupplicantConfig.parse(file_reader.read())
+            else:
+                return WpaSupplicantConfig()
+        return last_wpa_supplicant_config
 
-        if not ieee80211w_configured:
-            if transition_mode_enabled:
-                wpa_supplicant_config += "ieee80211w=1\n"
-            elif owe_configured:
-                wpa_supplicant_config += "ieee80211w=2\n"
-            elif sae_configured:
-                wpa_supplicant_config += "ieee80211w=2\n"
+    @staticmethod
+    def write_wpa_supp_config(wpa_config):
+        """Writes a configuration into the wpa_supplicant configuration file and keeps it as last configuration.
 
-        if merge_config_file:
-            appended_supplicant_conf_str = ""
-            existing_conf = StaCommandHelper.get_existing_supplicant_conf()
-            wpa_supplicant_dict = StaCommandHelper.__convert_config_str_to_dict(config = wpa_supplicant_config)
-            for each_key in existing_conf:
-                if each_key not in wpa_supplicant_dict:
-                    wpa_supplicant_dict[each_key] = existing_conf[each_key]
-
-            for each_supplicant_conf in wpa_supplicant_dict:
-                appended_supplicant_conf_str += each_supplicant_conf + "=" + wpa_supplicant_dict[each_supplicant_conf] + "\n"
-            wpa_supplicant_config = appended_supplicant_conf_str.rstrip()
-        wpa_supplicant_config += "\n}"
+        Returns
+        -------
+        str
+            Content written.
+        """
+        global last_wpa_supplicant_config
+        wpa_supplicant_config = wpa_config.render()
+        with open(wpa_supplicant_config_file, "w+") as file:
+            file.write(wpa_supplicant_config)
+        last_wpa_supplicant_config = wpa_config
+        config_fingerprints.set_file_content(wpa_supplicant_config_file, wpa_supplicant_config)
         return wpa_supplicant_config
 
     @staticmethod
     def get_existing_supplicant_conf():
         """Returns the existing supplicant configuration that was previously configured."""
         existing_config = {}
-        if os.path.exists(wpa_supplicant_config_file):
-            with open(wpa_supplicant_config_file, "r") as file_reader:
-                lines_to_ignore = ["ap_scan", "network", "ctrl_interface"]
-                for each_line in file_reader:
-                    if "=" in each_line and not any(x in each_line for x in lines_to_ignore):
-                        key, val = each_line.split("=", 1)
-                        existing_config[key] = val.rstrip()
+        wpa_config = StaCommandHelper.get_wpa_supp_config_model()
+        for key, value in wpa_config.global_params.items():
+            if key not in ("ap_scan", "ctrl_interface"):
+                existing_config[key] = value
+        for network in wpa_config.networks:
+            existing_config.update(network.params)
         return existing_config
 
     @staticmethod
@@ -183,28 +210,11 @@ class StaCommandHelper:
         now = datetime.now()
         dt_string = now.isoformat()
         if os.path.exists(wpa_supplicant_config_file):
-            quicktrack_configs_folder = "/var/log/quicktrack_configs/"
+            quicktrack_configs_folder = dut_path("/var/log/quicktrack_configs/")
             if not os.path.exists(quicktrack_configs_folder):
                 CommandHelper.run_shell_command("sudo mkdir {}".format(quicktrack_configs_folder))
             CommandHelper.run_shell_command("sudo mv {} {}wpa_supplicant_{}.conf".format(wpa_supplicant_config_file, quicktrack_configs_folder, dt_string))
 
-    @staticmethod
-    def __convert_config_str_to_dict(config:str):
-        """Converting string into dictionary using dict comprehension
-
-        Parameters
-        ----------
-        config : [dict]
-            Converts the configuration from datatype string to dictionary.
-        """
-        config_temp_list = []
-        config_list = [each_config.split("=", 1) for each_config in config.split("\n")]
-        for each_config in config_list:
-            for each_key in each_config:
-                config_temp_list.append(each_key)
-        config_dict = dict(zip(*[iter(config_temp_list)]*2))
-        return config_dict
-
     @staticmethod
     def sta_configure(params: dict):
         """Method to configure the wpa supplicant.
@@ -217,11 +227,13 @@ class StaCommandHelper:
         merge_config_file : bool
             Flag to indicate if new supplicant config file has to be create or the new config has to be merged into existing file
         """
-        wpa_supplicant_config = StaCommandHelper.get_wpa_supp_config(params, False)
+        wpa_config = StaCommandHelper.build_wpa_supp_config(params)
 
         try:
-            with open(wpa_supplicant_config_file, "w+") as file:
-                file.write(wpa_supplicant_config)
+            previous_config = last_wpa_supplicant_config
+            StaCommandHelper.write_wpa_supp_config(wpa_config)
+            if previous_config is not None:
+                DutLogger.log(LogCategory.DEBUG, "wpa_supplicant configuration changes: {}".format(previous_config.diff(wpa_config)))
             if store_wpas_config_for_debug:
                 StaCommandHelper.__store_supplicant_config_for_debug(params)
             return "Wpa supplicant successfully configured.", None
@@ -234,13 +246,12 @@ class StaCommandHelper:
         "Method to store the wpa supplicant config file for debug purpose."
         now = datetime.now()
         dt_string = now.strftime("%d%m%Y_%H:%M:%S")
-        wpa_supplicant_files_path = "/etc/wpa_supplicant/wpa_supplicant_files"
+        wpa_supplicant_files_path = dut_path("/etc/wpa_supplicant/wpa_supplicant_files")
         if not os.path.exists(wpa_supplicant_files_path):
             os.mkdir(wpa_supplicant_files_path)
         try:
             with open(
-                "/etc/wpa_supplicant/wpa_supplicant_files/wpa_supplicant"
-                + str(dt_string),
+                os.path.join(wpa_supplicant_files_path, "wpa_supplicant" + str(dt_string)),
                 "w+",
             ) as file:
                 file.write(wpa_supplicant_config)
@@ -249,23 +260,76 @@ class StaCommandHelper:
 
     @staticmethod
     def sta_associate():
-        """Method to start the wpa_supplicant service."""
+        """Method to start the wpa_supplicant service.
+
+        With the fast path enabled, a wpa_supplicant running or parked with the exact same
+        configuration is reconfigured and reconnected instead of restarted.
+        """
         interface_name = CommandHelper.get_interface_name()
         #StaCommandHelper.store_test_artifcats = True
         log_level = StaCommandHelper.__get_sta_debug_log_level()
-        StaCommandHelper.clear_supplicant_logs()
 
+        start_command = StaCommandHelper.get_wpa_supplicant_start_command(interface_name, log_level)
+        start_hash = config_fingerprints.get_start_hash(start_command, [wpa_supplicant_config_file])
+        if config_fingerprints.matches(WPA_SUPPLICANT, start_hash, process_supervisor.get(WPA_SUPPLICANT)):
+            if StaCommandHelper.__resume_wpa_supplicant(interface_name):
+                config_fingerprints.unpark(WPA_SUPPLICANT)
+                return "wpa_supplicant reconnected (fast path: same configuration)", None
+            DutLogger.log(LogCategory.ERROR, "wpa_supplicant fast path check failed, restarting it")
+
+        StaCommandHelper.clear_supplicant_logs()
         CommandHelper.run_shell_command("sudo rfkill unblock wlan")
-        CommandHelper.run_shell_command("sudo killall wpa_supplicant")
-        CommandHelper.pause_execution(3)
+        StaCommandHelper.stop_wpa_supplicant()
 
-        supplicant_start_command = "sudo /usr/local/bin/WFA-Hostapd-Supplicant/wpa_supplicant -B -t -c {} -i {}".format(wpa_supplicant_config_file, interface_name)
-        if log_level:
-            supplicant_start_command += " {} -f {}".format(log_level, wpa_supplicant_log_folder_path)
-        CommandHelper.run_shell_command(supplicant_start_command)
+        if not StaCommandHelper.start_wpa_supplicant(interface_name, log_level):
+            return None, "Unable to start wpa_supplicant."
+        config_fingerprints.record(WPA_SUPPLICANT, start_hash, process_supervisor.get(WPA_SUPPLICANT))
 
         # Skip connection check as Tool will verify
-        return None
+        return None, None
+
+    @staticmethod
+    def __resume_wpa_supplicant(interface_name):
+        """Fast path: reloads the unchanged configuration and reconnects a parked wpa_supplicant.
+
+        Returns
+        -------
+        bool
+            True if wpa_supplicant answers PING and accepts RECONFIGURE and RECONNECT.
+        """
+        ctrl_path = StaCommandHelper.get_ctrl_interface_path(interface_name)
+        reply = ctrl_request(ctrl_path, "PING")
+        if reply is None or not reply.startswith("PONG"):
+            return False
+        for command in ("RECONFIGURE", "RECONNECT"):
+            reply = ctrl_request(ctrl_path, command)
+            if reply is None or not reply.startswith("OK"):
+                DutLogger.log(LogCategory.ERROR, "wpa_supplicant rejected {}: {}".format(command, reply))
+                return False
+        return True
+
+    @staticmethod
+    def __park_wpa_supplicant():
+        """Fast path: disconnects wpa_supplicant instead of stopping it.
+
+        Returns
+        -------
+        bool
+            True if wpa_supplicant is parked, False if it has to be stopped.
+        """
+        process = process_supervisor.get(WPA_SUPPLICANT)
+        if not config_fingerprints.enabled:
+            return False
+        if config_fingerprints.is_parked(WPA_SUPPLICANT, process):
+            return True
+        if not config_fingerprints.is_recorded(WPA_SUPPLICANT, process):
+            return False
+        reply = ctrl_request(StaCommandHelper.get_ctrl_interface_path(CommandHelper.get_interface_name()), "DISCONNECT")
+        if reply is None or not reply.startswith("OK"):
+            DutLogger.log(LogCategory.ERROR, "wpa_supplicant rejected DISCONNECT: {}".format(reply))
+            return False
+        config_fingerprints.park(WPA_SUPPLICANT)
+        return True
 
     @staticmethod
     def sta_disconnect():
@@ -276,18 +340,71 @@ class StaCommandHelper:
         interface_name : [str]
             [interface name on which the supplicant needs to be stopped.]
         """
-        std_out, std_err = CommandHelper.get_process_id("wpa_supplicant")
-        if std_out:
-            std_out, std_err = CommandHelper.run_shell_command(
-                "sudo killall wpa_supplicant"
-            )
+        if process_supervisor.is_alive(WPA_SUPPLICANT):
+            if StaCommandHelper.__park_wpa_supplicant():
+                return "wpa_supplicant is parked (fast path)", None
+            exit_status = StaCommandHelper.stop_wpa_supplicant()
             if StaCommandHelper.store_test_artifcats:
                 StaCommandHelper.store_supplicant_config()
                 #StaCommandHelper.__log_supplicant_logs()
                 StaCommandHelper.store_test_artifcats = False
-            return std_out, std_err
+            return "wpa_supplicant stopped with status {}".format(exit_status), None
         else:
-            return std_out, std_err
+            StaCommandHelper.stop_wpa_supplicant()
+            return "wpa_supplicant is not running", None
+
+    @staticmethod
+    def start_wpa_supplicant(interface_name, log_level=None, output_file=None):
+        """Starts wpa_supplicant as a managed process and waits for its control interface.
+
+        Parameters
+        ----------
+        interface_name : str
+            Interface wpa_supplicant is started on.
+        log_level : str, optional
+            Debug level option of wpa_supplicant, logs go to the supplicant log file if set.
+        output_file : str, optional
+            File where the output of wpa_supplicant is appended.
+
+        Returns
+        -------
+        bool
+            True if wpa_supplicant is running and its control interface is ready.
+        """
+        if not dut_capabilities.is_installed(WPA_SUPPLICANT):
+            DutLogger.log(LogCategory.ERROR, "wpa_supplicant is not installed: " + dut_capabilities.get_daemon(WPA_SUPPLICANT).format())
+            return False
+        supplicant_start_command = StaCommandHelper.get_wpa_supplicant_start_command(interface_name, log_level)
+        ctrl_paths = [StaCommandHelper.get_ctrl_interface_path(interface_name)]
+        if process_supervisor.start(WPA_SUPPLICANT, supplicant_start_command, output_file, ctrl_paths) is None:
+            return False
+        return process_supervisor.wait_until_ready(WPA_SUPPLICANT, ctrl_paths)
+
+    @staticmethod
+    def get_wpa_supplicant_start_command(interface_name, log_level=None):
+        """Returns the command line wpa_supplicant is started with."""
+        supplicant_start_command = [wpa_supplicant_binary_path, "-t", "-c", wpa_supplicant_config_file, "-i", interface_name]
+        if log_level:
+            supplicant_start_command += [log_level, "-f", wpa_supplicant_log_folder_path]
+        return supplicant_start_command
+
+    @staticmethod
+    def stop_wpa_supplicant():
+        """Stops the managed wpa_supplicant with a bounded wait, and once any wpa_supplicant not started by the app.
+
+        Returns
+        -------
+        int
+            Exit status of wpa_supplicant, None if it was not running.
+        """
+        config_fingerprints.forget(WPA_SUPPLICANT)
+        process_supervisor.reap_strays(WPA_SUPPLICANT)
+        return process_supervisor.stop(WPA_SUPPLICANT)
+
+    @staticmethod
+    def get_ctrl_interface_path(if_name):
+        """Returns the path of the wpa_supplicant control interface socket of an interface."""
+        return os.path.join(wpa_supplicant_ctrl_interface_path, if_name)
 
     @staticmethod
     def __log_supplicant_logs():
@@ -330,21 +447,22 @@ class StaCommandHelper:
         interface_name = CommandHelper.get_interface_name()
         log_level = StaCommandHelper.__get_sta_debug_log_level()
         try:
-            with open(wpa_supplicant_config_file, "w+") as file:
-                file.write(
-                    'ctrl_interface=/var/run/wpa_supplicant\nap_scan=1\nnetwork={\nssid="Scanning"\n}'
-                )
+            wpa_config = StaCommandHelper.__get_base_wpa_supp_config()
+            wpa_config.add_network().set("ssid", "Scanning", quoted=True)
+            StaCommandHelper.write_wpa_supp_config(wpa_config)
         except Exception as ex:
             return None, "Unable to configure wpa supplicant and trigger scan " + str(ex)
         if log_level:
-            CommandHelper.run_shell_command(
-                (
-                    "sudo /usr/local/bin/WFA-Hostapd-Supplicant/wpa_supplicant -B -t -c {} -i {} {} >> {}"
-                ).format(wpa_supplicant_config_file, interface_name, log_level, wpa_supplicant_log_folder_path)
-            )
+            supplicant_start_command = [wpa_supplicant_binary_path, "-t", "-c", wpa_supplicant_config_file, "-i", interface_name, log_level]
         else:
-            CommandHelper.run_shell_command("sudo /usr/local/bin/WFA-Hostapd-Supplicant/wpa_supplicant -B -t -c {} -i {} >> {}".format(wpa_supplicant_config_file, interface_name, wpa_supplicant_log_folder_path))
-        CommandHelper.pause_execution(1)
+            supplicant_start_command = [wpa_supplicant_binary_path, "-t", "-c", wpa_supplicant_config_file, "-i", interface_name]
+        ctrl_paths = [StaCommandHelper.get_ctrl_interface_path(interface_name)]
+        if not dut_capabilities.is_installed(WPA_SUPPLICANT):
+            return None, "wpa_supplicant is not installed: " + dut_capabilities.get_daemon(WPA_SUPPLICANT).format()
+        if process_supervisor.start(WPA_SUPPLICANT, supplicant_start_command, wpa_supplicant_log_folder_path, ctrl_paths) is None:
+            return None, "Unable to start wpa_supplicant to trigger scan"
+        if not process_supervisor.wait_until_ready(WPA_SUPPLICANT, ctrl_paths):
+            return None, "wpa_supplicant control interface is not ready"
 
         std_out, std_err = CommandHelper.run_shell_command(
             ("sudo wpa_cli -i {} scan").format(interface_name)
@@ -376,24 +494,20 @@ class StaCommandHelper:
         StaCommandHelper.clear_supplicant_logs()
 
         CommandHelper.run_shell_command("sudo rfkill unblock wlan")
-        CommandHelper.run_shell_command("sudo killall wpa_supplicant")
-        CommandHelper.pause_execution(3)
+        StaCommandHelper.stop_wpa_supplicant()
 
         try:
-            with open(wpa_supplicant_config_file, "w+") as file:
-                p2p_config = "ctrl_interface=/var/run/wpa_supplicant\n"
-                p2p_config += "device_name=WFA P2P Device\n"
-                p2p_config += "device_type=1-0050F204-1\n"
-                p2p_config += "config_methods=keypad display push_button\n"
-                file.write(p2p_config)
+            wpa_config = WpaSupplicantConfig()
+            wpa_config.set("ctrl_interface", wpa_supplicant_ctrl_interface_path)
+            wpa_config.set("device_name", "WFA P2P Device")
+            wpa_config.set("device_type", "1-0050F204-1")
+            wpa_config.set("config_methods", "keypad display push_button")
+            StaCommandHelper.write_wpa_supp_config(wpa_config)
         except Exception as ex:
             return None, "Unable to configure wpa supplicant " + str(ex)
 
-        supplicant_start_command = "sudo /usr/local/bin/WFA-Hostapd-Supplicant/wpa_supplicant -B -t -c {} -i {}".format(wpa_supplicant_config_file, interface_name)
-        if log_level:
-            supplicant_start_command += " {} -f {}".format(log_level, wpa_supplicant_log_folder_path)
-        CommandHelper.run_shell_command(supplicant_start_command)
-        CommandHelper.pause_execution(2)
+        if not StaCommandHelper.start_wpa_supplicant(interface_name, log_level):
+            return "Unable to start wpa_supplicant."
 
         return None
     
@@ -415,7 +529,7 @@ class StaCommandHelper:
     @staticmethod
     def send_sta_anqp_query(bssid, id_param):
         # DUT needs to handle the supplicant for sending ANQP query during pre-association
-        pid, _ = CommandHelper.get_process_id("wpa_supplicant")
+        pid = process_supervisor.get_pid(WPA_SUPPLICANT)
         if pid:
             DutLogger.log(LogCategory.DEBUG, "wpa_supplicant is alive, pid={}".format(pid))
         else:
@@ -646,17 +760,14 @@ class StaCommandHelper:
         StaCommandHelper.clear_supplicant_logs()
 
         CommandHelper.run_shell_command("sudo rfkill unblock wlan")
-        CommandHelper.run_shell_command("sudo killall wpa_supplicant")
-        CommandHelper.pause_execution(3)
+        StaCommandHelper.stop_wpa_supplicant()
+
+        wpa_config = StaCommandHelper.__get_base_wpa_supp_config()
+        wpa_config.set("pmf", "1")
 
-        wpa_supplicant_config = "ctrl_interface=/var/run/wpa_supplicant\nap_scan=1\npmf=1\n"
- 
         # Global settings
-        for each_config_enum in config_enums:
-            if each_config_enum in wpa_config_header:
-                field_value = config_enums.get(each_config_enum)
-                wpa_supplicant_config += each_config_enum + "=" + field_value + "\n"
-        
+        StaCommandHelper.__set_global_params(wpa_config, config_enums)
+
         # WPS settings
         wps_enable = config_enums.get("wps_enable")
         if wps_enable is None:
@@ -672,18 +783,15 @@ class StaCommandHelper:
             elif wps_enable == "1":
                 # Enable Normal
                 for cfg_item in wps_setting:
-                    wpa_supplicant_config += cfg_item[0] + "=" + cfg_item[1] + "\n"
+                    wpa_config.set(cfg_item[0], cfg_item[1])
             else:
                 error = "Invalid WPS TLV value: {}".format(wps_enable)
                 DutLogger.log(LogCategory.ERROR, error)
                 return error
-            with open(wpa_supplicant_config_file, "w") as file:
-                file.write(wpa_supplicant_config)
+            StaCommandHelper.write_wpa_supp_config(wpa_config)
 
-        supplicant_start_command = "sudo /usr/local/bin/WFA-Hostapd-Supplicant/wpa_supplicant -B -t -c {} -i {}".format(wpa_supplicant_config_file, interface_name)
         log_level = StaCommandHelper.__get_sta_debug_log_level()
-        if log_level:
-            supplicant_start_command += " {} -f {}".format(log_level, wpa_supplicant_log_folder_path)
-        CommandHelper.run_shell_command(supplicant_start_command)
+        if not StaCommandHelper.start_wpa_supplicant(interface_name, log_level):
+            return "Unable to start wpa_supplicant."
 
         return None
\ No newline at end of file
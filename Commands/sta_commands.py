@@ -31,7 +31,7 @@ class STA_ASSOCIATE(ApiInterface):  # noqa : N801
 
     def execute(self):  # noqa : D1025
         """Method that starts the supplicant to connect to the AP."""
-        self.std_err = StaCommandHelper.sta_associate()
+        self.std_out, self.std_err = StaCommandHelper.sta_associate()
 
     def get_return_status(self):  # noqa : D1025
         """Returns the return status with the status code with following description.
@@ -42,6 +42,8 @@ class STA_ASSOCIATE(ApiInterface):  # noqa : N801
         2 - Failure, Unable to associate, returns the standard error"""
 
         if self.std_err is None:
+            if self.std_out:
+                return ApiReturnStatus(0, "Station was successfully connected to AP. " + str(self.std_out))
             return ApiReturnStatus(0, "Station was successfully connected to AP. ")
         else:
             return ApiReturnStatus(
@@ -0,0 +1,112 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Client for the hostapd/wpa_supplicant control interface sockets.
+
+Same protocol as wpa_ctrl.c used by hostapd_cli and wpa_cli, without spawning them.
+"""
+import itertools
+import os
+import select
+import socket
+import time
+from Commands.dut_logger import DutLogger, LogCategory
+from Commands.api_trace import api_trace
+
+DEFAULT_CTRL_TIMEOUT = 5.0
+CTRL_REPLY_SIZE = 4096
+local_socket_dir = "/tmp"
+_local_socket_counter = itertools.count()
+
+
+def _next_local_path():
+    return os.path.join(local_socket_dir, "qt_wpa_ctrl_{}-{}".format(os.getpid(), next(_local_socket_counter)))
+
+
+class WpaCtrl:
+    """Connection to the control interface socket of hostapd or wpa_supplicant."""
+
+    def __init__(self, ctrl_path: str, timeout: float = DEFAULT_CTRL_TIMEOUT):
+        self.ctrl_path = ctrl_path
+        self.timeout = timeout
+        self.local_path = _next_local_path()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self.sock.bind(self.local_path)
+            self.sock.connect(ctrl_path)
+        except OSError:
+            self.close()
+            raise
+
+    def request(self, command: str):
+        """Sends a command and returns its reply.
+
+        Parameters
+        ----------
+        command : str
+            Control interface command, e.g. STATUS or SET ssid test
+
+        Returns
+        -------
+        str
+            Reply of the daemon, None on timeout.
+        """
+        self.sock.send(command.encode())
+        while True:
+            readable, _, _ = select.select([self.sock], [], [], self.timeout)
+            if not readable:
+                DutLogger.log(LogCategory.ERROR, "Timeout waiting reply of {} from {}".format(command, self.ctrl_path))
+                return None
+            reply = self.sock.recv(CTRL_REPLY_SIZE).decode(errors="replace")
+            # Skip unsolicited event messages, e.g. "<3>AP-STA-CONNECTED ..."
+            if reply.startswith("<"):
+                continue
+            return reply
+
+    def close(self):
+        self.sock.close()
+        try:
+            os.unlink(self.local_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def ctrl_request(ctrl_path: str, command: str, timeout: float = DEFAULT_CTRL_TIMEOUT):
+    """Sends a single command to a control interface.
+
+    Returns
+    -------
+    str
+        Reply of the daemon, None if the control interface can't be reached or doesn't reply.
+    """
+    DutLogger.log(LogCategory.DEBUG, "Control interface {}: {}".format(ctrl_path, command))
+    start = time.monotonic()
+    try:
+        with WpaCtrl(ctrl_path, timeout) as ctrl:
+            reply = ctrl.request(command)
+    except OSError as err:
+        api_trace.record_command("ctrl", "{} {}".format(ctrl_path, command), time.monotonic() - start, "UNREACHABLE")
+        DutLogger.log(LogCategory.ERROR, "Unable to reach control interface {}: {}".format(ctrl_path, err))
+        return None
+    api_trace.record_command("ctrl", "{} {}".format(ctrl_path, command), time.monotonic() - start,
+                             "FAIL" if reply is None or reply.startswith("FAIL") else "OK")
+    DutLogger.log(LogCategory.DEBUG, "Control interface reply: {}".format(reply))
+    return reply
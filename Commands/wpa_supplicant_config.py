@@ -0,0 +1,160 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Model of a wpa_supplicant configuration file: global parameters and network blocks."""
+
+
+class WpaNetworkBlock:
+    """Parameters of a network={} block, in order. Values are kept as written, quotes included."""
+
+    def __init__(self, params: dict = None):
+        self.params = dict(params) if params else {}
+
+    def set(self, key: str, value: str, quoted: bool = False):
+        self.params[key] = '"' + value + '"' if quoted else str(value)
+
+    def get(self, key: str, default=None):
+        return self.params.get(key, default)
+
+    def remove(self, key: str):
+        self.params.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.params
+
+    def get_ssid(self):
+        """Returns the ssid of the network, quotes removed."""
+        return self.params.get("ssid", "").strip('"')
+
+    def copy(self):
+        return WpaNetworkBlock(self.params)
+
+
+class WpaSupplicantConfig:
+    """wpa_supplicant configuration that can be parsed, merged, compared and rendered."""
+
+    def __init__(self, global_params: dict = None, networks: list = None):
+        self.global_params = dict(global_params) if global_params else {}
+        self.networks = networks if networks is not None else []
+
+    def set(self, key: str, value: str):
+        self.global_params[key] = str(value)
+
+    def get(self, key: str, default=None):
+        return self.global_params.get(key, default)
+
+    def add_network(self, network: WpaNetworkBlock = None):
+        network = network if network is not None else WpaNetworkBlock()
+        self.networks.append(network)
+        return network
+
+    def get_network(self, ssid: str):
+        for network in self.networks:
+            if network.get_ssid() == ssid:
+                return network
+        return None
+
+    @staticmethod
+    def parse(config: str):
+        """Parses the content of a wpa_supplicant configuration file.
+
+        Comments and blank lines are dropped.
+
+        Parameters
+        ----------
+        config : str
+            Content of a wpa_supplicant configuration file.
+
+        Returns
+        -------
+        WpaSupplicantConfig
+            The global parameters and network blocks in file order.
+        """
+        wpa_config = WpaSupplicantConfig()
+        network = None
+        for line in config.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line == "}":
+                network = None
+                continue
+            if "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            if key == "network" and value.strip() == "{":
+                network = wpa_config.add_network()
+            elif network is not None:
+                network.params[key] = value
+            else:
+                wpa_config.global_params[key] = value
+        return wpa_config
+
+    def render(self):
+        """Returns the content of the configuration file."""
+        lines = [key + "=" + value for key, value in self.global_params.items()]
+        for network in self.networks:
+            lines.append("network={")
+            lines += ["\t" + key + "=" + value for key, value in network.params.items()]
+            lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def copy(self):
+        return WpaSupplicantConfig(self.global_params, [network.copy() for network in self.networks])
+
+    def merge(self, other):
+        """Returns a new configuration with other merged into this one.
+
+        Global parameters of other are set in place, a network with the same ssid is updated
+        and other networks are appended. Neither configuration is modified.
+        """
+        merged = self.copy()
+        merged.global_params.update(other.global_params)
+        for other_network in other.networks:
+            network = merged.get_network(other_network.get_ssid()) if "ssid" in other_network else None
+            if network is None:
+                merged.add_network(other_network.copy())
+            else:
+                network.params.update(other_network.params)
+        return merged
+
+    def diff(self, other):
+        """Compares this configuration with other.
+
+        Returns
+        -------
+        dict
+            {"": global changes, "network[i]": changes of the i-th network block}, a change being
+            {key: (value in self, value in other)} with None for a missing key or block.
+        """
+        differences = {}
+        changed = WpaSupplicantConfig.__diff_params(self.global_params, other.global_params)
+        if changed:
+            differences[""] = changed
+        for index in range(max(len(self.networks), len(other.networks))):
+            own_params = self.networks[index].params if index < len(self.networks) else {}
+            other_params = other.networks[index].params if index < len(other.networks) else {}
+            changed = WpaSupplicantConfig.__diff_params(own_params, other_params)
+            if changed:
+                differences["network[{}]".format(index)] = changed
+        return differences
+
+    @staticmethod
+    def __diff_params(own_params: dict, other_params: dict):
+        changed = {}
+        for key in list(own_params) + [key for key in other_params if key not in own_params]:
+            if own_params.get(key) != other_params.get(key):
+                changed[key] = (own_params.get(key), other_params.get(key))
+        return changed
@@ -24,6 +24,7 @@ try:
 except ImportError:
     from Commands.command_helper import CommandHelper
 from Commands.shared_enums import BssIdentifierBand
+from Commands.bss_registry import bss_registry
 
 
 IP_REGEX = r"^(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$"
@@ -43,6 +44,8 @@ class ControlAppHelper:
             Type of API to execute
 
         """
+        if api_to_execute.uses_wireless_if:
+            CommandHelper.wait_for_wlan_if()
         api_to_execute.execute()
         ret_val = api_to_execute.get_return_status()
         return ret_val
@@ -83,22 +86,37 @@ class ControlAppHelper:
         return interface
 
     @staticmethod
-    def set_wireless_if(name_arg):
+    def set_wireless_if(name_arg, deferred=False):
+        """Configures the wireless interfaces given with --interface, creating the missing ones.
+
+        Parameters
+        ----------
+        name_arg : str
+            interface name, or comma separated <band>:<interface name> entries
+        deferred : bool
+            create the missing interfaces from a background thread instead of waiting for them
+        """
         if name_arg.find(":") == -1:
             CommandHelper.INTERFACE_LOGICAL_NAME = name_arg
         else:
+            missing_if_names = []
             band_name = name_arg.split(",")
             for x in band_name:
                 if x[0:2] == "2:":
-                    name_list = [BssIdentifierBand._24GHz.value, x[2:], 0]
+                    band = BssIdentifierBand._24GHz.value
                 if x[0:2] == "5:":
-                    name_list = [BssIdentifierBand._5GHz.value, x[2:], 0]
+                    band = BssIdentifierBand._5GHz.value
                 if x[0:2] == "6:":
-                    name_list = [BssIdentifierBand._6GHz.value, x[2:], 0]
-                std_out, std_err = CommandHelper.check_wlan_created(x[2:])
-                if not std_out: # Create if not exist
-                    CommandHelper.create_wlan_if(x[2:])
-                CommandHelper.INTERFACE_LIST.append(name_list)
+                    band = BssIdentifierBand._6GHz.value
+                if not CommandHelper.is_interface_present(x[2:]): # Create if not exist
+                    missing_if_names.append(x[2:])
+                bss_registry.add_interface(band, x[2:])
+            if deferred:
+                if missing_if_names:
+                    CommandHelper.create_wlan_if_deferred(missing_if_names)
+            else:
+                for if_name in missing_if_names:
+                    CommandHelper.create_wlan_if(if_name)
 
     @staticmethod
     def __get_interface_from_available_options(interface_names):
@@ -142,7 +160,7 @@ class ControlAppHelper:
         """
         try:
             argv = sys.argv[1:]
-            options, args = getopt.getopt(argv,"",["interface=", "ip=", "port="])
+            options, args = getopt.getopt(argv,"",["interface=", "ip=", "port=", "fast-path", "trace", "fast-start", "profile="])
             return dict(options)
         except getopt.GetoptError as err:
             DutLogger.log(LogCategory.ERROR, "Error in fetching optional parameters :" + str(err))
@@ -25,7 +25,22 @@ class QuickTrackApiImplementationInterface(ABC):
     def start_loop_back_server(self, tlvs_dict):
         pass
 
-    def stop_loop_back_server(self):
+    def stop_loop_back_server(self, tlvs_dict):
+        pass
+
+    def get_loop_back_stats(self, tlvs_dict):
+        pass
+
+    def start_traffic_gen(self, tlvs_dict):
+        pass
+
+    def stop_traffic_gen(self):
+        pass
+
+    def get_dut_capabilities(self):
+        pass
+
+    def get_profile(self, tlvs_dict):
         pass
 
     def get_ip_address(self):
@@ -33,9 +33,39 @@ class QuickTrackApiLinux(QuickTrackApiImplementationInterface):
         )
         return return_status
 
-    def stop_loop_back_server(self):
+    def stop_loop_back_server(self, tlvs_dict):
         return_status = ControlAppHelper.execute_control_app_api(
-            STOP_LOOP_BACK_SERVER()  # noqa: F405
+            STOP_LOOP_BACK_SERVER(tlvs_dict)  # noqa: F405
+        )
+        return return_status
+
+    def get_loop_back_stats(self, tlvs_dict):
+        return_status = ControlAppHelper.execute_control_app_api(
+            GET_LOOP_BACK_STATS(tlvs_dict)  # noqa: F405
+        )
+        return return_status
+
+    def start_traffic_gen(self, tlvs_dict):
+        return_status = ControlAppHelper.execute_control_app_api(
+            START_TRAFFIC_GEN(tlvs_dict)  # noqa: F405
+        )
+        return return_status
+
+    def stop_traffic_gen(self):
+        return_status = ControlAppHelper.execute_control_app_api(
+            STOP_TRAFFIC_GEN()  # noqa: F405
+        )
+        return return_status
+
+    def get_dut_capabilities(self):
+        return_status = ControlAppHelper.execute_control_app_api(
+            GET_DUT_CAPABILITIES()  # noqa: F405
+        )
+        return return_status
+
+    def get_profile(self, tlvs_dict):
+        return_status = ControlAppHelper.execute_control_app_api(
+            GET_PROFILE(tlvs_dict)  # noqa: F405
         )
         return return_status
 
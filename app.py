@@ -15,6 +15,9 @@
 # OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
+import time
+startup_begin = time.monotonic()
+
 from interfaces.connection_info import ConnectionInfo, ConnectionType
 from interfaces.ethernet_control_path import EthernetControlPath
 #from interfaces.uart_control_path import UartControlPath
@@ -26,8 +29,17 @@ try:
 except ImportError:
     from Commands.command_helper import CommandHelper
 from Commands.dut_logger import DutLogger, LogCategory
+from Commands.config_fingerprint import config_fingerprints
+from Commands.netlink_monitor import netlink_monitor
+from Commands.api_trace import api_trace
+from Commands.api_profiler import api_profiler, PROFILE_DIR
+from Commands.dut_capabilities import dut_capabilities
+from Commands.dut_environment import is_stand_in
 from datetime import datetime
 
+# Time from start of the app to listening on the control port, checked with --fast-start
+STARTUP_BUDGET_MS = 300
+
 class dutControlApp:
     interface_name = None
 
@@ -38,7 +50,7 @@ class dutControlApp:
         """
         now = datetime.now()
         dt_string = now.isoformat()
-        DutLogger.log_file_name = "dut_control_app_logs_{}.log".format(dt_string)
+        DutLogger.set_log_file_name("dut_control_app_logs_{}.log".format(dt_string))
         self.connection_info = connection_info
         api_impl = QuickTrackApiLinux()
         self.api_parser = QuickTrackApiParser(api_impl)
@@ -51,15 +63,37 @@ if __name__ == "__main__":
     CommandHelper.check_if_root_user()
 
     options = ControlAppHelper.get_optional_parameters()
+    fast_start = "--fast-start" in options
     if options.get("--interface") is None:
         CommandHelper.INTERFACE_LOGICAL_NAME = ControlAppHelper.get_default_wlan_name()
     else:
-        ControlAppHelper.set_wireless_if(options.get("--interface"))
+        ControlAppHelper.set_wireless_if(options.get("--interface"), deferred=fast_start)
         DutLogger.log(LogCategory.INFO, "Configuring {} as interface for control app usage.\n".format(CommandHelper.get_interface_name()))
 
+    if "--fast-path" in options:
+        config_fingerprints.enabled = True
+        DutLogger.log(LogCategory.INFO, "Fast path enabled: daemons are parked on reset and resumed when their configuration is unchanged.\n")
+
+    if "--trace" in options:
+        api_trace.start("dut_control_app_trace_{}.jsonl".format(datetime.now().isoformat()))
+        DutLogger.log(LogCategory.INFO, "API transactions traced to {}.\n".format(api_trace.get_file_path()))
+
+    if options.get("--profile"):
+        api_profiler.set_message_types(options.get("--profile"))
+        DutLogger.log(LogCategory.INFO, "Handlers of {} profiled to {}.\n".format(",".join(api_profiler.get_message_types()), PROFILE_DIR))
+
+    # The interfaces of the stand-in DUT only exist in its sysfs tree
+    if not is_stand_in() and netlink_monitor.start():
+        DutLogger.log(LogCategory.INFO, "Interface inventory kept up to date from netlink events.\n")
+    dut_capabilities.probe_in_background()
+
     # Use Ethernet as control interface
     ethernet_ip, ethernet_port = ControlAppHelper.get_ethernet_connection_inputs(options)
     dut_control_app_obj = dutControlApp(
         ConnectionInfo(ConnectionType.ETHERNET, ip_address=ethernet_ip, ip_port=ethernet_port)
     )
+    startup_ms = (time.monotonic() - startup_begin) * 1000
+    DutLogger.log(LogCategory.INFO, "Control app ready in {:.0f} ms.\n".format(startup_ms))
+    if fast_start and startup_ms > STARTUP_BUDGET_MS:
+        DutLogger.log(LogCategory.WARNING, "Startup took longer than the {} ms budget.\n".format(STARTUP_BUDGET_MS))
     dut_control_app_obj.server.start()
@@ -21,6 +21,8 @@ from time import sleep
 from Commands.command import ApiReturnStatus
 from quicktrack_api_message.quicktrack_api_message import QuickTrackAPIMessage, QuickTrackMessageType
 from Commands.dut_logger import DutLogger, LogCategory
+from Commands.api_trace import api_trace
+from Commands.api_profiler import api_profiler
 
 class EthernetControlPath(ControlPath):
     """
@@ -52,6 +54,7 @@ class EthernetControlPath(ControlPath):
                 DutLogger.log(LogCategory.ERROR, err)
             if data:
                 received_message = self.quicktrack_api_parser.decode(data)
+                api_trace.begin(received_message, self.address)
                 acknowledgement = ApiReturnStatus(0, str("ACK: Command received"))
                 if (received_message.message_type is None):
                     acknowledgement = ApiReturnStatus(1, str("NACK: Error in received QuickTrack API message"))
@@ -64,7 +67,8 @@ class EthernetControlPath(ControlPath):
                 if received_message.message_params is None:
                     execution_result = ApiReturnStatus(1, "Wrong/Unkown Request TLV")
                 else:
-                    execution_result = self.quicktrack_api_parser.execute(received_message)
+                    execution_result = api_profiler.execute(received_message, self.quicktrack_api_parser.execute)
+                api_trace.end(execution_result)
                 message_tlv = execution_result.to_dict()
                 response_message = QuickTrackAPIMessage(QuickTrackMessageType.CMD_RESPONSE, message_tlv)
                 response_message.set_message_id(received_message.message_id)
@@ -0,0 +1,164 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Local benchmark of the loopback echo path.
+
+Starts a LoopBackClient on 127.0.0.1 and measures, from a local UDP client:
+- the round trip time of one datagram at a time, compared with the round trip through
+  a bare echo socket, which gives the latency added by the loopback client;
+- the echo rate with a window of datagrams in flight.
+
+Usage: python3 -m loopBackClient.loop_back_benchmark [--packets=N] [--size=BYTES] [--window=N] [--busy-poll]
+                                                    [--workers=N] [--flows=N] [--precision]
+
+With several workers, use several flows (client sockets) so that the kernel spreads them.
+"""
+import getopt
+import selectors
+import socket
+import sys
+import time
+from threading import Thread
+from loopBackClient.loop_back_client import LoopBackClient, LoopBackPrecision
+
+DEFAULT_PACKETS = 20000
+DEFAULT_SIZE = 64
+DEFAULT_WINDOW = 32
+DEFAULT_FLOWS = 1
+RECV_TIMEOUT = 1.0
+
+
+def start_bare_echo():
+    """Starts a minimal echo socket used as reference for the round trip time."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+
+    def echo():
+        buffer = bytearray(65535)
+        while True:
+            try:
+                nbytes, addr = sock.recvfrom_into(buffer)
+                sock.sendto(memoryview(buffer)[:nbytes], addr)
+            except OSError:
+                return
+
+    Thread(target=echo, daemon=True).start()
+    return sock
+
+
+def measure_rtt(port, packets, size):
+    """Returns the sorted round trip times in microseconds, one datagram in flight."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(RECV_TIMEOUT)
+    sock.connect(("127.0.0.1", port))
+    payload = bytes(size)
+    buffer = bytearray(65535)
+    rtts = []
+    for _ in range(packets):
+        start = time.perf_counter()
+        sock.send(payload)
+        try:
+            sock.recv_into(buffer)
+        except socket.timeout:
+            continue
+        rtts.append((time.perf_counter() - start) * 1e6)
+    sock.close()
+    rtts.sort()
+    return rtts
+
+
+def measure_rate(port, packets, size, window, flows):
+    """Returns (echoed datagrams, packets/s) with window datagrams in flight per flow."""
+    socks = []
+    for _ in range(flows):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        sock.connect(("127.0.0.1", port))
+        sock.setblocking(False)
+        socks.append(sock)
+    selector = selectors.DefaultSelector()
+    for sock in socks:
+        selector.register(sock, selectors.EVENT_READ)
+    payload = bytes(size)
+    buffer = bytearray(65535)
+    in_flight = dict.fromkeys(socks, 0)
+    sent = received = 0
+    start = time.perf_counter()
+    while received < packets:
+        for sock in socks:
+            while sent < packets and in_flight[sock] < window:
+                sock.send(payload)
+                in_flight[sock] += 1
+                sent += 1
+        events = selector.select(RECV_TIMEOUT)
+        if not events:
+            break  # Datagrams were lost, count what came back
+        for key, _ in events:
+            try:
+                while True:
+                    key.fileobj.recv_into(buffer)
+                    in_flight[key.fileobj] -= 1
+                    received += 1
+            except BlockingIOError:
+                pass
+    elapsed = time.perf_counter() - start
+    selector.close()
+    for sock in socks:
+        sock.close()
+    return received, received / elapsed
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+def main():
+    options, _ = getopt.getopt(sys.argv[1:], "", ["packets=", "size=", "window=", "busy-poll", "workers=", "flows=", "precision"])
+    options = dict(options)
+    packets = int(options.get("--packets", DEFAULT_PACKETS))
+    size = int(options.get("--size", DEFAULT_SIZE))
+    window = int(options.get("--window", DEFAULT_WINDOW))
+    workers = int(options.get("--workers", 1))
+    flows = int(options.get("--flows", DEFAULT_FLOWS))
+
+    bare_echo = start_bare_echo()
+    bare_rtts = measure_rtt(bare_echo.getsockname()[1], packets, size)
+    bare_echo.close()
+
+    precision = LoopBackPrecision() if "--precision" in options else None
+    loop_back_client = LoopBackClient(
+        "127.0.0.1", 0, busy_poll="--busy-poll" in options, workers=workers, precision=precision)
+    port = loop_back_client.get_port()
+    rtts = measure_rtt(port, packets, size)
+    received, rate = measure_rate(port, packets, size, window, flows)
+    loop_back_client.close()
+
+    print("Datagrams of {} bytes, {} per measurement, {} worker(s), {} flow(s){}".format(
+        size, packets, workers, flows, ", busy poll" if "--busy-poll" in options else ""))
+    for name, values in (("bare echo RTT", bare_rtts), ("loopback RTT", rtts)):
+        print("{:>14}: p50 {:8.1f} us  p99 {:8.1f} us".format(name, percentile(values, 50), percentile(values, 99)))
+    print("{:>14}: p50 {:8.1f} us".format("added latency", percentile(rtts, 50) - percentile(bare_rtts, 50)))
+    print("{:>14}: {:.0f} packets/s ({} of {} echoed, window {})".format("echo rate", rate, received, packets, window))
+    print("{:>14}: {}".format("counters", loop_back_client.format_counters()))
+    for name in ("turnaround", "kernel_turnaround"):
+        histogram = loop_back_client.get_stats().format_histogram(name)
+        if histogram:
+            print("{:>14}: {}".format(name.replace("_", " "), histogram))
+
+
+if __name__ == "__main__":
+    main()
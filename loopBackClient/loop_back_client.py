@@ -13,74 +13,275 @@
 # CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
 # OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+import os
 import socket
+import struct
+import time
 from threading import Thread
-from time import sleep
 from Commands.dut_logger import DutLogger, LogCategory
+from loopBackClient.loop_back_stats import (
+    LoopBackStats, SequenceTracker, create_worker_stats, WORKER_CONTEXT, HIST_BUCKETS, INTERARRIVAL_HIST,
+    TURNAROUND_HIST, KERNEL_TURNAROUND_HIST, RX_PACKETS, RX_BYTES, TX_PACKETS, TX_BYTES, TX_ERRORS)
+
+# Largest UDP payload, so that the datagrams are echoed without truncation
+LOOP_BACK_BUFFER_SIZE = 65535
+# Period of the blocking receive, to notice close() without traffic
+LOOP_BACK_RECV_TIMEOUT = 0.2
+# Period of the counters summary in the log while data is echoed
+LOOP_BACK_LOG_INTERVAL = 10.0
+# SO_BUSY_POLL from <asm-generic/socket.h>, not exported by the socket module
+SO_BUSY_POLL = 46
+LOOP_BACK_BUSY_POLL_USEC = 50
+MAX_LOOP_BACK_WORKERS = 64
+# SO_TIMESTAMPNS (= SCM_TIMESTAMPNS) from <asm-generic/socket.h>, not exported by the socket module
+SO_TIMESTAMPNS = 35
+TIMESPEC = struct.Struct("=qq")
+TIMESTAMP_ANCBUF_SIZE = socket.CMSG_SPACE(TIMESPEC.size)
+# Range of the precision mode settings
+MAX_LOOP_BACK_CPU = (os.cpu_count() or 1) - 1
+MIN_FIFO_PRIORITY = 1
+MAX_FIFO_PRIORITY = 99
+
+
+class LoopBackPrecision:
+    """Settings of the precision mode, for low-jitter latency measurements.
+
+    The kernel receive time of each datagram (SO_TIMESTAMPNS) gives the DUT turnaround from
+    kernel RX to TX, the echo thread or process is pinned to a CPU and optionally scheduled
+    with SCHED_FIFO.
+    """
+
+    def __init__(self, cpu: int = None, fifo_priority: int = None):
+        """
+        Parameters
+        ----------
+        cpu : int, optional
+            CPU of the first worker, the next workers use the next CPUs. The last allowed CPU by default.
+        fifo_priority : int, optional
+            SCHED_FIFO priority (1-99) of the workers, not real-time by default.
+        """
+        allowed_cpus = sorted(os.sched_getaffinity(0))
+        self.cpus = allowed_cpus
+        self.cpu = int(cpu) if cpu is not None else allowed_cpus[-1]
+        self.fifo_priority = int(fifo_priority) if fifo_priority is not None else None
+
+    def get_worker_cpu(self, worker: int):
+        return self.cpus[(self.cpus.index(self.cpu) + worker) % len(self.cpus)] if self.cpu in self.cpus \
+            else self.cpu
+
+    def apply(self, worker: int):
+        """Pins the calling thread and sets its scheduling policy (both are per thread on Linux)."""
+        cpu = self.get_worker_cpu(worker)
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError as err:
+            DutLogger.log(LogCategory.ERROR, "Unable to pin loopback worker {} to CPU {}: {}".format(worker, cpu, err))
+        if self.fifo_priority is not None:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.fifo_priority))
+            except OSError as err:
+                DutLogger.log(LogCategory.ERROR, "Unable to set SCHED_FIFO {} on loopback worker {}: {}".format(
+                    self.fifo_priority, worker, err))
+
+
+def create_loop_back_socket(local_address, local_port, reuse_port, busy_poll, timestamps=False):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    if timestamps:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    sock.bind((local_address, local_port))
+    if busy_poll:
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, LOOP_BACK_BUSY_POLL_USEC)
+        except OSError:
+            pass  # Needs CAP_NET_ADMIN, spinning on the socket alone still avoids the wakeups
+    else:
+        sock.settimeout(LOOP_BACK_RECV_TIMEOUT)
+    return sock
+
+
+def get_kernel_rx_time(ancdata):
+    """Returns the SCM_TIMESTAMPNS receive time (CLOCK_REALTIME, ns) of the ancillary data, None if absent."""
+    for level, cmsg_type, data in ancdata:
+        if level == socket.SOL_SOCKET and cmsg_type == SO_TIMESTAMPNS and len(data) >= TIMESPEC.size:
+            seconds, nanoseconds = TIMESPEC.unpack_from(data)
+            return seconds * 1000000000 + nanoseconds
+    return None
+
+
+def echo_loop(sock, stats, closed, seq_offset=None, log_counters=None, timestamps=False):
+    """Echoes the datagrams received on sock until closed is set.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Bound UDP socket.
+    stats : multiprocessing.sharedctypes.RawArray
+        Statistics of this worker (see loop_back_stats), updated in place.
+    closed : multiprocessing.sharedctypes.RawValue
+        Set to stop the loop.
+    seq_offset : int, optional
+        Offset of the sequence number in the payload, to find lost, duplicated and reordered datagrams.
+    log_counters : callable, optional
+        Called every LOOP_BACK_LOG_INTERVAL while data is echoed.
+    timestamps : bool
+        True if SO_TIMESTAMPNS is enabled on sock, to measure the turnaround from the kernel receive time.
+    """
+    buffer = bytearray(LOOP_BACK_BUFFER_SIZE)
+    view = memoryview(buffer)
+    # Indexing a memoryview is cheaper than indexing the ctypes array
+    stats = memoryview(stats).cast("B").cast("Q")
+    recvfrom_into = sock.recvfrom_into
+    recvmsg_into = sock.recvmsg_into
+    buffers = [buffer]
+    sendto = sock.sendto
+    clock_ns = time.monotonic_ns
+    realtime_ns = time.time_ns
+    kernel_rx_time = None
+    inspect = SequenceTracker(stats, seq_offset).inspect if seq_offset is not None else None
+    last_bucket = HIST_BUCKETS - 1
+    next_log = time.monotonic() + LOOP_BACK_LOG_INTERVAL
+    last_rx = None
+    while not closed.value:
+        try:
+            if timestamps:
+                nbytes, ancdata, _, addr = recvmsg_into(buffers, TIMESTAMP_ANCBUF_SIZE)
+                kernel_rx_time = get_kernel_rx_time(ancdata)
+            else:
+                nbytes, addr = recvfrom_into(buffer)
+        except (BlockingIOError, socket.timeout):
+            continue
+        except OSError:
+            if closed.value:
+                break
+            raise
+        rx_time = clock_ns()
+        stats[RX_PACKETS] += 1
+        stats[RX_BYTES] += nbytes
+        try:
+            stats[TX_BYTES] += sendto(view[:nbytes], addr)
+            stats[TX_PACKETS] += 1
+        except OSError:
+            stats[TX_ERRORS] += 1
+        tx_time = clock_ns()
+        stats[TURNAROUND_HIST + min(((tx_time - rx_time) // 1000).bit_length(), last_bucket)] += 1
+        if kernel_rx_time is not None:
+            kernel_turnaround = max(0, realtime_ns() - kernel_rx_time)
+            stats[KERNEL_TURNAROUND_HIST + min((kernel_turnaround // 1000).bit_length(), last_bucket)] += 1
+        if last_rx is not None:
+            stats[INTERARRIVAL_HIST + min(((rx_time - last_rx) // 1000).bit_length(), last_bucket)] += 1
+        last_rx = rx_time
+        if inspect:
+            inspect(buffer, nbytes, addr)
+        if log_counters and stats[RX_PACKETS] & 0xff == 0 and time.monotonic() >= next_log:
+            next_log = time.monotonic() + LOOP_BACK_LOG_INTERVAL
+            log_counters()
+
+
+def echo_worker(worker, local_address, local_port, busy_poll, stats, closed, seq_offset, precision):
+    """Entry point of the worker processes, which share the port of the loopback server."""
+    if precision is not None:
+        precision.apply(worker)
+    sock = create_loop_back_socket(local_address, local_port, True, busy_poll, precision is not None)
+    try:
+        echo_loop(sock, stats, closed, seq_offset, timestamps=precision is not None)
+    finally:
+        sock.close()
+
 
 class LoopBackClient:
     """
     Simple UDP socket for loop back data.
 
     implementation that echos back any loop back test data sent for the
-    test tool.
+    test tool. With several workers, worker processes bind the same port
+    with SO_REUSEPORT and the kernel spreads the flows (by address and port
+    hash) across them, the first worker is a thread of the control app.
     """
 
-    def __init__(self, local_address, local_port):
+    def __init__(self, local_address, local_port, busy_poll=False, workers=1, seq_offset=None, precision=None):
+        self.local_address = local_address
+        self.local_port = int(local_port)
+        self.busy_poll = busy_poll
+        self.workers = max(1, min(int(workers), MAX_LOOP_BACK_WORKERS))
+        self.seq_offset = seq_offset
+        self.precision = precision
+        self.closed = WORKER_CONTEXT.RawValue("b", 0)
+        self.stats = LoopBackStats([create_worker_stats() for _ in range(self.workers)])
+        self.worker_processes = []
+        self.client = None
+        self.listening_thread = None
         try:
-            self.local_address = local_address
-            self.local_port = int(local_port)
-            self.loop_back_app_closed = False
-            self.client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.client.bind((self.local_address, self.local_port))
-            self.client.settimeout(30.0)
+            self.client = create_loop_back_socket(
+                self.local_address, self.local_port, self.workers > 1, busy_poll, precision is not None)
 
             if self.local_port == 0:
                 self.local_port = self.client.getsockname()[1]
                 DutLogger.log(LogCategory.INFO, "Loopback server port is {}".format(self.local_port))
 
-            listening_thread = Thread(target=self.start_listening)
-            listening_thread.setDaemon(True)
-            listening_thread.start()
+            for worker, stats in enumerate(self.stats.worker_stats[1:], 1):
+                process = WORKER_CONTEXT.Process(target=echo_worker, daemon=True, args=(
+                    worker, self.local_address, self.local_port, busy_poll, stats, self.closed, seq_offset, precision))
+                process.start()
+                self.worker_processes.append(process)
+
+            self.listening_thread = Thread(target=self.start_listening, daemon=True)
+            self.listening_thread.start()
         except Exception as ex:
             DutLogger.log(LogCategory.ERROR, "Error when starting loop back server :" + str(ex))
-            return None
+            # get_port() returns 0 when the loopback server failed to start
+            self.close()
+            self.local_port = 0
 
     def start_listening(self):
         """Starts the loop back client on the specified port number and echos back any data received from the test tool
         """
+        DutLogger.log(
+            LogCategory.INFO,
+            "Start loop back server at -"
+            + self.local_address
+            + ":"
+            + str(self.local_port)
+            + (" ({} workers)".format(self.workers) if self.workers > 1 else "")
+            + (" (busy poll)" if self.busy_poll else "")
+            + (" (precision, CPU {})".format(self.precision.get_worker_cpu(0)) if self.precision else "")
+        )
+        if self.precision is not None:
+            self.precision.apply(0)
         try:
-            # connect to the server
-            DutLogger.log(
-                LogCategory.INFO,
-                "Start loop back server at -"
-                + self.local_address
-                + ":"
-                + str(self.local_port)
-            )
-
-            while self.loop_back_app_closed is False:
-                # receive data stream. it won't accept data packet greater
-                #  than 1024 bytes
-                try:
-                    data, addr = self.client.recvfrom(1400)
-                    if data:
-                        DutLogger.log(LogCategory.DEBUG, "Received data from test tool :" + str(addr))
-                        self.client.sendto(data, addr)
-                    sleep(0.1)
-                except Exception:
-                    pass  # Expected to timeout
-
-        except Exception as ex:
+            echo_loop(self.client, self.stats.worker_stats[0], self.closed, self.seq_offset, self.__log_counters,
+                      self.precision is not None)
+        except OSError as ex:
             DutLogger.log(LogCategory.ERROR, "Error when connecting with QuickTrack tool :" + str(ex))
-            return None
+
+    def __log_counters(self):
+        DutLogger.log(LogCategory.INFO, "Loopback counters: {}".format(self.format_counters()))
 
     def get_port(self):
         return self.local_port
 
+    def get_counters(self):
+        """Returns {counter name: value} of the packets echoed so far by all the workers."""
+        return self.stats.get_counters()
+
+    def format_counters(self):
+        return self.stats.format_counters()
+
+    def get_stats(self):
+        return self.stats
+
     def close(self):
         """Shuts the UDP loopback app
         """
-        self.loop_back_app_closed = True
-        sleep(0.5)
-        self.client.close()
+        self.closed.value = 1
+        for process in self.worker_processes:
+            process.join(LOOP_BACK_RECV_TIMEOUT * 5)
+            if process.is_alive():
+                process.kill()
+        if self.listening_thread is not None:
+            self.listening_thread.join(LOOP_BACK_RECV_TIMEOUT * 5)
+            self.__log_counters()
+        if self.client is not None:
+            self.client.close()
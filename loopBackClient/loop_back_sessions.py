@@ -0,0 +1,98 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Loopback servers running at the same time, for instance one per BSS or on P2P and infrastructure interfaces."""
+from threading import Lock
+from Commands.dut_logger import DutLogger, LogCategory
+from loopBackClient.loop_back_client import LoopBackClient
+from loopBackClient.loop_back_stats import LoopBackStats
+
+
+class LoopBackSessionManager:
+    """Owns the loopback servers, keyed by (interface name, port)."""
+
+    def __init__(self):
+        self.__sessions = {}
+        self.__lock = Lock()
+
+    def start(self, if_name: str, ip_address: str, port: int = 0, **options):
+        """Starts a loopback server on an interface.
+
+        Parameters
+        ----------
+        if_name : str
+            Interface of the session.
+        ip_address : str
+            Address of the interface the server is bound to.
+        port : int
+            UDP port, 0 for a port chosen by the kernel.
+        options : dict
+            busy_poll, workers and seq_offset of LoopBackClient.
+
+        Returns
+        -------
+        tuple
+            (LoopBackClient, error), the client is None on error.
+        """
+        with self.__lock:
+            if port and (if_name, port) in self.__sessions:
+                return None, "Loopback server already running on {} port {}".format(if_name, port)
+            loop_back_client = LoopBackClient(ip_address, port, **options)
+            if loop_back_client.get_port() == 0:
+                return None, "Failed to initialise loop back server"
+            self.__sessions[(if_name, loop_back_client.get_port())] = loop_back_client
+        DutLogger.log(LogCategory.INFO, "Loopback session {}:{} started, {} session(s) running".format(
+            if_name, loop_back_client.get_port(), len(self)))
+        return loop_back_client, None
+
+    def find(self, if_name: str = None, port: int = None):
+        """Returns {(interface name, port): LoopBackClient} of the sessions matching the given interface and/or port."""
+        with self.__lock:
+            return {key: loop_back_client for key, loop_back_client in self.__sessions.items()
+                    if (if_name is None or key[0] == if_name) and (port is None or key[1] == port)}
+
+    def stop(self, if_name: str = None, port: int = None):
+        """Stops the sessions matching the given interface and/or port, all of them by default.
+
+        Returns
+        -------
+        dict
+            {(interface name, port): LoopBackClient} of the stopped sessions, their statistics remain readable.
+        """
+        with self.__lock:
+            stopped = {key: loop_back_client for key, loop_back_client in self.__sessions.items()
+                       if (if_name is None or key[0] == if_name) and (port is None or key[1] == port)}
+            for key in stopped:
+                del self.__sessions[key]
+        for (session_if, session_port), loop_back_client in stopped.items():
+            loop_back_client.close()
+            DutLogger.log(LogCategory.INFO, "Loopback session {}:{} stopped".format(session_if, session_port))
+        return stopped
+
+    def stop_all(self):
+        return self.stop()
+
+    @staticmethod
+    def get_stats(sessions: dict):
+        """Returns the statistics summed over sessions."""
+        return LoopBackStats([stats for loop_back_client in sessions.values()
+                              for stats in loop_back_client.get_stats().worker_stats])
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__sessions)
+
+
+loop_back_sessions = LoopBackSessionManager()
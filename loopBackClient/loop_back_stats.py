@@ -0,0 +1,166 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Statistics of the loopback echo workers, kept in fixed-size shared arrays.
+
+Each worker owns one array of unsigned 64-bit integers, shared with the control app:
+the packet counters, the sequence number counters and two log2 histograms in
+microseconds, of the inter-arrival time and of the DUT turnaround time (from the
+receive to the echo of a datagram, the DUT part of the round trip time). In precision
+mode, a third histogram has the turnaround from the kernel receive time (SO_TIMESTAMPNS),
+which adds the socket queueing and the wakeup of the echo thread.
+"""
+import multiprocessing
+import struct
+from Commands.dut_logger import DutLogger, LogCategory
+
+LOOP_BACK_COUNTERS = ("rx_packets", "rx_bytes", "tx_packets", "tx_bytes", "tx_errors")
+RX_PACKETS, RX_BYTES, TX_PACKETS, TX_BYTES, TX_ERRORS = range(len(LOOP_BACK_COUNTERS))
+SEQ_PACKETS, SEQ_EXPECTED, SEQ_UNIQUE, SEQ_DUPLICATES, SEQ_REORDERED = range(
+    len(LOOP_BACK_COUNTERS), len(LOOP_BACK_COUNTERS) + 5)
+
+# Bucket b counts the values in [2^(b-1), 2^b) microseconds, bucket 0 the values below 1 us
+HIST_BUCKETS = 24
+INTERARRIVAL_HIST = SEQ_REORDERED + 1
+TURNAROUND_HIST = INTERARRIVAL_HIST + HIST_BUCKETS
+KERNEL_TURNAROUND_HIST = TURNAROUND_HIST + HIST_BUCKETS
+STATS_SIZE = KERNEL_TURNAROUND_HIST + HIST_BUCKETS
+HISTOGRAMS = {"interarrival": INTERARRIVAL_HIST, "turnaround": TURNAROUND_HIST,
+              "kernel_turnaround": KERNEL_TURNAROUND_HIST}
+HIST_PERCENTILES = (50, 90, 99)
+
+# Sequence numbers are 32-bit big-endian, duplicates are detected over the last SEQ_WINDOW ones
+SEQ_NUMBER = struct.Struct(">I")
+SEQ_WINDOW = 64
+SEQ_WINDOW_MASK = (1 << SEQ_WINDOW) - 1
+
+MAX_TLV_VALUE_LENGTH = 255
+
+# The control app runs threads (log listener, netlink monitor, DHCP server...) whose locks a
+# forked worker could inherit held, the workers are started from a single-threaded fork server
+WORKER_CONTEXT = multiprocessing.get_context("forkserver")
+
+
+def create_worker_stats():
+    return WORKER_CONTEXT.RawArray("Q", STATS_SIZE)
+
+
+class SequenceTracker:
+    """Finds lost, duplicated and reordered datagrams from the sequence number of each source.
+
+    The sequence number is read at a fixed offset of the payload, where the test tool header carries it.
+    """
+
+    def __init__(self, stats, seq_offset: int):
+        self.stats = stats
+        self.seq_offset = seq_offset
+        # {source address: [highest sequence number, bitmap of the SEQ_WINDOW last ones seen]}
+        self.sources = {}
+
+    def inspect(self, buffer, nbytes: int, addr):
+        if nbytes < self.seq_offset + SEQ_NUMBER.size:
+            return
+        seq = SEQ_NUMBER.unpack_from(buffer, self.seq_offset)[0]
+        stats = self.stats
+        stats[SEQ_PACKETS] += 1
+        source = self.sources.get(addr)
+        if source is None:
+            self.sources[addr] = [seq, 1]
+            stats[SEQ_EXPECTED] += 1
+            stats[SEQ_UNIQUE] += 1
+            return
+        highest, seen = source
+        if seq > highest:
+            gap = seq - highest
+            stats[SEQ_EXPECTED] += gap
+            stats[SEQ_UNIQUE] += 1
+            source[0] = seq
+            source[1] = ((seen << gap) | 1) & SEQ_WINDOW_MASK
+            return
+        distance = highest - seq
+        if distance < SEQ_WINDOW and (seen >> distance) & 1:
+            stats[SEQ_DUPLICATES] += 1
+            return
+        if distance < SEQ_WINDOW:
+            source[1] = seen | (1 << distance)
+        # Older than the window: counted as reordered, a duplicate can't be told apart anymore
+        stats[SEQ_UNIQUE] += 1
+        stats[SEQ_REORDERED] += 1
+
+
+class LoopBackStats:
+    """Sums and formats the statistics of all the workers of a loopback server."""
+
+    def __init__(self, worker_stats: list):
+        self.worker_stats = worker_stats
+
+    def get_totals(self):
+        return [sum(values) for values in zip(*self.worker_stats)]
+
+    def get_counters(self):
+        """Returns {counter name: value} of the packets echoed so far by all the workers."""
+        return dict(zip(LOOP_BACK_COUNTERS, self.get_totals()))
+
+    def format_counters(self, totals=None):
+        totals = totals if totals is not None else self.get_totals()
+        return LoopBackStats.format_tlv_value(
+            ("{}={}".format(name, totals[index]) for index, name in enumerate(LOOP_BACK_COUNTERS)))
+
+    def format_sequence(self, totals=None):
+        """Returns the sequence number statistics, None if no datagram carried one."""
+        totals = totals if totals is not None else self.get_totals()
+        if not totals[SEQ_PACKETS]:
+            return None
+        lost = max(0, totals[SEQ_EXPECTED] - totals[SEQ_UNIQUE])
+        return LoopBackStats.format_tlv_value((
+            "packets={}".format(totals[SEQ_PACKETS]), "lost={}".format(lost),
+            "duplicates={}".format(totals[SEQ_DUPLICATES]), "reordered={}".format(totals[SEQ_REORDERED])))
+
+    def format_histogram(self, name: str, totals=None):
+        """Returns percentiles and maximum of a histogram, as bucket upper bounds in microseconds.
+
+        Returns
+        -------
+        str
+            ex: "count=1000,p50_us=16,p90_us=32,p99_us=128,max_us=512", None if the histogram is empty.
+        """
+        totals = totals if totals is not None else self.get_totals()
+        offset = HISTOGRAMS[name]
+        buckets = totals[offset:offset + HIST_BUCKETS]
+        count = sum(buckets)
+        if not count:
+            return None
+        fields = ["count={}".format(count)]
+        percentiles = list(HIST_PERCENTILES)
+        cumulated = 0
+        for bucket, bucket_count in enumerate(buckets):
+            cumulated += bucket_count
+            while percentiles and cumulated * 100 >= percentiles[0] * count:
+                fields.append("p{}_us={}".format(percentiles.pop(0), 1 << bucket))
+        highest = max(bucket for bucket, bucket_count in enumerate(buckets) if bucket_count)
+        fields.append("max_us={}".format(1 << highest))
+        return LoopBackStats.format_tlv_value(fields)
+
+    @staticmethod
+    def format_tlv_value(fields):
+        """Joins fields, dropping the last ones if needed to fit in a TLV (1 byte length)."""
+        value = ""
+        for field in fields:
+            extended = "{},{}".format(value, field) if value else field
+            if len(extended) > MAX_TLV_VALUE_LENGTH:
+                DutLogger.log(LogCategory.ERROR, "Loopback statistics truncated: {}".format(value))
+                break
+            value = extended
+        return value
@@ -0,0 +1,141 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""DUT-side UDP traffic generator, for DUT-originated throughput tests.
+
+The datagrams are paced with a token bucket and sent in batches between two refills.
+Each payload starts with a 32-bit big-endian sequence number and the 64-bit send
+time in nanoseconds, so that the receiver can find losses and reordering.
+"""
+import socket
+import struct
+import time
+from threading import Event, Thread
+from Commands.dut_logger import DutLogger, LogCategory
+from loopBackClient.loop_back_stats import LoopBackStats
+
+TRAFFIC_HEADER = struct.Struct(">IQ")
+MIN_PACKET_SIZE = TRAFFIC_HEADER.size
+MAX_PACKET_SIZE = 65507
+# Datagrams sent back to back before the token bucket is refilled
+SEND_BATCH = 32
+# Burst allowed by the token bucket, in seconds of traffic at the configured rate
+BUCKET_DEPTH = 0.005
+SNDBUF_SIZE = 4 * 1024 * 1024
+# Longest stream accepted, in seconds
+MAX_DURATION = 24 * 3600
+
+
+class TrafficGenerator:
+    """Sends a UDP stream to a destination at a configured rate, packet size and duration."""
+
+    def __init__(self, local_address, dest_address, dest_port, rate_kbps, packet_size, duration):
+        """
+        Parameters
+        ----------
+        local_address : str
+            Address of the DUT interface the stream is sent from.
+        dest_address, dest_port : str, int
+            Destination of the stream.
+        rate_kbps : int
+            Rate of the stream, in kbit/s of UDP payload.
+        packet_size : int
+            Size of the UDP payload, at least MIN_PACKET_SIZE.
+        duration : float
+            Duration of the stream in seconds, 0 to send until stop().
+        """
+        self.dest = (dest_address, int(dest_port))
+        self.rate = int(rate_kbps) * 1000 // 8
+        self.packet_size = max(MIN_PACKET_SIZE, min(int(packet_size), MAX_PACKET_SIZE))
+        self.duration = float(duration)
+        self.tx_packets = 0
+        self.tx_bytes = 0
+        self.tx_errors = 0
+        self.start_time = None
+        self.end_time = None
+        self.stop_event = Event()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SNDBUF_SIZE)
+            self.sock.bind((local_address, 0))
+            self.sock.connect(self.dest)
+        except Exception:
+            self.sock.close()
+            raise
+        self.thread = Thread(target=self.__send_stream, daemon=True)
+
+    def start(self):
+        DutLogger.log(LogCategory.INFO, "Traffic generator to {}:{}, {} bytes at {} bytes/s for {} s".format(
+            self.dest[0], self.dest[1], self.packet_size, self.rate, self.duration or "unlimited"))
+        self.thread.start()
+
+    def __send_stream(self):
+        payload = bytearray(self.packet_size)
+        send = self.sock.send
+        pack_into = TRAFFIC_HEADER.pack_into
+        clock = time.monotonic
+        size = self.packet_size
+        rate = self.rate
+        depth = max(size, rate * BUCKET_DEPTH)
+        seq = 0
+        self.start_time = last_refill = clock()
+        end = self.start_time + self.duration if self.duration > 0 else float("inf")
+        tokens = size
+        while not self.stop_event.is_set():
+            now = clock()
+            if now >= end:
+                break
+            tokens = min(depth, tokens + (now - last_refill) * rate)
+            last_refill = now
+            batch = 0
+            while tokens >= size and batch < SEND_BATCH:
+                pack_into(payload, 0, seq & 0xffffffff, time.monotonic_ns())
+                try:
+                    self.tx_bytes += send(payload)
+                    self.tx_packets += 1
+                except OSError:
+                    self.tx_errors += 1
+                seq += 1
+                tokens -= size
+                batch += 1
+            if tokens < size:
+                # Wait for the tokens of the next datagram
+                self.stop_event.wait((size - tokens) / rate)
+        self.end_time = clock()
+        self.sock.close()
+        DutLogger.log(LogCategory.INFO, "Traffic generator stopped: {}".format(self.format_stats()))
+
+    def is_running(self):
+        return self.thread.is_alive()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def get_stats(self):
+        """Returns {name: value} of the stream sent so far, with the achieved rate."""
+        end_time = self.end_time if self.end_time is not None else time.monotonic()
+        elapsed = end_time - self.start_time if self.start_time is not None else 0
+        return {
+            "tx_packets": self.tx_packets,
+            "tx_bytes": self.tx_bytes,
+            "tx_errors": self.tx_errors,
+            "duration_ms": int(elapsed * 1000),
+            "rate_kbps": int(self.tx_bytes * 8 / elapsed / 1000) if elapsed else 0,
+            "rate_pps": int(self.tx_packets / elapsed) if elapsed else 0,
+        }
+
+    def format_stats(self):
+        return LoopBackStats.format_tlv_value("{}={}".format(name, value) for name, value in self.get_stats().items())
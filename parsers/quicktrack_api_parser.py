@@ -106,7 +106,17 @@ class QuickTrackApiParser(ApiParser):
         if command == QuickTrackMessageType.START_LOOP_BACK_SERVER:
             ret_status = self.quicktrack_api_implementation.start_loop_back_server(tlvs_dict)
         elif command == QuickTrackMessageType.STOP_LOOP_BACK_SERVER:
-            ret_status = self.quicktrack_api_implementation.stop_loop_back_server()
+            ret_status = self.quicktrack_api_implementation.stop_loop_back_server(tlvs_dict)
+        elif command == QuickTrackMessageType.GET_LOOP_BACK_STATS:
+            ret_status = self.quicktrack_api_implementation.get_loop_back_stats(tlvs_dict)
+        elif command == QuickTrackMessageType.START_TRAFFIC_GEN:
+            ret_status = self.quicktrack_api_implementation.start_traffic_gen(tlvs_dict)
+        elif command == QuickTrackMessageType.STOP_TRAFFIC_GEN:
+            ret_status = self.quicktrack_api_implementation.stop_traffic_gen()
+        elif command == QuickTrackMessageType.GET_DUT_CAPABILITIES:
+            ret_status = self.quicktrack_api_implementation.get_dut_capabilities()
+        elif command == QuickTrackMessageType.GET_PROFILE:
+            ret_status = self.quicktrack_api_implementation.get_profile(tlvs_dict)
         elif command == QuickTrackMessageType.CREATE_NEW_INTERFACE_BRIDGE_NETWORK:
             ret_status = self.quicktrack_api_implementation.create_new_interface_bridge_network(tlvs_dict)
         elif command == QuickTrackMessageType.ASSIGN_STATIC_IP:
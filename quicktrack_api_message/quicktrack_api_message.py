@@ -74,6 +74,11 @@ class QuickTrackMessageType(Enum):
     STOP_DHCP = 0x500B
     GET_WSC_PIN = 0x500C
     GET_WSC_CRED = 0x500D
+    GET_LOOP_BACK_STATS = 0x500E
+    START_TRAFFIC_GEN = 0x500F
+    STOP_TRAFFIC_GEN = 0x5010
+    GET_DUT_CAPABILITIES = 0x5011
+    GET_PROFILE = 0x5012
 
     AFCD_CONFIGURE = 0x6001
     AFCD_OPERATION = 0x6002
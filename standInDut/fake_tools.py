@@ -0,0 +1,407 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Fake hostapd, wpa_supplicant and network tools of the stand-in DUT.
+
+Every tool of the stand-in DUT bin directory runs this script with its own name as first argument.
+The tools keep their state (interfaces, addresses) in the sysfs tree under QUICKTRACK_DUT_ROOT,
+the daemons serve the hostapd/wpa_supplicant control interface protocol on their sockets.
+Each tool sleeps for its configured latency, and scripted outputs configured for a tool and
+a regex of its arguments replace the built-in behavior, see StandInDut in stand_in_dut.py.
+"""
+import json
+import os
+import re
+import select
+import signal
+import socket
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Commands.dut_environment import dut_path  # noqa: E402
+from Commands.wpa_ctrl import ctrl_request  # noqa: E402
+from Commands.dut_logger import DutLogger, LogCategory  # noqa: E402
+
+CONFIG_PATH = dut_path("/stand_in_dut.json")
+SYSFS_NET_PATH = dut_path("/sys/class/net")
+HOSTAPD_CTRL_DIR = dut_path("/var/run/hostapd")
+WPA_SUPPLICANT_CTRL_DIR = dut_path("/var/run/wpa_supplicant")
+# Address written by the fake DHCP client
+DHCP_CLIENT_IP = "192.168.65.100"
+FAKE_VERSION = "2.10-stand-in"
+CTRL_BUFFER_SIZE = 4096
+
+
+def load_config():
+    try:
+        with open(CONFIG_PATH) as config_file:
+            return json.load(config_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_mac_addr(if_name):
+    """Locally administered MAC address derived from the interface name."""
+    digest = zlib.crc32(if_name.encode())
+    return "02:00:{:02x}:{:02x}:{:02x}:{:02x}".format(
+        (digest >> 24) & 0xff, (digest >> 16) & 0xff, (digest >> 8) & 0xff, digest & 0xff
+    )
+
+
+def get_interfaces():
+    try:
+        return sorted(os.listdir(SYSFS_NET_PATH))
+    except OSError:
+        return []
+
+
+def is_wireless(if_name):
+    return os.path.exists(os.path.join(SYSFS_NET_PATH, if_name, "phy80211"))
+
+
+def add_interface(if_name, wireless):
+    if_path = os.path.join(SYSFS_NET_PATH, if_name)
+    os.makedirs(os.path.join(if_path, "phy80211") if wireless else if_path, exist_ok=True)
+    with open(os.path.join(if_path, "address"), "w") as address_file:
+        address_file.write(get_mac_addr(if_name) + "\n")
+
+
+def remove_interface(if_name):
+    if_path = os.path.join(SYSFS_NET_PATH, if_name)
+    for dir_path, dir_names, file_names in os.walk(if_path, topdown=False):
+        for file_name in file_names:
+            os.unlink(os.path.join(dir_path, file_name))
+        os.rmdir(dir_path)
+
+
+def get_ipv4_addrs(if_name):
+    try:
+        with open(os.path.join(SYSFS_NET_PATH, if_name, "stand_in_ipv4")) as addr_file:
+            return addr_file.read().split()
+    except OSError:
+        return []
+
+
+def set_ipv4_addrs(if_name, addrs):
+    if os.path.isdir(os.path.join(SYSFS_NET_PATH, if_name)):
+        with open(os.path.join(SYSFS_NET_PATH, if_name, "stand_in_ipv4"), "w") as addr_file:
+            addr_file.write(" ".join(addrs))
+
+
+def run_ip(args):
+    """ip addr show/add/flush and ip link, on the interfaces of the sysfs tree."""
+    args = [arg for arg in args if arg != "-4"]
+    if not args or args[0] not in ("addr", "address", "a"):
+        return 0
+    if len(args) == 1 or args[1] == "show":
+        if_names = args[2:3] or get_interfaces()
+        for index, if_name in enumerate(if_names):
+            print("{}: {}: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 state UP".format(index + 1, if_name))
+            print("    link/ether {} brd ff:ff:ff:ff:ff:ff".format(get_mac_addr(if_name)))
+            for addr in get_ipv4_addrs(if_name):
+                print("    inet {}/24 brd {}.255 scope global {}".format(addr, addr.rsplit(".", 1)[0], if_name))
+        return 0
+    if_name = args[args.index("dev") + 1] if "dev" in args else None
+    if args[1] == "add" and if_name:
+        set_ipv4_addrs(if_name, get_ipv4_addrs(if_name) + [args[2].split("/")[0]])
+    elif args[1] == "flush" and if_name:
+        set_ipv4_addrs(if_name, [])
+    return 0
+
+
+def run_iw(args):
+    """iw dev/phy listing, interface add/del."""
+    if args[:1] == ["dev"] and len(args) <= 3:
+        if_names = [args[1]] if len(args) > 1 else [if_name for if_name in get_interfaces() if is_wireless(if_name)]
+        if len(args) == 3 and args[2] == "link":
+            print("Not connected.")
+            return 0
+        for if_name in if_names:
+            if len(args) == 1:
+                print("phy#0")
+            print("\tInterface {}".format(if_name))
+            print("\t\tifindex {}".format(get_interfaces().index(if_name) + 2 if if_name in get_interfaces() else 0))
+            print("\t\taddr {}".format(get_mac_addr(if_name)))
+            print("\t\ttype managed")
+        return 0
+    if args[:1] == ["phy"] and len(args) == 1:
+        print("Wiphy phy0")
+        for band, freqs in ((1, (2412, 2437, 2462)), (2, (5180, 5200, 5745)), (4, (5955, 6115))):
+            print("\tBand {}:".format(band))
+            print("\t\tCapabilities: 0x1ff")
+            if band > 1:
+                print("\t\tVHT Capabilities (0x0f8b69b6):")
+            print("\t\tHE Iftypes: managed, AP")
+            print("\t\tFrequencies:")
+            for freq in freqs:
+                print("\t\t\t* {} MHz [0] (20.0 dBm)".format(freq))
+        print("\tSupported interface modes:")
+        for mode in ("managed", "AP", "P2P-client", "P2P-GO", "P2P-device"):
+            print("\t\t * {}".format(mode))
+        return 0
+    if "interface" in args and "add" in args:
+        add_interface(args[args.index("add") + 1], True)
+    elif args[:1] == ["dev"] and args[2:3] == ["del"]:
+        remove_interface(args[1])
+    return 0
+
+
+def run_brctl(args):
+    if args[:1] == ["addbr"]:
+        add_interface(args[1], False)
+    elif args[:1] == ["delbr"]:
+        remove_interface(args[1])
+    elif args[:1] == ["-V"]:
+        print("bridge-utils, {}".format(FAKE_VERSION))
+    return 0
+
+
+def run_lshw(args):
+    for if_name in get_interfaces():
+        if is_wireless(if_name):
+            print("  *-network\n       description: Wireless interface\n       logical name: {}".format(if_name))
+    return 0
+
+
+def run_dhclient(args):
+    if_names = [arg for arg in args if not arg.startswith("-")]
+    if if_names:
+        set_ipv4_addrs(if_names[-1], [DHCP_CLIENT_IP])
+    return 0
+
+
+def run_cli(name, args, default_ctrl_dir):
+    """hostapd_cli/wpa_cli: sends the command to the control interface of the fake daemon."""
+    ctrl_dir = default_ctrl_dir
+    if_name = None
+    while args and args[0] in ("-i", "-p"):
+        if args[0] == "-i":
+            if_name = args[1]
+        else:
+            ctrl_dir = args[1]
+        args = args[2:]
+    if if_name is None or not args:
+        return 1
+    command = " ".join([args[0].upper()] + args[1:])
+    reply = ctrl_request(os.path.join(ctrl_dir, if_name), command)
+    if reply is None:
+        print("Failed to connect to non-global ctrl_ifname: {}  error: No such file or directory".format(if_name))
+        return 255
+    print(reply)
+    return 0
+
+
+class FakeDaemon:
+    """Fake hostapd/wpa_supplicant: serves PING, STATUS and accepts other commands on its control sockets."""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.ctrl_latency = config.get("ctrl_latency", {}).get(name, {})
+        self.ctrl_replies = config.get("ctrl_replies", {}).get(name, {})
+        self.unsupported = set(config.get("unsupported_ctrl_commands", {}).get(name, []))
+        # {socket: interface name, None for the global control interface}
+        self.sockets = {}
+        self.paths = []
+        self.settings = {}
+
+    def open_ctrl_socket(self, path, if_name):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(path)
+        self.sockets[sock] = if_name
+        self.paths.append(path)
+
+    def close(self, *args):
+        for path in self.paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        sys.exit(0)
+
+    def get_status(self, if_name):
+        return "state=ENABLED\n"
+
+    def get_reply(self, if_name, command):
+        keyword = command.split(" ")[0]
+        if keyword in self.unsupported:
+            return "UNKNOWN COMMAND\n"
+        if keyword in self.ctrl_replies:
+            return self.ctrl_replies[keyword]
+        if keyword == "PING":
+            return "PONG\n"
+        if keyword == "STATUS":
+            return self.get_status(if_name)
+        if keyword == "SET" and len(command.split(" ")) >= 3:
+            key, value = command.split(" ", 2)[1:]
+            self.settings.setdefault(if_name, {})[key] = value
+        return "OK\n"
+
+    def serve(self):
+        signal.signal(signal.SIGTERM, self.close)
+        signal.signal(signal.SIGINT, self.close)
+        while True:
+            readable, _, _ = select.select(list(self.sockets), [], [])
+            for sock in readable:
+                data, addr = sock.recvfrom(CTRL_BUFFER_SIZE)
+                command = data.decode(errors="replace").strip()
+                latency = self.ctrl_latency.get(command.split(" ")[0], self.ctrl_latency.get("default", 0))
+                if latency:
+                    time.sleep(latency)
+                if addr:
+                    sock.sendto(self.get_reply(self.sockets[sock], command).encode(), addr)
+
+
+class FakeHostapd(FakeDaemon):
+
+    def __init__(self, config, args):
+        super().__init__("hostapd", config)
+        # {interface name: {key: value}} from the configuration files
+        self.bss = {}
+        global_ctrl_path = None
+        config_paths = []
+        index = 0
+        while index < len(args):
+            if args[index] in ("-g", "-f", "-P", "-i"):
+                if args[index] == "-g":
+                    global_ctrl_path = args[index + 1]
+                index += 2
+                continue
+            if not args[index].startswith("-"):
+                config_paths.append(args[index])
+            index += 1
+        for config_path in config_paths:
+            self.read_config(config_path)
+        time.sleep(config.get("startup_latency", {}).get(self.name, 0))
+        if global_ctrl_path:
+            self.open_ctrl_socket(global_ctrl_path, None)
+        for if_name, values in self.bss.items():
+            self.open_ctrl_socket(os.path.join(values.get("ctrl_interface", HOSTAPD_CTRL_DIR), if_name), if_name)
+
+    def read_config(self, config_path):
+        values = None
+        with open(config_path) as config_file:
+            for line in config_file:
+                key, _, value = line.strip().partition("=")
+                if key in ("interface", "bss"):
+                    values = self.bss.setdefault(value, {})
+                elif values is not None and key and not key.startswith("#"):
+                    values[key] = value
+
+    def get_status(self, if_name):
+        values = dict(self.bss.get(if_name, {}))
+        values.update(self.settings.get(if_name, {}))
+        channel = int(values.get("channel", "6") or 6)
+        if "op_class" in values and int(values["op_class"]) >= 131:
+            freq = 5950 + 5 * channel
+        elif values.get("hw_mode") == "a":
+            freq = 5000 + 5 * channel
+        else:
+            freq = 2407 + 5 * channel
+        return "state=ENABLED\nphy=phy0\nfreq={}\nchannel={}\nbss[0]={}\nbssid[0]={}\nssid[0]={}\nnum_sta[0]=0\n".format(
+            freq, channel, if_name, get_mac_addr(if_name), values.get("ssid", "")
+        )
+
+
+class FakeWpaSupplicant(FakeDaemon):
+
+    def __init__(self, config, args):
+        super().__init__("wpa_supplicant", config)
+        if_name = args[args.index("-i") + 1]
+        self.values = {}
+        self.network = {}
+        with open(args[args.index("-c") + 1]) as config_file:
+            in_network = False
+            for line in config_file:
+                key, _, value = line.strip().partition("=")
+                if key == "network":
+                    in_network = True
+                elif key == "}":
+                    in_network = False
+                elif key:
+                    (self.network if in_network else self.values)[key] = value.strip('"')
+        ctrl_dir = self.values.get("ctrl_interface", WPA_SUPPLICANT_CTRL_DIR)
+        ctrl_dir = re.sub(r"^DIR=(\S+).*", r"\1", ctrl_dir)
+        self.associated_at = time.monotonic() + config.get("associate_latency", 0)
+        time.sleep(config.get("startup_latency", {}).get(self.name, 0))
+        self.open_ctrl_socket(os.path.join(ctrl_dir, if_name), if_name)
+        if "device_name" in self.values:
+            self.open_ctrl_socket(os.path.join(ctrl_dir, "p2p-dev-" + if_name), "p2p-dev-" + if_name)
+
+    def get_reply(self, if_name, command):
+        keyword = command.split(" ")[0]
+        if keyword in ("DISCONNECT", "REMOVE_NETWORK"):
+            self.network = {}
+        return super().get_reply(if_name, command)
+
+    def get_status(self, if_name):
+        if not self.network.get("ssid") or time.monotonic() < self.associated_at:
+            return "wpa_state=SCANNING\naddress={}\n".format(get_mac_addr(if_name))
+        return "bssid=02:00:00:00:01:00\nfreq=2437\nssid={}\nid=0\nmode=station\nwpa_state=COMPLETED\naddress={}\n".format(
+            self.network["ssid"], get_mac_addr(if_name)
+        )
+
+
+def run_scripted_output(name, args, config):
+    """Prints the first scripted output matching the tool and its arguments, returns its exit code or None."""
+    command_line = " ".join(args)
+    for output in config.get("outputs", []):
+        if output.get("tool") == name and re.search(output.get("args", ""), command_line):
+            sys.stdout.write(output.get("stdout", ""))
+            return output.get("exit", 0)
+    return None
+
+
+def main():
+    name = sys.argv[1]
+    args = sys.argv[2:]
+    if name == "sudo":
+        os.execvp(args[0], args)
+    # The output of the tools is parsed by the control app, keep the logs out of it
+    DutLogger.set_level(LogCategory.ERROR)
+    config = load_config()
+    latency = config.get("latency", {}).get(name, 0)
+    if latency:
+        time.sleep(latency)
+    status = run_scripted_output(name, args, config)
+    if status is not None:
+        return status
+    if name in ("hostapd", "wpa_supplicant"):
+        if "-v" in args:
+            print("{} v{}".format(name, FAKE_VERSION))
+            return 1
+        daemon = FakeHostapd(config, args) if name == "hostapd" else FakeWpaSupplicant(config, args)
+        daemon.serve()
+    tools = {
+        "ip": run_ip,
+        "iw": run_iw,
+        "brctl": run_brctl,
+        "lshw": run_lshw,
+        "dhclient": run_dhclient,
+        "hostapd_cli": lambda args: run_cli(name, args, HOSTAPD_CTRL_DIR),
+        "wpa_cli": lambda args: run_cli(name, args, WPA_SUPPLICANT_CTRL_DIR),
+    }
+    # Tools without built-in behavior (rfkill, killall, pidof, dhcpd) succeed silently
+    return tools.get(name, lambda args: 0)(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""End-to-end latency benchmark of QuickTrack API sequences on the stand-in DUT.
+
+Runs the real control app against the fake tools and daemons of StandInDut, plays an AP and/or a STA
+test sequence a number of times and prints the median and maximum response time of each API.
+With --save the medians are written to a JSON file, with --baseline they are compared to such a
+file and the exit status is 1 when an API got slower than the baseline by more than --tolerance.
+
+Usage: python3 -m standInDut.stand_in_benchmark [--sequence=ap|sta|all] [--iterations=N]
+                                                [--tool-latency=MS] [--daemon-startup=MS] [--fast-path]
+                                                [--save=FILE] [--baseline=FILE] [--tolerance=PERCENT]
+"""
+import getopt
+import json
+import sys
+from Commands.dut_logger import DutLogger, LogCategory
+from Commands.shared_enums import QuickTrackRequestTLV, DutType
+from quicktrack_api_message.quicktrack_api_message import QuickTrackMessageType
+from standInDut.stand_in_dut import StandInDut, FAKE_TOOLS
+
+DEFAULT_ITERATIONS = 5
+DEFAULT_TOLERANCE = 20
+# Absolute slack of the baseline comparison, for the APIs answering in a few milliseconds
+BASELINE_SLACK_MS = 5
+
+AP_SEQUENCE = [
+    (QuickTrackMessageType.DEVICE_RESET, {QuickTrackRequestTLV.ROLE: DutType.APUT.value, QuickTrackRequestTLV.DEBUG_LEVEL: 0}),
+    (QuickTrackMessageType.AP_CONFIGURE, {QuickTrackRequestTLV.SSID: "QuickTrack", QuickTrackRequestTLV.CHANNEL: 36,
+                                          QuickTrackRequestTLV.HW_MODE: "a", QuickTrackRequestTLV.IEEE80211_AC: 1}),
+    (QuickTrackMessageType.AP_START_UP, {}),
+    (QuickTrackMessageType.GET_MAC_ADDR, {QuickTrackRequestTLV.ROLE: DutType.APUT.value, QuickTrackRequestTLV.SSID: "QuickTrack"}),
+    (QuickTrackMessageType.START_DHCP, {QuickTrackRequestTLV.ROLE: DutType.APUT.value, QuickTrackRequestTLV.STATIC_IP: "0.0.0.0"}),
+    (QuickTrackMessageType.AP_STOP, {}),
+]
+STA_SEQUENCE = [
+    (QuickTrackMessageType.DEVICE_RESET, {QuickTrackRequestTLV.ROLE: DutType.STAUT.value, QuickTrackRequestTLV.DEBUG_LEVEL: 0}),
+    (QuickTrackMessageType.STA_CONFIGURE, {QuickTrackRequestTLV.STA_SSID: "QuickTrack"}),
+    (QuickTrackMessageType.STA_ASSOCIATE, {}),
+    (QuickTrackMessageType.GET_MAC_ADDR, {QuickTrackRequestTLV.ROLE: DutType.STAUT.value, QuickTrackRequestTLV.SSID: "QuickTrack"}),
+    (QuickTrackMessageType.START_DHCP, {QuickTrackRequestTLV.ROLE: DutType.STAUT.value, QuickTrackRequestTLV.DHCP_WAIT_TIMEOUT: 5}),
+    (QuickTrackMessageType.STA_DISCONNECT, {}),
+]
+SEQUENCES = {"ap": AP_SEQUENCE, "sta": STA_SEQUENCE}
+
+
+def run_sequences(dut, sequence_names, iterations):
+    """Plays the sequences and returns {"<sequence>/<API>": [milliseconds of each run]}."""
+    results = {}
+    for iteration in range(iterations):
+        for sequence_name in sequence_names:
+            for message_type, params in SEQUENCES[sequence_name]:
+                status, message, tlvs, elapsed_ms = dut.request(message_type, params)
+                if status != 0:
+                    print("{} {} failed: {}".format(sequence_name, message_type.name, message))
+                results.setdefault("{}/{}".format(sequence_name, message_type.name), []).append(elapsed_ms)
+    return results
+
+
+def get_median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def compare_to_baseline(medians, baseline, tolerance):
+    """Prints the APIs slower than the baseline and returns their number."""
+    regressions = 0
+    for name, median in medians.items():
+        if name in baseline and median > baseline[name] * (1 + tolerance / 100) + BASELINE_SLACK_MS:
+            print("regression: {} median {:.1f} ms, baseline {:.1f} ms".format(name, median, baseline[name]))
+            regressions += 1
+    return regressions
+
+
+def main():
+    try:
+        options, args = getopt.getopt(sys.argv[1:], "", [
+            "sequence=", "iterations=", "tool-latency=", "daemon-startup=", "fast-path", "save=", "baseline=",
+            "tolerance="])
+    except getopt.GetoptError as err:
+        print(err)
+        print(__doc__)
+        sys.exit(2)
+    options = dict(options)
+    sequence = options.get("--sequence", "all")
+    sequence_names = list(SEQUENCES) if sequence == "all" else [sequence]
+    iterations = int(options.get("--iterations", DEFAULT_ITERATIONS))
+    tool_latency = float(options.get("--tool-latency", 0)) / 1000
+    daemon_startup = float(options.get("--daemon-startup", 0)) / 1000
+    DutLogger.set_level(LogCategory.ERROR)
+
+    with StandInDut(
+        latency={tool: tool_latency for tool in FAKE_TOOLS if tool != "sudo"},
+        startup_latency={"hostapd": daemon_startup, "wpa_supplicant": daemon_startup},
+    ) as dut:
+        startup_ms = dut.start_app(args=["--fast-path"] if "--fast-path" in options else [])
+        results = run_sequences(dut, sequence_names, iterations)
+
+    print("control app ready in {:.1f} ms".format(startup_ms))
+    print("{:<32} {:>10} {:>10}".format("API", "median ms", "max ms"))
+    medians = {}
+    for name, values in results.items():
+        medians[name] = get_median(values)
+        print("{:<32} {:>10.1f} {:>10.1f}".format(name, medians[name], max(values)))
+
+    if "--save" in options:
+        with open(options["--save"], "w") as save_file:
+            json.dump(medians, save_file, indent=2)
+    if "--baseline" in options:
+        with open(options["--baseline"]) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare_to_baseline(medians, baseline, float(options.get("--tolerance", DEFAULT_TOLERANCE))):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Stand-in DUT: runs the real control app against fake hostapd, wpa_supplicant and network tools.
+
+The stand-in DUT is a directory tree (a temporary one by default) that QUICKTRACK_DUT_ROOT points
+the control app to, see Commands/dut_environment.py. It holds:
+- bin/: sudo, ip, iw, brctl, rfkill, killall, pidof, lshw, dhcpd, dhclient, hostapd_cli and
+  wpa_cli running fake_tools.py, put first on the PATH of the control app;
+- usr/local/bin/WFA-Hostapd-Supplicant/: fake hostapd and wpa_supplicant daemons serving their
+  control interface sockets under var/run;
+- sys/class/net/: the wireless interfaces, wlan0 by default;
+- stand_in_dut.json: latencies and scripted outputs of the fake tools.
+
+Usage:
+    with StandInDut(latency={"iw": 0.005}, startup_latency={"hostapd": 0.05}) as dut:
+        dut.start_app()
+        status, message, tlvs, elapsed_ms = dut.request(QuickTrackMessageType.GET_CONTROL_APP_VERSION)
+"""
+import itertools
+import json
+import os
+import shutil
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from quicktrack_api_message.quicktrack_api_message import QuickTrackAPIMessage, QuickTrackMessageType
+from Commands.shared_enums import QuickTrackResponseTLV
+from Commands.dut_capabilities import KNOWN_CTRL_COMMANDS
+from Commands.dut_environment import DUT_ROOT_ENV
+from standInDut import fake_tools
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_TOOLS = ("sudo", "ip", "iw", "brctl", "rfkill", "killall", "pidof", "lshw", "dhcpd", "dhclient",
+              "hostapd_cli", "wpa_cli")
+FAKE_DAEMONS = ("hostapd", "wpa_supplicant")
+DAEMON_DIR = "usr/local/bin/WFA-Hostapd-Supplicant"
+TREE_DIRS = ("bin", DAEMON_DIR, "etc/hostapd", "etc/wpa_supplicant", "etc/dhcp", "var/lib/dhcp", "var/log",
+             "var/run/hostapd", "var/run/wpa_supplicant", "run", "sys/class/net")
+DEFAULT_PORT = 9204
+DEFAULT_TIMEOUT = 30.0
+READY_PROBE_INTERVAL = 0.01
+
+
+class StandInDut:
+    """Stand-in DUT tree, and the control app running on it.
+
+    Parameters
+    ----------
+    root : str, optional
+        Directory of the tree, a temporary directory removed by remove() by default.
+    interfaces : list
+        Wireless interfaces of the stand-in DUT.
+    latency : dict
+        {tool name: seconds each run of the tool takes}
+    startup_latency : dict
+        {"hostapd"/"wpa_supplicant": seconds before the daemon opens its control sockets}
+    ctrl_latency : dict
+        {"hostapd"/"wpa_supplicant": {control command or "default": seconds before the reply}}
+    ctrl_replies : dict
+        {"hostapd"/"wpa_supplicant": {control command: scripted reply}}
+    outputs : list
+        Scripted outputs, dicts with "tool", "args" (regex searched in the arguments), "stdout", "exit".
+    unsupported_ctrl_commands : dict
+        {"hostapd"/"wpa_supplicant": [control commands the daemon replies UNKNOWN COMMAND to]}
+    associate_latency : float
+        Seconds before wpa_supplicant reports COMPLETED after it started.
+    """
+
+    def __init__(self, root=None, interfaces=("wlan0",), latency=None, startup_latency=None, ctrl_latency=None,
+                 ctrl_replies=None, outputs=None, unsupported_ctrl_commands=None, associate_latency=0):
+        self.temporary = root is None
+        self.root = root or tempfile.mkdtemp(prefix="stand_in_dut_")
+        self.interfaces = list(interfaces)
+        self.config = {
+            "latency": latency or {},
+            "startup_latency": startup_latency or {},
+            "ctrl_latency": ctrl_latency or {},
+            "ctrl_replies": ctrl_replies or {},
+            "outputs": outputs or [],
+            "unsupported_ctrl_commands": unsupported_ctrl_commands or {},
+            "associate_latency": associate_latency,
+        }
+        self.app = None
+        self.port = None
+        self.sock = None
+        self.__message_ids = itertools.count(1)
+        self.create()
+
+    def create(self):
+        """Creates the tree, the fake tools and the interfaces."""
+        for tree_dir in TREE_DIRS:
+            os.makedirs(os.path.join(self.root, tree_dir), exist_ok=True)
+        self.write_config()
+        for tool in FAKE_TOOLS:
+            self.install_tool(os.path.join(self.root, "bin", tool), tool)
+        for daemon in FAKE_DAEMONS:
+            self.install_tool(os.path.join(self.root, DAEMON_DIR, daemon), daemon)
+        for if_name in self.interfaces:
+            os.makedirs(os.path.join(self.root, "sys/class/net", if_name, "phy80211"), exist_ok=True)
+            with open(os.path.join(self.root, "sys/class/net", if_name, "address"), "w") as address_file:
+                address_file.write(fake_tools.get_mac_addr(if_name) + "\n")
+
+    def write_config(self):
+        """Writes the latencies and scripted outputs, read by each run of the fake tools."""
+        with open(os.path.join(self.root, "stand_in_dut.json"), "w") as config_file:
+            json.dump(self.config, config_file, indent=2)
+
+    def install_tool(self, path, name):
+        """Writes a script running fake_tools.py as name. The daemons also list the control commands
+        they implement after the script, where the capability probe of the control app looks for them."""
+        content = '#!/bin/sh\nexec "{}" "{}" {} "$@"\n'.format(
+            sys.executable, os.path.join(REPO_DIR, "standInDut", "fake_tools.py"), name).encode()
+        if name in KNOWN_CTRL_COMMANDS:
+            unsupported = self.config["unsupported_ctrl_commands"].get(name, [])
+            supported = [command for command in KNOWN_CTRL_COMMANDS[name] if command.strip() not in unsupported]
+            content += b"\x00" + b"\x00".join(command.encode() for command in supported) + b"\x00"
+        with open(path, "wb") as tool_file:
+            tool_file.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    def get_env(self):
+        env = dict(os.environ)
+        env[DUT_ROOT_ENV] = self.root
+        env["PATH"] = os.path.join(self.root, "bin") + os.pathsep + env.get("PATH", "")
+        return env
+
+    def start_app(self, port=DEFAULT_PORT, interface=None, args=(), timeout=DEFAULT_TIMEOUT):
+        """Starts app.py on 127.0.0.1 and waits until it answers.
+
+        Returns
+        -------
+        float
+            Milliseconds from the start of the app to its first answer.
+        """
+        self.port = port
+        begin = time.monotonic()
+        self.app = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, "app.py"), "--ip=127.0.0.1", "--port={}".format(port),
+             "--interface={}".format(interface or self.interfaces[0])] + list(args),
+            cwd=REPO_DIR, env=self.get_env(), stdin=subprocess.DEVNULL,
+            stdout=open(os.path.join(self.root, "var/log/app_output.log"), "a"), stderr=subprocess.STDOUT
+        )
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        while time.monotonic() - begin < timeout:
+            if self.app.poll() is not None:
+                raise RuntimeError("Control app exited with status {}, see {}".format(
+                    self.app.returncode, os.path.join(self.root, "var/log/app_output.log")))
+            try:
+                self.request(QuickTrackMessageType.GET_CONTROL_APP_VERSION, timeout=READY_PROBE_INTERVAL)
+                return (time.monotonic() - begin) * 1000
+            except (socket.timeout, ConnectionRefusedError):
+                continue
+        raise RuntimeError("Control app not answering after {} s".format(timeout))
+
+    def request(self, message_type, params=None, timeout=DEFAULT_TIMEOUT):
+        """Sends a QuickTrack API message and waits for its response.
+
+        Returns
+        -------
+        tuple
+            (status, message, {QuickTrackResponseTLV: value}, milliseconds until the response)
+        """
+        message = QuickTrackAPIMessage(message_type, params or {})
+        message.set_message_id(next(self.__message_ids) & 0xFFFF)
+        self.sock.settimeout(timeout)
+        begin = time.monotonic()
+        self.sock.sendto(message.get_message_bytes(), ("127.0.0.1", self.port))
+        while True:
+            data = self.sock.recv(4096)
+            response = QuickTrackAPIMessage()
+            response.decode_bytes(data)
+            if response.message_type == QuickTrackMessageType.CMD_RESPONSE and response.message_id == message.message_id:
+                elapsed_ms = (time.monotonic() - begin) * 1000
+                tlvs = response.message_params or {}
+                return (int(tlvs.get(QuickTrackResponseTLV.STATUS, 1)), tlvs.get(QuickTrackResponseTLV.MESSAGE),
+                        tlvs, elapsed_ms)
+
+    def stop_app(self):
+        """Stops the control app and the fake daemons it started."""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        if self.app is not None:
+            self.app.terminate()
+            try:
+                self.app.wait(5)
+            except subprocess.TimeoutExpired:
+                self.app.kill()
+                self.app.wait()
+            self.app = None
+        # Daemons left running by a killed app still hold their control sockets
+        subprocess.run(["pkill", "-f", "fake_tools.py .*{}".format(self.root)], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+    def remove(self):
+        self.stop_app()
+        if self.temporary:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.remove()
@@ -0,0 +1,96 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""Measures how long the control app takes to answer its first QuickTrack API message.
+
+Starts app.py as a new process, sends GET_CONTROL_APP_VERSION to it until the acknowledgement
+comes back, stops it and starts again, then prints the distribution of the startup times.
+The app has to be started as root, so does this script.
+
+Usage: python3 startup_benchmark.py --interface=<interface name or band:name list> [--runs=N]
+                                    [--port=PORT] [--fast-start]
+"""
+import getopt
+import os
+import socket
+import subprocess
+import sys
+import time
+from quicktrack_api_message.quicktrack_api_message import QuickTrackAPIMessage, QuickTrackMessageType
+
+DEFAULT_RUNS = 10
+DEFAULT_PORT = 9104
+# Period at which the version request is resent until the app listens
+PROBE_INTERVAL = 0.005
+STARTUP_TIMEOUT = 30.0
+
+
+def measure_startup(app_args, port):
+    """Starts the control app and returns the milliseconds until it acknowledged a message,
+    None when it didn't within STARTUP_TIMEOUT."""
+    message = QuickTrackAPIMessage(QuickTrackMessageType.GET_CONTROL_APP_VERSION, {}).get_message_bytes()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(PROBE_INTERVAL)
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    begin = time.monotonic()
+    app = subprocess.Popen(
+        [sys.executable, os.path.join(app_dir, "app.py")] + app_args,
+        cwd=app_dir, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.monotonic() - begin < STARTUP_TIMEOUT and app.poll() is None:
+            sock.sendto(message, ("127.0.0.1", port))
+            try:
+                sock.recv(1024)
+                return (time.monotonic() - begin) * 1000
+            except (socket.timeout, ConnectionRefusedError):
+                continue
+        return None
+    finally:
+        app.kill()
+        app.wait()
+        sock.close()
+
+
+def main():
+    try:
+        options, args = getopt.getopt(sys.argv[1:], "", ["interface=", "runs=", "port=", "fast-start"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(1)
+    options = dict(options)
+    if "--interface" not in options:
+        print(__doc__)
+        sys.exit(1)
+    runs = int(options.get("--runs", DEFAULT_RUNS))
+    port = int(options.get("--port", DEFAULT_PORT))
+    app_args = ["--interface={}".format(options["--interface"]), "--ip=127.0.0.1", "--port={}".format(port)]
+    if "--fast-start" in options:
+        app_args.append("--fast-start")
+
+    startup_times = []
+    for run in range(runs):
+        startup_ms = measure_startup(app_args, port)
+        if startup_ms is None:
+            print("run {}: no answer within {} s".format(run, STARTUP_TIMEOUT))
+            sys.exit(1)
+        startup_times.append(startup_ms)
+    startup_times.sort()
+    print("{} runs: min {:.1f} ms, median {:.1f} ms, max {:.1f} ms".format(
+        runs, startup_times[0], startup_times[len(startup_times) // 2], startup_times[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# Copyright (c) 2020 Wi-Fi Alliance
+
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL
+# WARRANTIES WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT, OR
+# CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING
+# FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF
+# CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT
+# OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""QuickTrack test tool simulator: load generator and latency percentiles of the control app.
+
+Plays a scenario of QuickTrack API messages against a control app, the real one (--ip/--port) or
+one started on the stand-in DUT (--stand-in), from a number of concurrent sessions, each one
+with its own UDP socket, and at a limited message rate. Each message waits for its ACK and its
+response, matched by message_id, and is retransmitted with the same message_id when the ACK
+doesn't come back in time. The report gives the response time percentiles of each message type.
+
+A scenario is a JSON list of steps, or a trace recorded by the control app with --trace (one
+JSON object per line, secret TLV values are replayed redacted). A step is
+    {"type": "AP_CONFIGURE", "tlvs": {"SSID": "QuickTrack", "CHANNEL": "36"}, "delay_ms": 0}
+with the QuickTrackMessageType and QuickTrackRequestTLV names. Without scenario, the AP and STA
+sequences of the stand-in DUT benchmark are played.
+
+Usage: python3 -m toolSimulator.tool_simulator [--ip=IP] [--port=PORT] [--stand-in] [--scenario=FILE]
+                                               [--keep-timing] [--concurrency=N] [--rate=MSG_PER_S]
+                                               [--iterations=N] [--ack-timeout=MS] [--response-timeout=MS]
+                                               [--retries=N]
+"""
+import getopt
+import itertools
+import json
+import math
+import socket
+import sys
+import time
+from threading import Lock, Thread
+from Commands.dut_logger import DutLogger, LogCategory
+from Commands.shared_enums import QuickTrackRequestTLV, QuickTrackResponseTLV
+from quicktrack_api_message.quicktrack_api_message import QuickTrackAPIMessage, QuickTrackMessageType
+
+DEFAULT_IP = "127.0.0.1"
+DEFAULT_PORT = 9004
+DEFAULT_ACK_TIMEOUT = 1.0
+DEFAULT_RESPONSE_TIMEOUT = 60.0
+DEFAULT_RETRIES = 3
+PERCENTILES = (50, 95, 99)
+RECV_BUFFER_SIZE = 4096
+
+
+class Step:
+    """A message of a scenario and the time to wait before sending it."""
+
+    def __init__(self, message_type: QuickTrackMessageType, params: dict, delay: float = 0):
+        self.message_type = message_type
+        self.params = params
+        self.delay = delay
+
+
+def load_scenario(path: str, keep_timing: bool = False):
+    """Reads a JSON list of steps or a trace of the control app.
+
+    Parameters
+    ----------
+    path : str
+        Scenario file.
+    keep_timing : bool
+        Wait between the messages of a trace as long as between their original receptions.
+
+    Returns
+    -------
+    list
+        The Steps, the messages of unknown type are skipped.
+    """
+    with open(path) as scenario_file:
+        content = scenario_file.read()
+    try:
+        entries = json.loads(content)
+    except ValueError:
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    steps = []
+    previous_ts = None
+    for entry in entries:
+        message_type = QuickTrackMessageType.__members__.get(entry.get("type") or "")
+        if message_type is None:
+            DutLogger.log(LogCategory.ERROR, "Skipping message of unknown type {}".format(entry.get("type")))
+            continue
+        params = {QuickTrackRequestTLV[name]: value for name, value in entry.get("tlvs", {}).items()}
+        delay = entry.get("delay_ms", 0) / 1000
+        if keep_timing and "ts" in entry:
+            delay = max(entry["ts"] - previous_ts, 0) if previous_ts is not None else 0
+            previous_ts = entry["ts"]
+        steps.append(Step(message_type, params, delay))
+    return steps
+
+
+def get_default_scenario():
+    """AP then STA sequence of the stand-in DUT benchmark."""
+    from standInDut.stand_in_benchmark import AP_SEQUENCE, STA_SEQUENCE
+    return [Step(message_type, params) for message_type, params in AP_SEQUENCE + STA_SEQUENCE]
+
+
+def get_percentile(sorted_values: list, percentile: int):
+    """Nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(percentile / 100 * len(sorted_values)) - 1, 0)]
+
+
+class RateLimiter:
+    """Token bucket shared by the sessions, None rate for no limit."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self.__next_time = time.monotonic()
+        self.__lock = Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.__lock:
+            now = time.monotonic()
+            send_time = max(self.__next_time, now)
+            self.__next_time = send_time + self.interval
+        if send_time > now:
+            time.sleep(send_time - now)
+
+
+class MessageTypeStats:
+    """Response times and failures of the messages of one type."""
+
+    def __init__(self):
+        self.response_ms = []
+        self.ack_ms = []
+        self.failures = 0
+        self.timeouts = 0
+        self.retransmits = 0
+
+
+class SimulatorStats:
+    """Statistics of all the sessions, by message type."""
+
+    def __init__(self):
+        self.__lock = Lock()
+        # {QuickTrackMessageType: MessageTypeStats}
+        self.by_type = {}
+
+    def record(self, message_type, ack_ms, response_ms, status, retransmits):
+        """Records the outcome of a message, response_ms None on timeout."""
+        with self.__lock:
+            stats = self.by_type.setdefault(message_type, MessageTypeStats())
+            stats.retransmits += retransmits
+            if ack_ms is not None:
+                stats.ack_ms.append(ack_ms)
+            if response_ms is None:
+                stats.timeouts += 1
+                return
+            stats.response_ms.append(response_ms)
+            if status != 0:
+                stats.failures += 1
+
+    def get_response_count(self):
+        return sum(len(stats.response_ms) for stats in self.by_type.values())
+
+    def format_report(self, duration: float):
+        lines = ["{:<26} {:>6} {:>5} {:>5} {:>6} {:>8} {:>8} {:>8} {:>8} {:>8}".format(
+            "message type", "count", "fail", "t/o", "retx", "ack p50", "p50 ms", "p95 ms", "p99 ms", "max ms")]
+        for message_type, stats in self.by_type.items():
+            response_ms = sorted(stats.response_ms)
+            values = [get_percentile(sorted(stats.ack_ms), 50)]
+            values += [get_percentile(response_ms, percentile) for percentile in PERCENTILES]
+            values.append(response_ms[-1] if response_ms else None)
+            lines.append("{:<26} {:>6} {:>5} {:>5} {:>6} ".format(
+                message_type.name, len(response_ms) + stats.timeouts, stats.failures, stats.timeouts, stats.retransmits
+            ) + " ".join("{:>8}".format("-" if value is None else "{:.1f}".format(value)) for value in values))
+        responses = self.get_response_count()
+        lines.append("{} responses in {:.2f} s, {:.1f} messages/s".format(
+            responses, duration, responses / duration if duration else 0))
+        return "\n".join(lines)
+
+
+class ToolSimulator:
+    """Concurrent sessions playing a scenario against a control app.
+
+    Parameters
+    ----------
+    address : tuple
+        (IP, port) of the control app.
+    scenario : list
+        Steps played in order by each session.
+    concurrency : int
+        Number of sessions.
+    rate : float
+        Maximum number of messages sent per second by all the sessions, None for no limit.
+    iterations : int
+        Number of times each session plays the scenario.
+    ack_timeout : float
+        Seconds without ACK before the message is retransmitted.
+    response_timeout : float
+        Seconds without response after the ACK before the message is counted as timed out.
+    retries : int
+        Maximum number of retransmissions of a message.
+    """
+
+    def __init__(self, address, scenario, concurrency=1, rate=None, iterations=1, ack_timeout=DEFAULT_ACK_TIMEOUT,
+                 response_timeout=DEFAULT_RESPONSE_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.address = address
+        self.scenario = scenario
+        self.concurrency = concurrency
+        self.iterations = iterations
+        self.ack_timeout = ack_timeout
+        self.response_timeout = response_timeout
+        self.retries = retries
+        self.rate_limiter = RateLimiter(rate)
+        self.stats = SimulatorStats()
+        self.duration = 0
+        self.__message_ids = itertools.count(1)
+        self.__message_id_lock = Lock()
+
+    def next_message_id(self):
+        with self.__message_id_lock:
+            return next(self.__message_ids) & 0xFFFF
+
+    def run(self):
+        """Runs the sessions until they have played the scenario and returns the statistics."""
+        sessions = [Thread(target=self.run_session, daemon=True) for _ in range(self.concurrency)]
+        begin = time.monotonic()
+        for session in sessions:
+            session.start()
+        for session in sessions:
+            session.join()
+        self.duration = time.monotonic() - begin
+        return self.stats
+
+    def run_session(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for iteration in range(self.iterations):
+                for step in self.scenario:
+                    if step.delay:
+                        time.sleep(step.delay)
+                    self.rate_limiter.acquire()
+                    self.send_message(sock, step)
+        finally:
+            sock.close()
+
+    def send_message(self, sock, step):
+        """Sends a message, retransmitting it until it is acknowledged, and waits for its response."""
+        message = QuickTrackAPIMessage(step.message_type, step.params)
+        message.set_message_id(self.next_message_id())
+        message_bytes = message.get_message_bytes()
+        begin = time.monotonic()
+        ack_ms = None
+        retransmits = 0
+        sock.sendto(message_bytes, self.address)
+        deadline = begin + self.ack_timeout
+        while True:
+            sock.settimeout(max(deadline - time.monotonic(), 0.0001))
+            try:
+                data = sock.recv(RECV_BUFFER_SIZE)
+            except socket.timeout:
+                if ack_ms is None and retransmits < self.retries:
+                    retransmits += 1
+                    sock.sendto(message_bytes, self.address)
+                    deadline = time.monotonic() + self.ack_timeout
+                    continue
+                self.stats.record(step.message_type, ack_ms, None, None, retransmits)
+                return
+            response = QuickTrackAPIMessage()
+            response.decode_bytes(data)
+            # Late answers to a previous message of the session are dropped
+            if response.message_id != message.message_id:
+                continue
+            elapsed_ms = (time.monotonic() - begin) * 1000
+            if response.message_type == QuickTrackMessageType.CMD_ACK:
+                if ack_ms is None:
+                    ack_ms = elapsed_ms
+                    deadline = time.monotonic() + self.response_timeout
+            elif response.message_type == QuickTrackMessageType.CMD_RESPONSE:
+                tlvs = response.message_params or {}
+                status = int(tlvs.get(QuickTrackResponseTLV.STATUS, 1))
+                self.stats.record(step.message_type, ack_ms, elapsed_ms, status, retransmits)
+                return
+
+
+def main():
+    try:
+        options, args = getopt.getopt(sys.argv[1:], "", [
+            "ip=", "port=", "stand-in", "scenario=", "keep-timing", "concurrency=", "rate=", "iterations=",
+            "ack-timeout=", "response-timeout=", "retries="])
+    except getopt.GetoptError as err:
+        print(err)
+        print(__doc__)
+        sys.exit(2)
+    options = dict(options)
+    DutLogger.set_level(LogCategory.ERROR)
+    if "--scenario" in options:
+        scenario = load_scenario(options["--scenario"], "--keep-timing" in options)
+    else:
+        scenario = get_default_scenario()
+    rate = float(options["--rate"]) if "--rate" in options else None
+
+    dut = None
+    address = (options.get("--ip", DEFAULT_IP), int(options.get("--port", DEFAULT_PORT)))
+    if "--stand-in" in options:
+        from standInDut.stand_in_dut import StandInDut
+        dut = StandInDut()
+        dut.start_app(port=address[1])
+        address = ("127.0.0.1", address[1])
+    try:
+        simulator = ToolSimulator(
+            address, scenario,
+            concurrency=int(options.get("--concurrency", 1)),
+            rate=rate,
+            iterations=int(options.get("--iterations", 1)),
+            ack_timeout=float(options.get("--ack-timeout", DEFAULT_ACK_TIMEOUT * 1000)) / 1000,
+            response_timeout=float(options.get("--response-timeout", DEFAULT_RESPONSE_TIMEOUT * 1000)) / 1000,
+            retries=int(options.get("--retries", DEFAULT_RETRIES)),
+        )
+        stats = simulator.run()
+    finally:
+        if dut is not None:
+            dut.remove()
+    print(stats.format_report(simulator.duration))
+
+
+if __name__ == "__main__":
+    main()